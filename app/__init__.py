@@ -4,6 +4,10 @@ import os
 from flask_jwt_extended import JWTManager
 from .config import Config
 from .database import db, ma
+from .busca import preparar_busca_clientes
+from .analises import preparar_analises
+from .numeracao import preparar_numeracao
+from .instrumentacao import instalar_instrumentacao
 from flask_migrate import Migrate
 
 from swagger.swagger_config import configure_swagger
@@ -13,6 +17,7 @@ from app.routes.contrato_route import contrato_bp
 from app.routes.acordo_route import acordo_bp
 from app.routes.importadores_route import import_bp
 from app.routes.usuario_route import usuario_bp
+from app.routes.analise_route import analise_bp
 
 migrate = Migrate()
 jwt = JWTManager()
@@ -29,12 +34,14 @@ def create_app():
     migrate.init_app(app, db)
 
     jwt.init_app(app)
+    instalar_instrumentacao(app)
 
     app.register_blueprint(cliente_bp, url_prefix="/clientes")
     app.register_blueprint(contrato_bp, url_prefix="/contratos")
     app.register_blueprint(acordo_bp, url_prefix="/acordos")
     app.register_blueprint(import_bp)
     app.register_blueprint(usuario_bp, url_prefix="/usuarios")
+    app.register_blueprint(analise_bp, url_prefix="/analises")
 
     importadores_path = os.path.join(os.path.dirname(__file__), "..", "importadores")
 
@@ -51,5 +58,8 @@ def create_app():
 
     with app.app_context():
         db.create_all()
+        preparar_busca_clientes(app)
+        preparar_analises(app)
+        preparar_numeracao(app)
 
     return app
\ No newline at end of file
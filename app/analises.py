@@ -0,0 +1,326 @@
+"""
+Resumo da carteira para os relatórios (aging, filiais, conversão em acordos).
+
+Os relatórios somam `analise_carteira` (uma linha por dia de vencimento, filial
+e situação do último acordo) em vez de ler cada contrato; sem filtro de filial,
+o aging e a conversão somam `analise_carteira_dia` (dia e situação) e os totais
+por filial, `analise_carteira_mes` (mês, filial e situação). Cada banco mantém
+os resumos como pode:
+
+    postgresql/sqlite -> triggers em `contrato` e `acordos` marcam em
+                         `analise_pendencias` os pares (dia de vencimento,
+                         filial) alterados; `atualizar_analises` recalcula só
+                         esses pares, com GROUP BY na faixa do índice de
+                         vencimento, e os dias/meses que eles somam
+    outros            -> sem triggers: os relatórios agrupam os contratos na hora
+
+A faixa de atraso é calculada na consulta a partir do dia de vencimento, então
+o resumo não fica velho de um dia para o outro. O migration `a9d4e1b6c2f8` cria
+os triggers; `preparar_analises` faz o mesmo ao subir o app (bancos criados por
+`db.create_all`) e, ao instalá-los, marca tudo como pendente para o primeiro
+recálculo montar os resumos.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from flask import current_app
+from sqlalchemy import Date, bindparam, cast, func, insert, select, text
+from sqlalchemy.orm import aliased
+from app.database import db
+from app.models.acordo import Acordo
+from app.models.analise import AnaliseCarteira, AnaliseCarteiraDia, AnaliseCarteiraMes, AnalisePendencia
+from app.models.contrato import Contrato
+
+SEM_ACORDO = "sem_acordo"
+COLUNAS_RESUMO = ["vencimento", "filial", "situacao", "contratos", "valor_contratos", "valor_acordos"]
+
+DDL_SQLITE = [
+    "CREATE TRIGGER IF NOT EXISTS analise_contrato_ai AFTER INSERT ON contrato BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(new.vencimento), new.filial "
+    "WHERE new.vencimento IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS analise_contrato_ad AFTER DELETE ON contrato BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(old.vencimento), old.filial "
+    "WHERE old.vencimento IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS analise_contrato_au AFTER UPDATE OF vencimento, filial, valor_total ON contrato BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(old.vencimento), old.filial "
+    "WHERE old.vencimento IS NOT NULL; "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(new.vencimento), new.filial "
+    "WHERE new.vencimento IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS analise_acordo_ai AFTER INSERT ON acordos BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(vencimento), filial FROM contrato "
+    "WHERE numero_contrato = new.contrato_id AND vencimento IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS analise_acordo_ad AFTER DELETE ON acordos BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(vencimento), filial FROM contrato "
+    "WHERE numero_contrato = old.contrato_id AND vencimento IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS analise_acordo_au AFTER UPDATE OF status, valor_total, contrato_id ON acordos BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(vencimento), filial FROM contrato "
+    "WHERE numero_contrato = old.contrato_id AND vencimento IS NOT NULL; "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(vencimento), filial FROM contrato "
+    "WHERE numero_contrato = new.contrato_id AND vencimento IS NOT NULL; END",
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) "
+    "SELECT DISTINCT date(vencimento), filial FROM contrato WHERE vencimento IS NOT NULL",
+]
+
+DDL_POSTGRES = [
+    "CREATE OR REPLACE FUNCTION cobale_analise_contrato() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+    "IF TG_OP <> 'INSERT' THEN IF OLD.vencimento IS NOT NULL THEN "
+    "INSERT INTO analise_pendencias(vencimento, filial) VALUES (OLD.vencimento::date, OLD.filial) "
+    "ON CONFLICT DO NOTHING; END IF; END IF; "
+    "IF TG_OP <> 'DELETE' THEN IF NEW.vencimento IS NOT NULL THEN "
+    "INSERT INTO analise_pendencias(vencimento, filial) VALUES (NEW.vencimento::date, NEW.filial) "
+    "ON CONFLICT DO NOTHING; END IF; END IF; "
+    "RETURN NULL; END $$",
+    "CREATE OR REPLACE FUNCTION cobale_analise_acordo() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+    "IF TG_OP <> 'INSERT' THEN INSERT INTO analise_pendencias(vencimento, filial) "
+    "SELECT vencimento::date, filial FROM contrato WHERE numero_contrato = OLD.contrato_id AND vencimento IS NOT NULL "
+    "ON CONFLICT DO NOTHING; END IF; "
+    "IF TG_OP <> 'DELETE' THEN INSERT INTO analise_pendencias(vencimento, filial) "
+    "SELECT vencimento::date, filial FROM contrato WHERE numero_contrato = NEW.contrato_id AND vencimento IS NOT NULL "
+    "ON CONFLICT DO NOTHING; END IF; "
+    "RETURN NULL; END $$",
+    "DROP TRIGGER IF EXISTS analise_contrato ON contrato",
+    "CREATE TRIGGER analise_contrato AFTER INSERT OR DELETE OR UPDATE OF vencimento, filial, valor_total "
+    "ON contrato FOR EACH ROW EXECUTE FUNCTION cobale_analise_contrato()",
+    "DROP TRIGGER IF EXISTS analise_acordo ON acordos",
+    "CREATE TRIGGER analise_acordo AFTER INSERT OR DELETE OR UPDATE OF status, valor_total, contrato_id "
+    "ON acordos FOR EACH ROW EXECUTE FUNCTION cobale_analise_acordo()",
+    "INSERT INTO analise_pendencias(vencimento, filial) "
+    "SELECT DISTINCT vencimento::date, filial FROM contrato WHERE vencimento IS NOT NULL ON CONFLICT DO NOTHING",
+]
+
+
+def _analises_instaladas(conexao, dialeto):
+    if dialeto == "sqlite":
+        return conexao.execute(text(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name IN "
+            "('analise_contrato_ai', 'analise_contrato_ad', 'analise_contrato_au', "
+            "'analise_acordo_ai', 'analise_acordo_ad', 'analise_acordo_au')"
+        )).scalar() == 6
+    return conexao.execute(text(
+        "SELECT count(*) FROM pg_trigger WHERE tgname IN ('analise_contrato', 'analise_acordo')"
+    )).scalar() == 2
+
+
+def preparar_analises(app):
+    """
+    Garante os triggers do resumo no banco configurado e guarda em
+    app.extensions["analises"] se os relatórios usam o resumo ("resumo") ou
+    agrupam os contratos na hora ("direto").
+    """
+    dialeto = db.engine.dialect.name
+    modo = "direto"
+    if dialeto in ("postgresql", "sqlite"):
+        try:
+            with db.engine.connect() as conexao:
+                instaladas = _analises_instaladas(conexao, dialeto)
+            if not instaladas:
+                with db.engine.begin() as conexao:
+                    for comando in (DDL_SQLITE if dialeto == "sqlite" else DDL_POSTGRES):
+                        conexao.exec_driver_sql(comando)
+            modo = "resumo"
+        except Exception as e:
+            app.logger.warning(f"Resumo das análises indisponível, agrupando os contratos a cada consulta: {e}")
+    app.extensions["analises"] = modo
+    return modo
+
+
+def _modo():
+    return current_app.extensions.get("analises", "direto")
+
+
+def consulta_resumo(*filtros):
+    """
+    SELECT com as colunas de `analise_carteira`, agrupando na hora os contratos
+    que passam nos `filtros`. A situação e o valor vêm do último acordo do contrato.
+    """
+    ultimo = aliased(Acordo)
+    id_ultimo = (
+        select(func.max(Acordo.id)).where(Acordo.contrato_id == Contrato.numero_contrato)
+        .correlate(Contrato).scalar_subquery()
+    )
+    por_contrato = (
+        select(
+            func.date(Contrato.vencimento).label("vencimento"),
+            Contrato.filial.label("filial"),
+            func.coalesce(ultimo.status, SEM_ACORDO).label("situacao"),
+            Contrato.valor_total.label("valor_contrato"),
+            func.coalesce(ultimo.valor_total, 0).label("valor_acordo"),
+        )
+        .select_from(Contrato)
+        .outerjoin(ultimo, ultimo.id == id_ultimo)
+        .where(Contrato.vencimento.isnot(None), *filtros)
+        .subquery()
+    )
+    return (
+        select(
+            por_contrato.c.vencimento, por_contrato.c.filial, por_contrato.c.situacao,
+            func.count().label("contratos"),
+            func.sum(por_contrato.c.valor_contrato).label("valor_contratos"),
+            func.sum(por_contrato.c.valor_acordo).label("valor_acordos"),
+        )
+        .group_by(por_contrato.c.vencimento, por_contrato.c.filial, por_contrato.c.situacao)
+    )
+
+
+def _faixas_de_dias(dias, intervalo=1):
+    """Agrupa dias ordenados em faixas [início, fim], juntando os que estão a até `intervalo` dias um do outro."""
+    faixas = []
+    for dia in dias:
+        if faixas and (dia - faixas[-1][1]).days <= intervalo:
+            faixas[-1][1] = dia
+        else:
+            faixas.append([dia, dia])
+    return faixas
+
+
+def _inicio_do_mes(coluna, dialeto):
+    if dialeto == "sqlite":
+        return func.date(coluna, "start of month")
+    return cast(func.date_trunc("month", coluna), Date)
+
+
+def _proximo_mes(dia):
+    return (dia.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _somas(tabela):
+    return [func.sum(tabela.c.contratos), func.sum(tabela.c.valor_contratos), func.sum(tabela.c.valor_acordos)]
+
+
+# Os comandos de recálculo são montados uma vez e executados com parâmetros: o recálculo incremental roda
+# um por dia/mês pendente, e montar (e gerar a chave de cache de) `consulta_resumo` custa mais que executá-la.
+
+@lru_cache(maxsize=None)
+def _comandos_carteira(por_filial):
+    carteira = AnaliseCarteira.__table__
+    remover = carteira.delete().where(carteira.c.vencimento.between(bindparam("dia_inicio"), bindparam("dia_fim")))
+    filtros = [Contrato.vencimento >= bindparam("inicio"), Contrato.vencimento < bindparam("fim")]
+    if por_filial:
+        remover = remover.where(carteira.c.filial.in_(bindparam("filiais", expanding=True)))
+        filtros.append(Contrato.filial.in_(bindparam("filiais", expanding=True)))
+    return remover, insert(carteira).from_select(COLUNAS_RESUMO, consulta_resumo(*filtros))
+
+
+@lru_cache(maxsize=None)
+def _comandos_dias():
+    carteira, por_dia = AnaliseCarteira.__table__, AnaliseCarteiraDia.__table__
+    remover = por_dia.delete().where(por_dia.c.vencimento.between(bindparam("dia_inicio"), bindparam("dia_fim")))
+    somar = (
+        select(carteira.c.vencimento, carteira.c.situacao, *_somas(carteira))
+        .where(carteira.c.vencimento.between(bindparam("dia_inicio"), bindparam("dia_fim")))
+        .group_by(carteira.c.vencimento, carteira.c.situacao)
+    )
+    return remover, insert(por_dia).from_select(
+        ["vencimento", "situacao", "contratos", "valor_contratos", "valor_acordos"], somar
+    )
+
+
+@lru_cache(maxsize=None)
+def _comandos_meses(dialeto, por_filial):
+    carteira, por_mes = AnaliseCarteira.__table__, AnaliseCarteiraMes.__table__
+    mes = _inicio_do_mes(carteira.c.vencimento, dialeto)
+    remover = por_mes.delete().where(por_mes.c.mes.between(bindparam("dia_inicio"), bindparam("dia_fim")))
+    somar = (
+        select(mes, carteira.c.filial, carteira.c.situacao, *_somas(carteira))
+        .where(carteira.c.vencimento >= bindparam("dia_inicio"), carteira.c.vencimento < bindparam("mes_seguinte"))
+        .group_by(mes, carteira.c.filial, carteira.c.situacao)
+    )
+    if por_filial:
+        remover = remover.where(por_mes.c.filial.in_(bindparam("filiais", expanding=True)))
+        somar = somar.where(carteira.c.filial.in_(bindparam("filiais", expanding=True)))
+    return remover, insert(por_mes).from_select(
+        ["mes", "filial", "situacao", "contratos", "valor_contratos", "valor_acordos"], somar
+    )
+
+
+def _executar(comandos, parametros):
+    for comando in comandos:
+        db.session.execute(comando, parametros)
+
+
+def _recalcular_carteira(inicio, fim, filiais=None):
+    """Refaz as linhas de `analise_carteira` dos vencimentos de `inicio` a `fim` (só das `filiais`, se informadas)."""
+    parametros = {"dia_inicio": inicio, "dia_fim": fim, "inicio": datetime.combine(inicio, time()),
+                  "fim": datetime.combine(fim + timedelta(days=1), time())}
+    if filiais is not None:
+        parametros["filiais"] = list(filiais)
+    _executar(_comandos_carteira(filiais is not None), parametros)
+
+
+def _recalcular_dias(inicio, fim):
+    """Refaz as linhas de `analise_carteira_dia` dos vencimentos de `inicio` a `fim`, somando `analise_carteira`."""
+    _executar(_comandos_dias(), {"dia_inicio": inicio, "dia_fim": fim})
+
+
+def _recalcular_meses(inicio, fim, filiais=None):
+    """Refaz as linhas de `analise_carteira_mes` dos meses de `inicio` a `fim` (primeiros dias do mês)."""
+    parametros = {"dia_inicio": inicio, "dia_fim": fim, "mes_seguinte": _proximo_mes(fim)}
+    if filiais is not None:
+        parametros["filiais"] = list(filiais)
+    _executar(_comandos_meses(db.session.get_bind().dialect.name, filiais is not None), parametros)
+
+
+def atualizar_analises(completo=False):
+    """
+    Recalcula nos resumos os dias/filiais marcados pelos triggers (com `completo`,
+    os resumos inteiros), numa transação. Devolve quantos pares (dia de
+    vencimento, filial) foram recalculados.
+    """
+    if _modo() != "resumo":
+        return 0
+    pendencias = AnalisePendencia.__table__
+    if not completo and db.session.execute(select(pendencias.c.vencimento).limit(1)).first() is None:
+        return 0
+
+    try:
+        if db.session.get_bind().dialect.name == "postgresql":
+            # Dois recálculos do mesmo dia ao mesmo tempo gravariam as mesmas chaves nos resumos.
+            db.session.execute(text("SELECT pg_advisory_xact_lock(hashtext('analise_carteira'))"))
+        if completo:
+            db.session.execute(pendencias.delete())
+            for modelo in (AnaliseCarteiraMes, AnaliseCarteiraDia, AnaliseCarteira):
+                db.session.execute(modelo.__table__.delete())
+            inicio, fim = db.session.execute(select(func.min(Contrato.vencimento), func.max(Contrato.vencimento))).one()
+            if inicio is not None:
+                _recalcular_carteira(inicio.date(), fim.date())
+                _recalcular_dias(inicio.date(), fim.date())
+                _recalcular_meses(inicio.date().replace(day=1), fim.date().replace(day=1))
+            recalculados = db.session.execute(select(func.count()).select_from(
+                select(AnaliseCarteira.vencimento, AnaliseCarteira.filial).distinct().subquery()
+            )).scalar()
+        else:
+            # O DELETE ... RETURNING pega e limpa as pendências de uma vez: o que os triggers marcarem
+            # depois fica para o próximo recálculo.
+            pendentes = db.session.execute(
+                pendencias.delete().returning(pendencias.c.vencimento, pendencias.c.filial)
+            ).all()
+            filiais_por_dia, filiais_por_mes = defaultdict(set), defaultdict(set)
+            for dia, filial in pendentes:
+                filiais_por_dia[dia].add(filial)
+                filiais_por_mes[dia.replace(day=1)].add(filial)
+            for dia, filiais in filiais_por_dia.items():
+                _recalcular_carteira(dia, dia, sorted(filiais))
+            for inicio, fim in _faixas_de_dias(sorted(filiais_por_dia)):
+                _recalcular_dias(inicio, fim)
+            for mes, filiais in filiais_por_mes.items():
+                _recalcular_meses(mes, mes, sorted(filiais))
+            recalculados = len(pendentes)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return recalculados
+
+
+def fonte_analises(nivel="carteira"):
+    """
+    De onde os relatórios somam. `nivel`: "carteira" (dia, filial e situação),
+    "dia" (dia e situação) ou "mes" (mês, filial e situação). Com os triggers,
+    é a tabela de resumo do nível (recalculando antes os dias pendentes, se
+    ANALISE_ATUALIZAR_NA_CONSULTA); sem eles, o agrupamento dos contratos na hora.
+    """
+    if _modo() == "resumo":
+        if current_app.config.get("ANALISE_ATUALIZAR_NA_CONSULTA", True):
+            atualizar_analises()
+        return {"carteira": AnaliseCarteira, "dia": AnaliseCarteiraDia, "mes": AnaliseCarteiraMes}[nivel].__table__
+    return consulta_resumo().subquery()
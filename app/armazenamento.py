@@ -0,0 +1,204 @@
+"""
+Armazenamento dos PDFs de boletos, endereçado pelo conteúdo.
+
+A chave de cada arquivo é o sha256 do PDF, distribuída em subpastas pelos
+primeiros caracteres (ab/cd/abcd....pdf) para nenhuma pasta crescer sem limite.
+O índice (chave, tamanho, checksum) fica na tabela `boletos`, então achar ou
+apagar o arquivo de um boleto nunca exige listar a pasta.
+
+Backends (BOLETOS_ARMAZENAMENTO):
+    local -> pasta PASTA_BOLETOS
+    s3    -> bucket BOLETOS_S3_BUCKET em qualquer serviço compatível com S3
+             (BOLETOS_S3_ENDPOINT aponta para MinIO/LocalStack em testes, ou
+             `cliente=` recebe um cliente do moto, como em
+             benchmarks/bench_armazenamento_s3.py); requer boto3.
+"""
+from flask import current_app, send_file
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+
+
+def checksum(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+
+def chave_para(checksum_hex):
+    return f"{checksum_hex[:2]}/{checksum_hex[2:4]}/{checksum_hex}.pdf"
+
+
+class ArmazenamentoLocal:
+    """PDFs em disco, em PASTA_BOLETOS/ab/cd/<sha256>.pdf."""
+
+    def __init__(self, pasta):
+        self.pasta = os.path.abspath(pasta)
+        os.makedirs(self.pasta, exist_ok=True)
+
+    def caminho_local(self, chave):
+        return os.path.join(self.pasta, *chave.split("/"))
+
+    def existe(self, chave):
+        return os.path.exists(self.caminho_local(chave))
+
+    def salvar(self, chave, dados):
+        destino = self.caminho_local(chave)
+        if os.path.exists(destino):
+            return  # mesmo conteúdo, mesma chave
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+        # Grava num temporário e renomeia: quem ler nunca vê um PDF pela metade.
+        fd, temporario = tempfile.mkstemp(dir=os.path.dirname(destino), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dados)
+            os.replace(temporario, destino)
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    def ler(self, chave):
+        try:
+            with open(self.caminho_local(chave), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def remover(self, chave):
+        try:
+            os.remove(self.caminho_local(chave))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def limpar(self):
+        """
+        Remove todas as subpastas de shards (e PDFs soltos do layout antigo,
+        boleto_<id>.pdf na raiz). Devolve quantos PDFs foram apagados.
+        """
+        removidos = 0
+        for nome in os.listdir(self.pasta):
+            caminho = os.path.join(self.pasta, nome)
+            if len(nome) == 2 and os.path.isdir(caminho):
+                removidos += sum(
+                    1 for _, _, arquivos in os.walk(caminho) for arquivo in arquivos if arquivo.endswith(".pdf")
+                )
+                shutil.rmtree(caminho)
+            elif nome.endswith(".pdf") and os.path.isfile(caminho):
+                os.remove(caminho)
+                removidos += 1
+        return removidos
+
+
+class ArmazenamentoS3:
+    """PDFs num bucket compatível com S3, nas mesmas chaves do armazenamento local."""
+
+    def __init__(self, bucket, prefixo="", endpoint=None, cliente=None):
+        if cliente is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("Instale boto3 para usar BOLETOS_ARMAZENAMENTO=s3.")
+            cliente = boto3.client("s3", endpoint_url=endpoint)
+        self.cliente = cliente
+        self.bucket = bucket
+        self.prefixo = prefixo.strip("/") + "/" if prefixo.strip("/") else ""
+
+    def caminho_local(self, chave):
+        return None
+
+    def _nome(self, chave):
+        return self.prefixo + chave
+
+    def existe(self, chave):
+        try:
+            self.cliente.head_object(Bucket=self.bucket, Key=self._nome(chave))
+            return True
+        except self.cliente.exceptions.ClientError:
+            return False
+
+    def salvar(self, chave, dados):
+        self.cliente.put_object(Bucket=self.bucket, Key=self._nome(chave), Body=dados,
+                                ContentType="application/pdf")
+
+    def ler(self, chave):
+        try:
+            return self.cliente.get_object(Bucket=self.bucket, Key=self._nome(chave))["Body"].read()
+        except self.cliente.exceptions.NoSuchKey:
+            return None
+
+    def remover(self, chave):
+        self.cliente.delete_object(Bucket=self.bucket, Key=self._nome(chave))
+        return True
+
+    def limpar(self):
+        removidos = 0
+        paginas = self.cliente.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=self.prefixo)
+        for pagina in paginas:
+            objetos = [{"Key": objeto["Key"]} for objeto in pagina.get("Contents", [])]
+            if objetos:
+                self.cliente.delete_objects(Bucket=self.bucket, Delete={"Objects": objetos})
+                removidos += len(objetos)
+        return removidos
+
+
+_lock_armazenamento = threading.Lock()
+
+
+def armazenamento_boletos():
+    """Backend configurado do app atual, criado uma vez e guardado em app.extensions."""
+    app = current_app._get_current_object()
+    armazenamento = app.extensions.get("boletos_armazenamento")
+    if armazenamento is not None:
+        return armazenamento
+
+    with _lock_armazenamento:
+        armazenamento = app.extensions.get("boletos_armazenamento")
+        if armazenamento is None:
+            tipo = app.config["BOLETOS_ARMAZENAMENTO"]
+            if tipo == "local":
+                armazenamento = ArmazenamentoLocal(app.config["PASTA_BOLETOS"])
+            elif tipo == "s3":
+                armazenamento = ArmazenamentoS3(
+                    app.config["BOLETOS_S3_BUCKET"],
+                    prefixo=app.config["BOLETOS_S3_PREFIXO"],
+                    endpoint=app.config["BOLETOS_S3_ENDPOINT"],
+                )
+            else:
+                raise ValueError("BOLETOS_ARMAZENAMENTO deve ser 'local' ou 's3'.")
+            app.extensions["boletos_armazenamento"] = armazenamento
+    return armazenamento
+
+
+# ------------------- Download -------------------
+
+def resposta_pdf_boleto(boleto, arquivo):
+    """
+    Resposta do PDF de um boleto com `send_file`. Com um caminho local, o corpo
+    sai do arquivo pelo file_wrapper do servidor WSGI (sendfile no gunicorn, ou
+    X-Sendfile com USE_X_SENDFILE atrás de um proxy), sem cópia em Python.
+
+    ETag = checksum e Last-Modified = criado_em: If-None-Match/If-Modified-Since
+    recebem 304 sem corpo, e Range recebe 206 com só o trecho pedido.
+    """
+    if isinstance(arquivo, bytes):
+        arquivo = io.BytesIO(arquivo)
+
+    resposta = send_file(
+        arquivo,
+        mimetype="application/pdf",
+        download_name=boleto.nome_arquivo,
+        etag=boleto.checksum or True,
+        last_modified=boleto.criado_em,
+        conditional=True,
+        max_age=0,
+    )
+    # Boleto tem dados do cliente: cache só no navegador, sempre revalidando.
+    resposta.cache_control.public = False
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True
+    resposta.headers["X-Boleto-Id"] = str(boleto.id)
+    return resposta
@@ -0,0 +1,148 @@
+from flask import current_app
+from weasyprint import HTML, CSS
+from weasyprint.text.fonts import FontConfiguration
+import base64, io, os, threading, barcode
+from barcode.writer import ImageWriter
+
+
+FORMATOS_CODIGO_BARRAS = ["svg", "png"]
+
+
+def _validar_codigo_barras(codigo_barras):
+    if not codigo_barras.isdigit():
+        raise ValueError("Código de barras deve ser uma sequência numérica.")
+
+
+def _codigo_barras_svg(codigo_barras):
+    """
+    Code128 como SVG inline: um único <path> com um retângulo por barra, na
+    unidade de um módulo. O tamanho final vem do CSS (.barcode-svg), então o WeasyPrint
+    desenha vetores em vez de decodificar um PNG.
+    """
+    _validar_codigo_barras(codigo_barras)
+    modulos = barcode.get_barcode_class("code128")(codigo_barras).build()[0]
+
+    barras = []
+    inicio = None
+    for posicao, modulo in enumerate(modulos + "0"):
+        if modulo == "1" and inicio is None:
+            inicio = posicao
+        elif modulo == "0" and inicio is not None:
+            barras.append(f"M{inicio} 0h{posicao - inicio}v1H{inicio}z")
+            inicio = None
+
+    # 10 módulos de zona de silêncio de cada lado, como pede o Code128.
+    return (
+        f'<svg class="barcode-svg" xmlns="http://www.w3.org/2000/svg" viewBox="-10 0 {len(modulos) + 20} 1" '
+        f'preserveAspectRatio="none" role="img" aria-label="Código de barras">'
+        f'<path d="{"".join(barras)}"/></svg>'
+    )
+
+
+def _codigo_barras_b64(codigo_barras):
+    _validar_codigo_barras(codigo_barras)
+
+    barcode_class = barcode.get_barcode_class("code128")
+    barcode_obj = barcode_class(codigo_barras, writer=ImageWriter())
+    buf_bar = io.BytesIO()
+    # A linha digitável já aparece no template; sem o texto o writer também não
+    # depende de FreeTypeFont.getsize (removido no Pillow 10).
+    barcode_obj.write(buf_bar, options={"write_text": False})
+    return base64.b64encode(buf_bar.getvalue()).decode("utf-8")
+
+
+def _ler_logo_b64(logo_path):
+    # Evita falha se o arquivo não existir
+    if not os.path.exists(logo_path):
+        return ""
+    with open(logo_path, "rb") as f:
+        return base64.b64encode(f.read()).decode("utf-8")
+
+
+# ------------------- Contexto de renderização -------------------
+
+class ContextoRenderizacao:
+    """
+    Tudo que é igual em todos os boletos: logo em base64, template compilado, CSS
+    já interpretado pelo WeasyPrint, a configuração de fontes e o formato do código
+    de barras (BOLETO_CODIGO_BARRAS_FORMATO). É montado uma vez por processo e
+    refeito quando o template, o CSS ou o logo mudam no disco.
+    """
+
+    def __init__(self, app, formato_codigo_barras=None):
+        pasta_templates = os.path.join(app.root_path, app.template_folder)
+        self.pid = os.getpid()
+        self.base_url = pasta_templates
+        self.formato_codigo_barras = formato_codigo_barras or app.config["BOLETO_CODIGO_BARRAS_FORMATO"]
+        if self.formato_codigo_barras not in FORMATOS_CODIGO_BARRAS:
+            raise ValueError(f"BOLETO_CODIGO_BARRAS_FORMATO deve ser um de {FORMATOS_CODIGO_BARRAS}.")
+        self.arquivos = {
+            "template": os.path.join(pasta_templates, "boleto.html"),
+            "css": os.path.join(pasta_templates, "boleto.css"),
+            "logo": app.config["LOGO_COBALE"],
+        }
+        self.versao = self._versao()
+
+        with open(self.arquivos["template"], encoding="utf-8") as f:
+            self.template = app.jinja_env.from_string(f.read())
+
+        self.font_config = FontConfiguration()
+        with open(self.arquivos["css"], encoding="utf-8") as f:
+            self.css = CSS(string=f.read(), font_config=self.font_config)
+
+        self.logo_b64 = _ler_logo_b64(self.arquivos["logo"])
+
+    def _versao(self):
+        return tuple(
+            os.stat(caminho).st_mtime_ns if os.path.exists(caminho) else None
+            for caminho in self.arquivos.values()
+        )
+
+    def valido(self):
+        return self.pid == os.getpid() and self._versao() == self.versao
+
+    def renderizar(self, boleto_info):
+        if self.formato_codigo_barras == "svg":
+            codigo_barras = {"barcode_svg": _codigo_barras_svg(boleto_info["codigo_barras"])}
+        else:
+            codigo_barras = {"barcode_img": _codigo_barras_b64(boleto_info["codigo_barras"])}
+
+        html = self.template.render(
+            boleto=boleto_info,
+            logo_b64=self.logo_b64,
+            css_externo=True,
+            **codigo_barras
+        )
+        return HTML(string=html, base_url=self.base_url).write_pdf(
+            stylesheets=[self.css], font_config=self.font_config
+        )
+
+
+_lock_contexto = threading.Lock()
+
+
+def contexto_renderizacao():
+    """Contexto do app atual, recriado se for outro processo (fork) ou se algum arquivo mudou."""
+    app = current_app._get_current_object()
+    contexto = app.extensions.get("boleto_renderizacao")
+    if contexto is not None and contexto.valido():
+        return contexto
+
+    with _lock_contexto:
+        contexto = app.extensions.get("boleto_renderizacao")
+        if contexto is None or not contexto.valido():
+            contexto = ContextoRenderizacao(app)
+            app.extensions["boleto_renderizacao"] = contexto
+    return contexto
+
+
+def renderizar_boleto_pdf(boleto_info):
+    """
+    Gera o PDF do boleto a partir do dict montado por `info_boleto`. Não acessa
+    o banco, então pode rodar em outro processo (precisa só de um app context).
+    """
+    pdf = contexto_renderizacao().renderizar(boleto_info)
+
+    if not pdf or not isinstance(pdf, bytes):
+        raise ValueError("Erro ao gerar o PDF do boleto.")
+    return pdf
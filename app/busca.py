@@ -0,0 +1,168 @@
+"""
+Busca de clientes por CPF (prefixo) e nome (sem acento, com ranking).
+
+Cada banco usa o índice que tem:
+
+    postgresql -> btree `text_pattern_ops` no CPF e GIN de trigramas (pg_trgm)
+                  sobre `cobale_normalizar(nome)` (minúsculas, sem acento via
+                  unaccent), que atende LIKE '%...%' e a busca por semelhança
+    sqlite     -> faixa no índice único do CPF e uma tabela FTS5 externa
+                  (`cliente_busca`, tokenizer sem diacríticos) mantida por triggers
+    outros     -> LIKE/ILIKE, sem índice
+
+O migration `3f9b2c7d1e54` cria esses objetos; `preparar_busca_clientes` faz o
+mesmo ao subir o app (bancos criados por `db.create_all`) e só escreve no banco
+quando falta algo.
+"""
+from flask import current_app
+from sqlalchemy import case, func, literal, literal_column, or_, select, text
+from app.database import db
+from app.models.cliente import Cliente
+import re
+import unicodedata
+
+DDL_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() não é IMMUTABLE (depende do search_path); com o dicionário explícito pode entrar num índice.
+    "CREATE OR REPLACE FUNCTION cobale_normalizar(texto text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+    "AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $$",
+    "CREATE INDEX IF NOT EXISTS ix_cliente_nome_trgm ON cliente USING gin (cobale_normalizar(nome) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_cliente_cpf_prefixo ON cliente (cpf text_pattern_ops)",
+]
+
+DDL_SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cliente_busca USING fts5("
+    "nome, content='cliente', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS cliente_busca_ai AFTER INSERT ON cliente BEGIN "
+    "INSERT INTO cliente_busca(rowid, nome) VALUES (new.id, new.nome); END",
+    "CREATE TRIGGER IF NOT EXISTS cliente_busca_ad AFTER DELETE ON cliente BEGIN "
+    "INSERT INTO cliente_busca(cliente_busca, rowid, nome) VALUES ('delete', old.id, old.nome); END",
+    "CREATE TRIGGER IF NOT EXISTS cliente_busca_au AFTER UPDATE OF nome ON cliente BEGIN "
+    "INSERT INTO cliente_busca(cliente_busca, rowid, nome) VALUES ('delete', old.id, old.nome); "
+    "INSERT INTO cliente_busca(rowid, nome) VALUES (new.id, new.nome); END",
+    "INSERT INTO cliente_busca(cliente_busca) VALUES ('rebuild')",
+]
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com espaços simples: 'João  Sá' -> 'joao sa'."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.lower().split())
+
+
+def _busca_instalada(conexao, dialeto):
+    if dialeto == "sqlite":
+        nomes = conexao.execute(text(
+            "SELECT count(*) FROM sqlite_master WHERE name IN "
+            "('cliente_busca', 'cliente_busca_ai', 'cliente_busca_ad', 'cliente_busca_au')"
+        )).scalar()
+        return nomes == 4
+    return conexao.execute(text(
+        "SELECT count(*) FROM pg_indexes WHERE indexname IN ('ix_cliente_nome_trgm', 'ix_cliente_cpf_prefixo')"
+    )).scalar() == 2
+
+
+def preparar_busca_clientes(app):
+    """
+    Garante os índices de busca do banco configurado e guarda em
+    app.extensions["busca_clientes"] qual estratégia usar. Sem permissão para
+    criar as extensões do Postgres, a busca continua funcionando sem índice.
+    """
+    dialeto = db.engine.dialect.name
+    modo = "simples"
+    if dialeto in ("postgresql", "sqlite"):
+        try:
+            with db.engine.connect() as conexao:
+                instalada = _busca_instalada(conexao, dialeto)
+            if not instalada:
+                with db.engine.begin() as conexao:
+                    for comando in (DDL_SQLITE if dialeto == "sqlite" else DDL_POSTGRES):
+                        conexao.exec_driver_sql(comando)
+            modo = "fts5" if dialeto == "sqlite" else "trigrama"
+        except Exception as e:
+            app.logger.warning(f"Índices de busca de clientes indisponíveis, usando LIKE: {e}")
+    app.extensions["busca_clientes"] = modo
+    return modo
+
+
+def _modo():
+    return current_app.extensions.get("busca_clientes", "simples")
+
+
+def _escapar_like(texto):
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def filtro_prefixo(coluna, prefixo):
+    """
+    Condição "`coluna` começa com `prefixo`" que usa o índice da coluna. O LIKE do
+    SQLite ignora maiúsculas e não usa índice; a faixa [prefixo, próximo prefixo)
+    usa. No Postgres, o LIKE usa índices `*_pattern_ops`.
+    """
+    if not prefixo:
+        return coluna.isnot(None)
+    if db.engine.dialect.name == "sqlite":
+        return (coluna >= prefixo) & (coluna < prefixo[:-1] + chr(ord(prefixo[-1]) + 1))
+    return coluna.like(_escapar_like(prefixo) + "%", escape="\\")
+
+
+def filtro_cpf(prefixo):
+    """Condição "CPF começa com `prefixo`" que usa o índice do CPF."""
+    return filtro_prefixo(Cliente.cpf, prefixo)
+
+
+def _consulta_fts5(termo):
+    # Cada palavra vira um prefixo entre aspas ("jo"* "silv"*): todas precisam aparecer, em qualquer ordem.
+    palavras = re.findall(r"\w+", termo)
+    if not palavras:
+        return None
+    expressao = " ".join(f'"{palavra}"*' for palavra in palavras)
+    return (
+        select(literal_column("rowid"))
+        .select_from(text("cliente_busca"))
+        .where(text("cliente_busca MATCH :expressao").bindparams(expressao=expressao))
+        .order_by(text("rank"), text("rowid"))
+    )
+
+
+def ids_por_nome(termo, limite=None, offset=0):
+    """
+    Ids dos clientes cujo nome casa com `termo`, do mais relevante para o menos:
+    ranking bm25 do FTS5 no SQLite; no Postgres, nomes que começam com o termo
+    primeiro e depois a semelhança por trigramas (tolera erro de digitação).
+    """
+    termo = normalizar(termo)
+    if not termo:
+        return []
+
+    modo = _modo()
+    if modo == "fts5":
+        consulta = _consulta_fts5(termo)
+        if consulta is None:
+            return []
+    elif modo == "trigrama":
+        nome = func.cobale_normalizar(Cliente.nome)
+        consulta = (
+            select(Cliente.id)
+            .where(or_(nome.like(f"%{_escapar_like(termo)}%", escape="\\"), literal(termo).op("<%")(nome)))
+            .order_by(
+                case((nome.like(f"{_escapar_like(termo)}%", escape="\\"), 0), else_=1),
+                func.word_similarity(termo, nome).desc(),
+                Cliente.id,
+            )
+        )
+    else:
+        consulta = (
+            select(Cliente.id)
+            .where(Cliente.nome.ilike(f"%{_escapar_like(termo)}%", escape="\\"))
+            .order_by(Cliente.nome, Cliente.id)
+        )
+
+    if limite:
+        consulta = consulta.limit(limite)
+    if offset:
+        consulta = consulta.offset(offset)
+    return db.session.execute(consulta).scalars().all()
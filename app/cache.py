@@ -0,0 +1,49 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class CacheLRU:
+    """
+    Cache em memória limitado por quantidade de entradas (LRU) e, opcionalmente,
+    por tempo de vida (TTL em segundos). Seguro para uso entre threads.
+    """
+
+    def __init__(self, tamanho_maximo=1024, ttl=None):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return padrao
+            valor, expira_em = item
+            if expira_em is not None and expira_em <= time.monotonic():
+                del self._itens[chave]
+                return padrao
+            self._itens.move_to_end(chave)
+            return valor
+
+    def definir(self, chave, valor):
+        expira_em = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def remover_se(self, predicado):
+        with self._lock:
+            for chave in [c for c in self._itens if predicado(c)]:
+                del self._itens[chave]
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._itens)
@@ -18,5 +18,62 @@ class Config:
     MAIL_USERNAME = os.getenv("MAIL_USERNAME")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
+    MAIL_USE_TLS = os.getenv("MAIL_USE_TLS", "False") == "True"  # STARTTLS quando MAIL_USE_SSL é False
+    MAIL_ENVIO_CONEXOES = int(os.getenv("MAIL_ENVIO_CONEXOES", 4))  # conexões SMTP abertas ao mesmo tempo
+    MAIL_ENVIO_MENSAGENS_POR_CONEXAO = int(os.getenv("MAIL_ENVIO_MENSAGENS_POR_CONEXAO", 100))
+    MAIL_ENVIO_BLOCO = int(os.getenv("MAIL_ENVIO_BLOCO", 200))  # envios reservados e gravados por vez
+    MAIL_ENVIO_INTERVALO = float(os.getenv("MAIL_ENVIO_INTERVALO", 2))
+    MAIL_ENVIO_TIMEOUT = int(os.getenv("MAIL_ENVIO_TIMEOUT", 600))
+    MAIL_ENVIO_MAX_TENTATIVAS = int(os.getenv("MAIL_ENVIO_MAX_TENTATIVAS", 5))
+    MAIL_ENVIO_BACKOFF = float(os.getenv("MAIL_ENVIO_BACKOFF", 30))  # segundos; dobra a cada falha
+
+    LISTAGEM_LIMITE_PADRAO = int(os.getenv("LISTAGEM_LIMITE_PADRAO", 1000))
+    LISTAGEM_LIMITE_MAXIMO = int(os.getenv("LISTAGEM_LIMITE_MAXIMO", 5000))
+    BUSCA_LIMITE_PADRAO = int(os.getenv("BUSCA_LIMITE_PADRAO", 20))
+    BUSCA_LIMITE_MAXIMO = int(os.getenv("BUSCA_LIMITE_MAXIMO", 100))
+    CRIACAO_LOTE_MAXIMO = int(os.getenv("CRIACAO_LOTE_MAXIMO", 10000))  # itens por POST .../lote
+
+    IMPORTACAO_LOTE = int(os.getenv("IMPORTACAO_LOTE", 5000))  # linhas validadas e gravadas por commit
+    IMPORTACAO_MAX_ERROS = int(os.getenv("IMPORTACAO_MAX_ERROS", 1000))  # erros detalhados guardados no relatório
+    IMPORTACAO_PROCESSOS = int(os.getenv("IMPORTACAO_PROCESSOS", 1))  # 0 = um por núcleo
+    IMPORTACAO_PASTA = os.getenv("IMPORTACAO_PASTA", os.path.join(os.path.dirname(__file__), "..", "importacoes"))
+    IMPORTACAO_JOBS_SIMULTANEOS = int(os.getenv("IMPORTACAO_JOBS_SIMULTANEOS", 1))  # somando todos os workers
+    IMPORTACAO_JOBS_MAX_FILA = int(os.getenv("IMPORTACAO_JOBS_MAX_FILA", 20))  # pendentes + rodando; acima disso, 429
+    IMPORTACAO_JOB_TIMEOUT = int(os.getenv("IMPORTACAO_JOB_TIMEOUT", 600))  # segundos sem gravar um bloco
+    IMPORTACAO_JOB_MAX_TENTATIVAS = int(os.getenv("IMPORTACAO_JOB_MAX_TENTATIVAS", 3))
+    IMPORTACAO_WORKER_INTERVALO = float(os.getenv("IMPORTACAO_WORKER_INTERVALO", 2))
+
+    # Método e custo no formato do werkzeug: "scrypt:32768:8:1" (padrão dele), "pbkdf2:sha256:600000"...
+    # Senhas antigas continuam válidas quando o método muda: o hash guarda como foi gerado.
+    SENHA_HASH_METODO = os.getenv("SENHA_HASH_METODO", "scrypt")
+    SENHA_HASH_SALT = int(os.getenv("SENHA_HASH_SALT", 16))
+    SENHA_HASH_PROCESSOS = int(os.getenv("SENHA_HASH_PROCESSOS", 0))  # hashes em paralelo na importação; 0 = um por núcleo
+
+    # Os relatórios de /analises recalculam os dias pendentes do resumo antes de responder; com False,
+    # o resumo só muda no POST /analises/atualizar.
+    ANALISE_ATUALIZAR_NA_CONSULTA = os.getenv("ANALISE_ATUALIZAR_NA_CONSULTA", "True") == "True"
+
+    # Métricas em GET /metrics (Prometheus), consultas SQL por rota e perfil por amostragem; desligado por padrão.
+    INSTRUMENTACAO = os.getenv("INSTRUMENTACAO", "False") == "True"
+    INSTRUMENTACAO_CONSULTA_LENTA_MS = float(os.getenv("INSTRUMENTACAO_CONSULTA_LENTA_MS", 200))  # 0 = sem log
+    INSTRUMENTACAO_PERFIL = os.getenv("INSTRUMENTACAO_PERFIL", "False") == "True"  # perfil ligado desde o início
+    INSTRUMENTACAO_PERFIL_INTERVALO = float(os.getenv("INSTRUMENTACAO_PERFIL_INTERVALO", 0.005))  # segundos
+    INSTRUMENTACAO_PERFIL_PASTA = os.getenv("INSTRUMENTACAO_PERFIL_PASTA", os.path.join(os.path.dirname(__file__), "..", "perfis"))
+
+    OFERTAS_CACHE_TAMANHO = int(os.getenv("OFERTAS_CACHE_TAMANHO", 10000))
+    OFERTAS_CACHE_TTL = int(os.getenv("OFERTAS_CACHE_TTL", 86400))
+
+    PASTA_BOLETOS = os.getenv("PASTA_BOLETOS", os.path.join(os.path.dirname(__file__), "..", "boletos"))
+    BOLETOS_ARMAZENAMENTO = os.getenv("BOLETOS_ARMAZENAMENTO", "local")  # local ou s3
+    BOLETOS_S3_BUCKET = os.getenv("BOLETOS_S3_BUCKET", "cobale-boletos")
+    BOLETOS_S3_PREFIXO = os.getenv("BOLETOS_S3_PREFIXO", "boletos")
+    BOLETOS_S3_ENDPOINT = os.getenv("BOLETOS_S3_ENDPOINT")  # ex.: http://localhost:9000 (MinIO)
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "False") == "True"  # PDFs entregues pelo nginx/apache
+    BOLETO_CODIGO_BARRAS_FORMATO = os.getenv("BOLETO_CODIGO_BARRAS_FORMATO", "svg")  # svg (vetorial) ou png
+    BOLETO_WORKER_PROCESSOS = int(os.getenv("BOLETO_WORKER_PROCESSOS", 0))  # 0 = um por núcleo
+    BOLETO_WORKER_INTERVALO = float(os.getenv("BOLETO_WORKER_INTERVALO", 2))
+    BOLETO_JOB_TIMEOUT = int(os.getenv("BOLETO_JOB_TIMEOUT", 600))
+    BOLETO_JOB_MAX_TENTATIVAS = int(os.getenv("BOLETO_JOB_MAX_TENTATIVAS", 3))
+    BOLETO_WORKER_BLOCO = int(os.getenv("BOLETO_WORKER_BLOCO", 25))  # boletos por tarefa enviada ao pool
 
     LOGO_COBALE = os.getenv("LOGO_COBALE", os.path.join(os.path.dirname(__file__), "..", "importadores", "img", "logo_CobAle.png"))
@@ -1,29 +1,31 @@
-from flask import current_app, render_template
+from flask import current_app
 from datetime import datetime, date
 from app.database import db
 from app.models.cliente import Cliente
 from app.models.acordo import Acordo, Boleto
 from app.models.contrato import Contrato
+from app.models.boleto_job import BoletoJob
+from app.models.envio_boleto import EnvioBoleto
 from app.controllers import contrato_controller
+from app.paginacao import paginar
+from app.importacao import chaves_existentes
+from app.lote import resultado_lote
+from sqlalchemy import insert
+from sqlalchemy.orm import load_only, selectinload
+from app.boleto_pdf import renderizar_boleto_pdf
+from app.armazenamento import armazenamento_boletos, checksum, chave_para
 from importadores import boletos
-from calculadora import calcular
+from calculadora import calcular, calcular_lote, linha_do_lote
+import febraban
 from reportlab.graphics import renderPM
 from reportlab.graphics.barcode import code128
 from reportlab.graphics.shapes import Drawing
 from reportlab.lib.units import mm
-import json, os, io, base64, barcode
-from barcode.writer import ImageWriter
-from weasyprint import HTML
+import json, os
 
 
 # ------------------- Helpers -------------------
 
-def _pasta_boletos():
-    pasta = os.path.join(current_app.root_path, "..", "boletos")
-    os.makedirs(pasta, exist_ok=True)
-    return os.path.abspath(pasta)
-
-
 def _calcular_dias_atraso(vencimento):
     hoje = datetime.utcnow()
     atraso = (hoje - vencimento).days
@@ -32,34 +34,58 @@ def _calcular_dias_atraso(vencimento):
 
 # ------------------- Acordos -------------------
 
-def criar_acordo(data):
-    contrato = Contrato.query.filter_by(numero_contrato=data["contrato_id"]).first()
-    if not contrato:
-        raise ValueError("Contrato não encontrado.")
+def _numero_acordo(valor, conversor, padrao, mensagem):
+    """`valor` convertido com `conversor` (`padrao` se ausente); ValueError com `mensagem` se não for número."""
+    if valor in (None, ""):
+        return padrao
+    try:
+        return conversor(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{mensagem}: {valor}")
 
+
+def _colunas_acordo(data):
+    """Colunas de um acordo novo a partir do corpo do POST (sem conferir o contrato); ValueError se inválido."""
     tipo_pagamento = data.get("tipo_pagamento")
-    qtd_parcelas = int(data.get("qtd_parcelas", 0))
+    if tipo_pagamento is not None and not isinstance(tipo_pagamento, str):
+        raise ValueError(f"Tipo de pagamento inválido: {tipo_pagamento}")
+    qtd_parcelas = _numero_acordo(data.get("qtd_parcelas"), int, 0, "Quantidade de parcelas inválida")
 
     if tipo_pagamento == "parcelado" and qtd_parcelas < 2:
         raise ValueError("Parcelamento deve ser de no mínimo 2 parcelas.")
 
-    valor_final_enviado = float(data.get("valor_total") or data.get("valor_final") or 0.0)
-    desconto_enviado = float(data.get("desconto", 0.0))
-    juros_enviado = float(data.get("juros", 0.0))
-    
+    valor_final_enviado = _numero_acordo(data.get("valor_total") or data.get("valor_final"), float, 0.0,
+                                         "Valor total inválido")
+    desconto_enviado = _numero_acordo(data.get("desconto"), float, 0.0, "Desconto inválido")
+    juros_enviado = _numero_acordo(data.get("juros"), float, 0.0, "Juros inválidos")
+
+    try:
+        vencimento = datetime.strptime(str(data["vencimento"]), "%Y-%m-%d")
+    except KeyError:
+        raise ValueError("Data de vencimento é obrigatória.")
+    except ValueError:
+        raise ValueError("Data de vencimento inválida. Use o formato YYYY-MM-DD.")
+
     parcelamento_enviado = data.get("parcelamento", {})
 
-    acordo = Acordo(
-        contrato_id=contrato.numero_contrato,
-        tipo_pagamento=tipo_pagamento,
-        qtd_parcelas=qtd_parcelas,
-        valor_total=valor_final_enviado,
-        desconto=desconto_enviado,
-        juros=juros_enviado,
-        vencimento=datetime.strptime(data["vencimento"], "%Y-%m-%d"),
-        status="em andamento",
-        parcelamento_json=json.dumps(parcelamento_enviado) if parcelamento_enviado else None
-    )
+    return {
+        "tipo_pagamento": tipo_pagamento,
+        "qtd_parcelas": qtd_parcelas,
+        "valor_total": valor_final_enviado,
+        "desconto": desconto_enviado,
+        "juros": juros_enviado,
+        "vencimento": vencimento,
+        "status": "em andamento",
+        "parcelamento_json": json.dumps(parcelamento_enviado) if parcelamento_enviado else None
+    }
+
+
+def criar_acordo(data):
+    contrato = Contrato.query.filter_by(numero_contrato=data["contrato_id"]).first()
+    if not contrato:
+        raise ValueError("Contrato não encontrado.")
+
+    acordo = Acordo(contrato_id=contrato.numero_contrato, **_colunas_acordo(data))
 
     db.session.add(acordo)
     db.session.commit()
@@ -75,13 +101,68 @@ def criar_acordo(data):
             "juros": float(acordo.juros),
             "vencimento": acordo.vencimento.strftime("%Y-%m-%d"),
             "status": acordo.status,
-            "parcelamento": parcelamento_enviado
+            "parcelamento": data.get("parcelamento", {})
         }
     }
 
 
-def listar_acordos():
-    return Acordo.query.all()
+def criar_acordos_lote(itens):
+    """
+    Cria os acordos válidos de `itens` numa transação: uma consulta (IN) para os
+    contratos e um INSERT em lote que devolve os ids. Devolve o resultado de cada
+    item, na ordem recebida (ver `app.lote`).
+    """
+    resultados = [None] * len(itens)
+    validos = {}
+    for indice, item in enumerate(itens):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Item deve ser um objeto.")
+            contrato_id = str(item.get("contrato_id") or "").strip()
+            if not contrato_id:
+                raise ValueError("Número do contrato é obrigatório.")
+            if not item.get("tipo_pagamento"):
+                raise ValueError("Tipo de pagamento é obrigatório.")
+            validos[indice] = {"contrato_id": contrato_id, **_colunas_acordo(item)}
+        except (TypeError, ValueError) as e:
+            resultados[indice] = {"indice": indice, "status": "erro", "erro": str(e)}
+
+    contratos = chaves_existentes(Contrato.numero_contrato, {acordo["contrato_id"] for acordo in validos.values()})
+    for indice, acordo in list(validos.items()):
+        if acordo["contrato_id"] not in contratos:
+            resultados[indice] = {"indice": indice, "status": "erro",
+                                  "erro": f"Contrato {acordo['contrato_id']} não encontrado."}
+            del validos[indice]
+
+    if validos:
+        try:
+            ids = db.session.scalars(
+                insert(Acordo).returning(Acordo.id, sort_by_parameter_order=True), list(validos.values())
+            ).all()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for (indice, acordo), id in zip(validos.items(), ids):
+            resultados[indice] = {"indice": indice, "status": "criado", "id": id, "contrato_id": acordo["contrato_id"]}
+    return resultado_lote(resultados)
+
+
+def _consulta_acordos(after=None, limite=None, campos=None):
+    colunas_por_campo = {"parcelamento": Acordo.parcelamento_json}
+    colunas = [colunas_por_campo.get(c) or getattr(Acordo, c) for c in (campos or Acordo.CAMPOS) if c != "id"]
+    query = Acordo.query.options(load_only(Acordo.id, *colunas))
+    return paginar(query, Acordo.id, after, limite, int)
+
+
+def listar_acordos(after=None, limite=None, campos=None):
+    return [acordo.to_dict(campos=campos) for acordo in _consulta_acordos(after, limite, campos)]
+
+
+def iterar_acordos(after=None, limite=None, campos=None, tamanho_bloco=1000):
+    """Como `listar_acordos`, mas lendo do banco em blocos (yield_per) para respostas em streaming."""
+    query = _consulta_acordos(after, limite, campos).yield_per(tamanho_bloco)
+    return (acordo.to_dict(campos=campos) for acordo in query)
 
 
 def obter_acordo(id):
@@ -91,46 +172,84 @@ def obter_acordo_por_contrato(numero_contrato):
     return Acordo.query.filter_by(contrato_id=numero_contrato).first()
 
 
-def cliente_por_acordo(status: str):
+STATUS_ACORDO = ["em andamento", "concluido", "cancelado"]
+
+
+def _consulta_cliente_por_acordo(status, after=None, limite=None):
+    if status == "sem_acordo":
+        com_acordo = db.session.query(Acordo.contrato_id)
+        query = (
+            db.session.query(Cliente.id, Cliente.nome, Contrato.numero_contrato)
+            .select_from(Contrato)
+            .join(Cliente, Cliente.id == Contrato.cliente_id)
+            .filter(~Contrato.numero_contrato.in_(com_acordo))
+            .order_by(Contrato.numero_contrato)
+        )
+        if after is not None:
+            query = query.filter(Contrato.numero_contrato > after)
+
+    elif status in STATUS_ACORDO:
+        query = (
+            db.session.query(Acordo.id, Cliente.id, Cliente.nome, Contrato.numero_contrato, Acordo.status)
+            .select_from(Acordo)
+            .join(Contrato, Contrato.numero_contrato == Acordo.contrato_id)
+            .join(Cliente, Cliente.id == Contrato.cliente_id)
+            .filter(Acordo.status == status)
+            .order_by(Acordo.id)
+        )
+        if after is not None:
+            try:
+                query = query.filter(Acordo.id > int(after))
+            except ValueError:
+                raise ValueError("Cursor 'after' inválido.")
+    else:
+        raise ValueError("Status inválido. Use 'em andamento', 'concluido', 'cancelado' ou 'sem_acordo'.")
+
+    if limite:
+        query = query.limit(limite)
+    return query
+
+
+def _linha_cliente_por_acordo(status, linha):
+    if status == "sem_acordo":
+        cliente_id, cliente_nome, contrato_numero = linha
+        return {
+            "cliente_id": cliente_id,
+            "cliente_nome": cliente_nome,
+            "contrato_numero": contrato_numero,
+            "status_acordo": "Sem acordo"
+        }
+
+    acordo_id, cliente_id, cliente_nome, contrato_numero, status_acordo = linha
+    return {
+        "acordo_id": acordo_id,
+        "cliente_id": cliente_id,
+        "cliente_nome": cliente_nome,
+        "contrato_numero": contrato_numero,
+        "status_acordo": status_acordo
+    }
+
+
+def cliente_por_acordo(status: str, after=None, limite=None):
     """
     Retorna clientes com ou sem acordo, conforme o status informado.
     status pode ser: 'em andamento', 'concluido', 'cancelado' ou 'sem_acordo'
+
+    Tudo sai de uma única consulta com join, paginada por cursor: `after` é o
+    último acordo_id (ou contrato_numero, para 'sem_acordo') da página anterior.
     """
-    clientes = []
+    query = _consulta_cliente_por_acordo(status, after, limite)
+    return [_linha_cliente_por_acordo(status, linha) for linha in query]
+
+
+def iterar_cliente_por_acordo(status: str, after=None, limite=None, tamanho_bloco=1000):
+    """Mesmo resultado de `cliente_por_acordo`, lido do banco em blocos (yield_per)."""
+    query = _consulta_cliente_por_acordo(status, after, limite).yield_per(tamanho_bloco)
+    return (_linha_cliente_por_acordo(status, linha) for linha in query)
 
-    if status == "sem_acordo":
-        subquery = db.session.query(Acordo.contrato_id).distinct()
-        contratos_sem_acordo = Contrato.query.filter(~Contrato.numero_contrato.in_(subquery)).all()
-
-        for contrato in contratos_sem_acordo:
-            cliente = Cliente.query.get(contrato.cliente_id)
-            if cliente:
-                clientes.append({
-                    "cliente_id": cliente.id,
-                    "cliente_nome": cliente.nome,
-                    "contrato_numero": contrato.numero_contrato,
-                    "status_acordo": "Sem acordo"
-                })
-
-    elif status in ["em andamento", "concluido", "cancelado"]:
-        acordos = Acordo.query.filter_by(status=status).all()
-
-        for acordo in acordos:
-            contrato = Contrato.query.filter_by(numero_contrato=acordo.contrato_id).first()
-            if contrato:
-                cliente = Cliente.query.get(contrato.cliente_id)
-                if cliente:
-                    clientes.append({
-                        "acordo_id": acordo.id,
-                        "cliente_id": cliente.id,
-                        "cliente_nome": cliente.nome,
-                        "contrato_numero": contrato.numero_contrato,
-                        "status_acordo": acordo.status
-                    })
-    else:
-        raise ValueError("Status inválido. Use 'em andamento', 'concluido', 'cancelado' ou 'sem_acordo'.")
 
-    return clientes
+def chave_cursor_cliente_por_acordo(status):
+    return "contrato_numero" if status == "sem_acordo" else "acordo_id"
 
 
 def atualizar_acordo(id, data):
@@ -180,27 +299,37 @@ def deletar_acordo(id):
     if not acordo:
         return None
 
-    pasta_boletos = _pasta_boletos()
-
-    for boleto in acordo.boletos:
-        for arquivo in os.listdir(pasta_boletos):
-            if arquivo.startswith(f"boleto_{acordo.id}") and arquivo.endswith(".pdf"):
-                try:
-                    os.remove(os.path.join(pasta_boletos, arquivo))
-                except Exception as e:
-                    print(f"Erro ao apagar {arquivo}: {e}")
+    arquivos = {boleto.checksum: boleto.caminho for boleto in acordo.boletos if boleto.checksum}
 
+    BoletoJob.query.filter_by(acordo_id=acordo.id).delete(synchronize_session=False)
+    # A fila de e-mails aponta para os boletos: os envios saem junto, na mesma transação.
+    EnvioBoleto.query.filter(
+        EnvioBoleto.boleto_id.in_(db.session.query(Boleto.id).filter(Boleto.acordo_id == acordo.id))
+    ).delete(synchronize_session=False)
     for boleto in acordo.boletos:
         db.session.delete(boleto)
 
     db.session.delete(acordo)
     db.session.commit()
+
+    remover_arquivos_sem_uso(arquivos)
     return True
 
 
 # ------------------- Simulação -------------------
 
-def simular_acordo(payload):
+CAMPOS_SIMULACAO = ["valor_original", "dias_em_atraso", "tipo_pagamento", "quantidade_parcelas", "valor_entrada"]
+
+
+def _validar_campos_escalares(payload):
+    for campo in CAMPOS_SIMULACAO:
+        if isinstance(payload.get(campo), (list, dict)):
+            raise ValueError(f"Campo '{campo}' deve ser um número ou texto, não uma lista ou objeto.")
+    if "tipo_pagamento" in payload and not isinstance(payload["tipo_pagamento"], str):
+        raise ValueError("Tipo de pagamento inválido. Use 'avista' ou 'parcelado'.")
+
+
+def _validar_payload_simulacao(payload):
     if not payload:
         raise ValueError("Payload não fornecido.")
 
@@ -208,28 +337,109 @@ def simular_acordo(payload):
     for campo in campos_obrigatorios:
         if campo not in payload:
             raise ValueError(f"Campo obrigatório '{campo}' ausente.")
+    _validar_campos_escalares(payload)
 
     if payload.get("tipo_pagamento") == "parcelado" and "quantidade_parcelas" not in payload:
         raise ValueError("Campo 'quantidade_parcelas' é obrigatório para parcelamento.")
 
+
+def simular_acordo(payload):
+    _validar_payload_simulacao(payload)
     return calcular(payload)
 
 
-# ------------------- Boletos -------------------
+def payloads_simulacao_lote(data):
+    """
+    Normaliza o corpo da simulação em lote para uma lista de payloads.
+    Aceita uma lista de payloads, {"simulacoes": [...]} ou uma única dívida
+    com "quantidades_parcelas" (1 = à vista; padrão: à vista e 2x a 24x).
+    """
+    if isinstance(data, list):
+        return data
+    if not isinstance(data, dict):
+        raise ValueError("Envie uma lista de simulações ou uma dívida com 'quantidades_parcelas'.")
+    if "simulacoes" in data:
+        if not isinstance(data["simulacoes"], list):
+            raise ValueError("'simulacoes' deve ser uma lista.")
+        return data["simulacoes"]
+
+    for campo in ["valor_original", "dias_em_atraso"]:
+        if campo not in data:
+            raise ValueError(f"Campo obrigatório '{campo}' ausente.")
+    _validar_campos_escalares(data)
+
+    quantidades = data.get("quantidades_parcelas") or [1] + list(range(2, 25))
+    if not isinstance(quantidades, list):
+        raise ValueError("'quantidades_parcelas' deve ser uma lista.")
+
+    payloads = []
+    for qtd in quantidades:
+        payload = {
+            "valor_original": data["valor_original"],
+            "dias_em_atraso": data["dias_em_atraso"],
+            "tipo_pagamento": "avista" if qtd == 1 else "parcelado",
+            "valor_entrada": data.get("valor_entrada"),
+        }
+        if qtd != 1:
+            payload["quantidade_parcelas"] = qtd
+        payloads.append(payload)
+    return payloads
 
-def info_boleto(acordo_id):
-    acordo = Acordo.query.get(acordo_id)
-    if not acordo:
-        return {"erro": "Acordo não encontrado"}, 404
 
-    contrato = acordo.contrato
-    if not contrato:
-        return {"erro": "Contrato não encontrado"}, 404
+def simular_acordos_lote(payloads, tamanho_bloco=500):
+    """
+    Gera o resultado de cada simulação, na ordem recebida, calculando em blocos
+    com `calcular_lote`. Erros de uma linha viram {"indice", "erro"} e não
+    interrompem as demais.
+    """
+    for inicio in range(0, len(payloads), tamanho_bloco):
+        bloco = payloads[inicio:inicio + tamanho_bloco]
+
+        erros = {}
+        validos = []
+        for i, payload in enumerate(bloco, start=inicio):
+            if not isinstance(payload, dict):
+                erros[i] = "Payload inválido."
+                continue
+            try:
+                _validar_payload_simulacao(payload)
+                validos.append(i)
+            except ValueError as e:
+                erros[i] = str(e)
+
+        try:
+            lote = calcular_lote({
+                "valor_original": [payloads[i].get("valor_original", 0) for i in validos],
+                "dias_em_atraso": [payloads[i].get("dias_em_atraso", 0) for i in validos],
+                "tipo_pagamento": [payloads[i].get("tipo_pagamento", "") for i in validos],
+                "quantidade_parcelas": [payloads[i].get("quantidade_parcelas", 0) for i in validos],
+                "valor_entrada": [payloads[i].get("valor_entrada") for i in validos],
+            })
+        except (TypeError, ValueError):
+            # Algum valor que o cálculo vetorizado não aceitou: o bloco segue linha a linha com `calcular`.
+            current_app.logger.warning("Simulação em lote caiu para o cálculo linha a linha.", exc_info=True)
+            lote = None
+        posicoes = {i: j for j, i in enumerate(validos)}
+
+        for i in range(inicio, inicio + len(bloco)):
+            if i in erros:
+                yield {"indice": i, "erro": erros[i]}
+                continue
+            try:
+                resultado = {"indice": i, **(linha_do_lote(lote, posicoes[i]) if lote is not None
+                                             else calcular(payloads[i]))}
+            except (TypeError, ValueError) as e:
+                resultado = {"indice": i, "erro": str(e)}
+            yield resultado
 
-    cliente = contrato.cliente
-    if not cliente:
-        return {"erro": "Cliente não encontrado"}, 404
-    
+
+# ------------------- Boletos -------------------
+
+def _montar_info_boleto(acordo, contrato, cliente, codigos=None):
+    """
+    Monta o dict usado no template do boleto. Não consulta o banco além dos objetos
+    recebidos. `codigos` é o par (código de barras, linha digitável), quando já calculado.
+    """
     endereco = cliente.enderecos[0] if cliente.enderecos else None
 
     qtd_parcelas = acordo.qtd_parcelas if acordo.qtd_parcelas > 0 else 1
@@ -243,9 +453,9 @@ def info_boleto(acordo_id):
         f"+ {acordo.qtd_parcelas} parcelas: R$ {valor_parcela:.2f}; "
         f"vencimento {acordo.vencimento.strftime('%d/%m/%Y')}"
     )
-    codigo_barras, linha_digitavel = gerar_linha_digitavel(acordo.id)
+    codigo_barras, linha_digitavel = codigos or febraban.codigo_barras(acordo.id, acordo.vencimento, acordo.valor_total)
 
-    boleto_info = {
+    return {
         "sacado": cliente.nome,
         "vencimento": acordo.vencimento.strftime("%d/%m/%Y"),
         "valor_documento": round(acordo.valor_total, 2),
@@ -263,179 +473,198 @@ def info_boleto(acordo_id):
         "estado_sacado": endereco.estado if endereco else "UF"
     }
 
-    return boleto_info, 200
 
+def info_boleto(acordo_id):
+    acordo = Acordo.query.get(acordo_id)
+    if not acordo:
+        return {"erro": "Acordo não encontrado"}, 404
+
+    contrato = acordo.contrato
+    if not contrato:
+        return {"erro": "Contrato não encontrado"}, 404
 
-def gerar_boleto(acordo_id):
-    acordo = Acordo.query.get_or_404(acordo_id)
-    boleto = Boleto.query.filter_by(acordo_id=acordo.id).first()
-
-    # 🛠️ CORREÇÃO: Esta linha e as seguintes voltaram um nível para trás
-    pasta = _pasta_boletos()
-    if not os.path.exists(pasta):
-        os.makedirs(pasta)
-
-    nome_arquivo = f"boleto_{acordo.id}.pdf"
-    caminho_pdf = os.path.join(pasta, nome_arquivo)
-
-    if boleto and os.path.exists(caminho_pdf):
-        current_app.logger.info(f"📄 Boleto já existente encontrado: {caminho_pdf}")
-        with open(caminho_pdf, "rb") as f:
-            pdf_bytes = f.read()
-        return pdf_bytes, nome_arquivo, boleto.id
-        
-    current_app.logger.info(f"[DEBUG] Iniciando geração de boleto para acordo_id={acordo_id}")
-
-    # ==========================================================
-    # ⚠️ MÉTODO 1: GERAÇÃO VIA DOCX (Word)
-    # ==========================================================
-    base_dir = os.path.dirname(__file__)
-    # Cuidado com caminhos absolutos no servidor (Render)
-    template_path = os.path.join(base_dir, r"C:\Users\guilh\Desktop\Meus projetos\Cob_Ale\importadores\Boleto CobAle.docx")
-    current_app.logger.info(f"🗂️ Template path usado: {template_path}")
-    doc = DocxTemplate(template_path)
-
-    caminho_img_sem_ext = info["caminho_img"].replace(".png", "")
-    ean = barcode.get("code128", info["codigo_barras"], writer=ImageWriter())
-    ean.save(caminho_img_sem_ext)
-    caminho_img_final = caminho_img_sem_ext + ".png"
-    info["caminho_img"] = caminho_img_final
-
-    if not os.path.exists(caminho_img_final):
-        raise FileNotFoundError(f"Código de barras não foi gerado: {caminho_img_final}")
-
-    info_boleto_docx = info.copy()
-    info_boleto_docx["codigo_barras_img"] = InlineImage(doc, caminho_img_final, width=Mm(80))
-
-    current_app.logger.info("📝 Renderizando DOCX...")
-    doc.render(info_boleto_docx)
-
-    temp_docx = os.path.join(base_dir, f"temp_boleto_{acordo.id}.docx")
-    doc.save(temp_docx)
+    cliente = contrato.cliente
+    if not cliente:
+        return {"erro": "Cliente não encontrado"}, 404
 
     try:
-        pythoncom.CoInitialize()
-        convert(temp_docx, caminho_pdf)
-        current_app.logger.info(f"✅ PDF convertido com sucesso: {caminho_pdf}")
-    except Exception as e:
-        current_app.logger.error(f"❌ Erro ao converter DOCX para PDF: {e}", exc_info=True)
-        raise
-    finally:
-        pythoncom.CoUninitialize()
-
-    if os.path.exists(temp_docx):
-        os.remove(temp_docx)
-    if os.path.exists(caminho_img_final):
-        os.remove(caminho_img_final)
-
-    if not boleto:
-        boleto = Boleto(
-            acordo_id=acordo.id,
-            nome_arquivo=nome_arquivo,
-            criado_em=datetime.utcnow(),
-            enviado=False
-        )
-        db.session.add(boleto)
-    else:
-        boleto.nome_arquivo = nome_arquivo
-        boleto.criado_em = datetime.utcnow()
-
-    # ==========================================================
-    # ⚠️ MÉTODO 2: GERAÇÃO VIA HTML (Weasyprint/pdfkit)
-    # Aqui o código repete definições de variáveis já criadas acima
-    # ==========================================================
-    nome_arquivo = f"boleto_{acordo.id}.pdf"
-    caminho_pdf = os.path.join(pasta, nome_arquivo)
-
-    # 1. Verifica se já existe um PDF pronto
-    if boleto and os.path.exists(caminho_pdf):
-        current_app.logger.info(f"📄 Boleto já existente encontrado: {caminho_pdf}")
-        with open(caminho_pdf, "rb") as f:
-            pdf_bytes = f.read()
-        return pdf_bytes, nome_arquivo
+        return _montar_info_boleto(acordo, contrato, cliente), 200
+    except ValueError as e:
+        return {"erro": str(e)}, 400
 
-    current_app.logger.info(f"[DEBUG] Iniciando geração de boleto via Weasyprint para acordo_id={acordo_id}")
 
-    # 2. Busca informações do boleto
-    boleto_info, status = info_boleto(acordo_id)
-    if status != 200:
-        raise ValueError("Erro ao gerar informações do boleto.")
+def infos_boleto(acordo_ids):
+    """
+    Versão em lote de `info_boleto`: um join acordo/contrato/cliente e um SELECT IN
+    para os endereços, seja qual for a quantidade de acordos, com os códigos de
+    barras calculados de uma vez. Devolve {acordo_id: boleto_info}; ids sem
+    contrato ou cliente, ou com vencimento/valor inválido, ficam de fora.
+    """
+    if not acordo_ids:
+        return {}
+
+    linhas = (
+        db.session.query(Acordo, Contrato, Cliente)
+        .join(Contrato, Acordo.contrato_id == Contrato.numero_contrato)
+        .join(Cliente, Contrato.cliente_id == Cliente.id)
+        .options(selectinload(Cliente.enderecos))
+        .filter(Acordo.id.in_(list(acordo_ids)))
+        .all()
+    )
+    if not linhas:
+        return {}
 
-    # 3. Gera código de barras
-    codigo_barras, linha_digitavel = gerar_linha_digitavel(acordo.id)
-    boleto_info["linha_digitavel"] = linha_digitavel
-    boleto_info["codigo_barras"] = codigo_barras
-
-    if not codigo_barras.isdigit():
-        raise ValueError("Código de barras deve ser uma sequência numérica.")
-
-    barcode_class = barcode.get_barcode_class("code128")
-    barcode_obj = barcode_class(codigo_barras, writer=ImageWriter())
-    buf_bar = io.BytesIO()
-    barcode_obj.write(buf_bar)
-    barcode_b64 = base64.b64encode(buf_bar.getvalue()).decode("utf-8")
-
-    # 4. Pega a logo (Evita falha se o arquivo não existir)
-    logo_path = os.path.join(current_app.root_path, "..", "importadores", "img", "logo_CobAle.png")
-    logo_b64 = ""
-    if os.path.exists(logo_path):
-        with open(logo_path, "rb") as f:
-            logo_b64 = base64.b64encode(f.read()).decode("utf-8")
-
-    # 5. Gera HTML e PDF
-    html = render_template("boleto.html", boleto=boleto_info, barcode_img=barcode_b64, logo_b64=logo_b64)
-    pdf = HTML(string=html).write_pdf()
-
-    if not pdf or not isinstance(pdf, bytes):
-        raise ValueError("Erro ao gerar o PDF do boleto.")
-
-    with open(caminho_pdf, "wb") as f:
-        f.write(pdf)
-
-    # 6. Salva no Banco de Dados
-    if not boleto:
-        boleto = Boleto(
-            acordo_id=acordo.id,
-            nome_arquivo=nome_arquivo,
-            criado_em=datetime.utcnow(),
-            enviado=False
-        )
-        db.session.add(boleto)
-    else:
-        boleto.nome_arquivo = nome_arquivo
-        boleto.criado_em = datetime.utcnow()
+    try:
+        codigos = list(zip(*(
+            array.tolist() for array in febraban.codigos_barras_lote(
+                [acordo.id for acordo, _, _ in linhas],
+                [acordo.vencimento for acordo, _, _ in linhas],
+                [float(acordo.valor_total) for acordo, _, _ in linhas],
+            )
+        )))
+    except ValueError:
+        # Algum acordo com vencimento ou valor inválido: calcula um a um para isolar o erro.
+        codigos = [None] * len(linhas)
+
+    infos = {}
+    for (acordo, contrato, cliente), codigo in zip(linhas, codigos):
+        try:
+            infos[acordo.id] = _montar_info_boleto(acordo, contrato, cliente, codigo)
+        except ValueError as e:
+            current_app.logger.error(f"Boleto do acordo {acordo.id} não pode ser montado: {e}")
+    return infos
+
+
+def preparar_boletos(pdfs):
+    """
+    Grava vários PDFs ({acordo_id: pdf}) no armazenamento de boletos e cria/atualiza
+    os registros em `boletos` com caminho, tamanho e checksum, só com flush: o
+    chamador fecha a transação. Devolve ({acordo_id: Boleto}, arquivos substituídos),
+    e os substituídos devem ir para `remover_arquivos_sem_uso` depois do commit.
+    """
+    armazenamento = armazenamento_boletos()
+    indices = {}
+    for acordo_id, pdf in pdfs.items():
+        soma = checksum(pdf)
+        chave = chave_para(soma)
+        armazenamento.salvar(chave, pdf)
+        indices[acordo_id] = (chave, len(pdf), soma)
+
+    por_acordo = {}
+    for boleto in Boleto.query.filter(Boleto.acordo_id.in_(list(pdfs))).order_by(Boleto.id.desc()):
+        por_acordo[boleto.acordo_id] = boleto
+
+    substituidos = {}
+    agora = datetime.utcnow()
+    for acordo_id in pdfs:
+        chave, tamanho, soma = indices[acordo_id]
+        boleto = por_acordo.get(acordo_id)
+        if not boleto:
+            boleto = Boleto(acordo_id=acordo_id, enviado=False)
+            db.session.add(boleto)
+            por_acordo[acordo_id] = boleto
+        elif boleto.checksum and boleto.checksum != soma:
+            substituidos[boleto.checksum] = boleto.caminho
+        boleto.nome_arquivo = f"boleto_{acordo_id}.pdf"
+        boleto.caminho = chave
+        boleto.tamanho = tamanho
+        boleto.checksum = soma
+        boleto.criado_em = agora
+
+    db.session.flush()
+    return por_acordo, substituidos
+
+
+def remover_arquivos_sem_uso(arquivos):
+    """
+    Apaga do armazenamento os arquivos ({checksum: caminho}) que nenhum boleto
+    referencia mais. Uma consulta pelo índice de checksum, sem listar pastas.
+    """
+    if not arquivos:
+        return
+    em_uso = {soma for (soma,) in db.session.query(Boleto.checksum).filter(Boleto.checksum.in_(list(arquivos)))}
+    armazenamento = armazenamento_boletos()
+    for soma, caminho in arquivos.items():
+        if soma not in em_uso and caminho:
+            armazenamento.remover(caminho)
 
+
+def salvar_boletos(pdfs):
+    """Versão com commit de `preparar_boletos`. Devolve {acordo_id: Boleto}."""
     try:
+        por_acordo, substituidos = preparar_boletos(pdfs)
         db.session.commit()
     except Exception as e:
         db.session.rollback()
-        print(f"Erro ao salvar boleto no banco: {e}")
+        current_app.logger.error(f"Erro ao salvar boleto no banco: {e}")
         raise
 
-    return pdf, nome_arquivo, boleto.id
+    remover_arquivos_sem_uso(substituidos)
+    return por_acordo
 
 
-def listar_boletos_por_pasta(acordo_id):
-    pasta = _pasta_boletos()
-    arquivos = [f for f in os.listdir(pasta) if f.startswith(f"boleto_{acordo_id}") and f.endswith(".pdf")]
+def salvar_boleto(acordo_id, pdf):
+    """Grava o PDF no armazenamento de boletos e cria/atualiza o registro em `boletos`."""
+    boleto = salvar_boletos({acordo_id: pdf})[acordo_id]
+    return boleto.nome_arquivo, boleto
 
-    return [{"boleto_id": idx, "nome_arquivo": arquivo} for idx, arquivo in enumerate(arquivos, start=1)]
+
+def gerar_boleto(acordo_id):
+    """
+    Devolve (boleto, arquivo) do acordo, gerando o PDF só na primeira vez.
+    `arquivo` é o caminho do PDF no disco quando o armazenamento é local (a
+    resposta sai direto do arquivo, sem ler para a memória) ou os bytes do PDF.
+    """
+    acordo = Acordo.query.get_or_404(acordo_id)
+    boleto = Boleto.query.filter_by(acordo_id=acordo.id).order_by(Boleto.id.desc()).first()
+
+    # 1. Verifica se já existe um PDF pronto (pelo índice, sem procurar na pasta)
+    if boleto and boleto.caminho:
+        armazenamento = armazenamento_boletos()
+        caminho = armazenamento.caminho_local(boleto.caminho)
+        if caminho:
+            if os.path.exists(caminho):
+                return boleto, caminho
+        else:
+            pdf_bytes = armazenamento.ler(boleto.caminho)
+            if pdf_bytes is not None:
+                return boleto, pdf_bytes
+
+    current_app.logger.info(f"[DEBUG] Iniciando geração de boleto via Weasyprint para acordo_id={acordo_id}")
+
+    # 2. Busca informações do boleto (já inclui código de barras e linha digitável)
+    boleto_info, status = info_boleto(acordo_id)
+    if status != 200:
+        raise ValueError("Erro ao gerar informações do boleto.")
+
+    # 3. Gera HTML e PDF e salva no armazenamento e no banco
+    pdf = renderizar_boleto_pdf(boleto_info)
+    _, boleto = salvar_boleto(acordo.id, pdf)
+
+    return boleto, pdf
+
+
+def listar_boletos_do_acordo(acordo_id):
+    boletos = Boleto.query.filter_by(acordo_id=acordo_id).order_by(Boleto.id).all()
+    return [
+        {"boleto_id": boleto.id, "nome_arquivo": boleto.nome_arquivo, "tamanho": boleto.tamanho,
+         "checksum": boleto.checksum, "criado_em": boleto.criado_em.strftime("%Y-%m-%d %H:%M:%S"),
+         "enviado": boleto.enviado}
+        for boleto in boletos
+    ]
 
 
 def deletar_todos_boletos():
     try:
-        pasta = _pasta_boletos()
-        num_arquivos = 0
-        if os.path.exists(pasta):
-            for arquivo in os.listdir(pasta):
-                if arquivo.endswith(".pdf"):
-                    os.remove(os.path.join(pasta, arquivo))
-                    num_arquivos += 1
-
+        BoletoJob.query.update({"boleto_id": None}, synchronize_session=False)
+        EnvioBoleto.query.delete(synchronize_session=False)
         num_boletos_db = Boleto.query.count()
         Boleto.query.delete()
         db.session.commit()
 
+        # Só depois do commit: se o banco falhar, os registros continuam apontando para PDFs que existem.
+        num_arquivos = armazenamento_boletos().limpar()
+
         return {"mensagem": f"{num_arquivos} arquivos PDF deletados, {num_boletos_db} registros removidos do banco."}, 200
 
     except Exception as e:
@@ -443,40 +672,9 @@ def deletar_todos_boletos():
         return {"erro": str(e)}, 500
     
 
-def gerar_linha_digitavel(acordo_id, banco="237", carteira="09", agencia="1234", conta="56789"):
-    acordo = Acordo.query.get_or_404(acordo_id)
-    codigo_banco = banco
-    moeda = "9"
-    data_base = date(1997, 10, 7)
-    fator_vencimento = (acordo.vencimento.date() - data_base).days
-    fator_vencimento = str(fator_vencimento).zfill(4)
-    valor = int(acordo.valor_total * 100)
-    valor_str = str(valor).zfill(10)
-    nosso_numero = str(acordo.id).zfill(11)
-    campo_livre = f"{carteira}{nosso_numero}{agencia}{conta}".ljust(25, "0")
-    codigo_sem_dv = f"{codigo_banco}{moeda}{fator_vencimento}{valor_str}{campo_livre}"
-    dv = calcular_dv(codigo_sem_dv)
-    codigo_barras = f"{codigo_banco}{moeda}{dv}{fator_vencimento}{valor_str}{campo_livre}"
-    linha_digitavel = (
-        f"{codigo_barras[0:5]}.{codigo_barras[5:10]} "
-        f"{codigo_barras[10:15]}.{codigo_barras[15:21]} "
-        f"{codigo_barras[21:26]}.{codigo_barras[26:32]} "
-        f"{codigo_barras[32]} "
-        f"{codigo_barras[33:]}"
-    )
-    
-    print(f"Código de Barras: {codigo_barras} | Linha Digitável: {linha_digitavel}")
-    current_app.logger.info(f"Código de Barras: {codigo_barras} | Linha Digitável: {linha_digitavel}")
-    return codigo_barras, linha_digitavel
-
-
-def calcular_dv(codigo):
-    pesos = [2,3,4,5,6,7,8,9]
-    soma = 0
-    for i, n in enumerate(reversed(codigo)):
-        soma += int(n) * pesos[i % len(pesos)]
-    resto = soma % 11
-    dv = 11 - resto
-    if dv > 9:
-        dv = 0
-    return str(dv)
+def gerar_linha_digitavel(acordo_id):
+    """Código de barras e linha digitável de um acordo, lendo só vencimento e valor."""
+    linha = db.session.query(Acordo.vencimento, Acordo.valor_total).filter(Acordo.id == acordo_id).first()
+    if not linha:
+        return None
+    return febraban.codigo_barras(acordo_id, linha.vencimento, linha.valor_total)
@@ -0,0 +1,144 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, func, select
+from app.database import db
+from app.analises import SEM_ACORDO, atualizar_analises, fonte_analises
+from app.controllers.acordo_controller import STATUS_ACORDO
+
+# Faixas de dias em atraso dos descontos de `calculadora.calcular`.
+FAIXAS_ATRASO = [("0-59", 0, 59), ("60-99", 60, 99), ("100-150", 100, 150), ("151+", 151, None)]
+
+
+def _ler_data(args, nome):
+    valor = args.get(nome)
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Parâmetro '{nome}' inválido. Use o formato YYYY-MM-DD.")
+
+
+def ler_filtros(args):
+    """Filtros comuns dos relatórios: `filial` (nome exato) e `inicio`/`fim` (vencimento, YYYY-MM-DD)."""
+    return {"filial": args.get("filial") or None, "inicio": _ler_data(args, "inicio"), "fim": _ler_data(args, "fim")}
+
+
+def ler_referencia(args):
+    """Data a partir da qual o atraso é contado (`referencia`, padrão hoje)."""
+    return _ler_data(args, "referencia") or date.today()
+
+
+def _filtros(fonte, filial=None, inicio=None, fim=None):
+    filtros = []
+    if filial:
+        filtros.append(fonte.c.filial == filial)
+    if inicio:
+        filtros.append(fonte.c.vencimento >= inicio)
+    if fim:
+        filtros.append(fonte.c.vencimento <= fim)
+    return filtros
+
+
+def _somas(fonte):
+    return [
+        func.sum(fonte.c.contratos).label("contratos"),
+        func.sum(fonte.c.valor_contratos).label("valor_total"),
+        func.sum(case((fonte.c.situacao != SEM_ACORDO, fonte.c.contratos), else_=0)).label("contratos_com_acordo"),
+        func.sum(fonte.c.valor_acordos).label("valor_acordos"),
+    ]
+
+
+def _totais(linha):
+    contratos = int(linha.contratos or 0) if linha else 0
+    com_acordo = int(linha.contratos_com_acordo or 0) if linha else 0
+    return {
+        "contratos": contratos,
+        "valor_total": round(float(linha.valor_total or 0), 2) if linha else 0.0,
+        "contratos_com_acordo": com_acordo,
+        "valor_acordos": round(float(linha.valor_acordos or 0), 2) if linha else 0.0,
+        "taxa_conversao": round(com_acordo / contratos, 4) if contratos else 0.0,
+    }
+
+
+def aging(referencia=None, filial=None, inicio=None, fim=None):
+    """Contratos e valores por faixa de atraso na data `referencia` (vencimentos futuros contam como 0 dias)."""
+    referencia = referencia or date.today()
+    fonte = fonte_analises("carteira" if filial else "dia")
+    faixa = case(
+        *[(fonte.c.vencimento <= referencia - timedelta(days=de), nome) for nome, de, _ in reversed(FAIXAS_ATRASO[1:])],
+        else_=FAIXAS_ATRASO[0][0],
+    )
+    linhas = {
+        linha.faixa: linha
+        for linha in db.session.execute(
+            select(faixa.label("faixa"), *_somas(fonte)).where(*_filtros(fonte, filial, inicio, fim)).group_by(faixa)
+        )
+    }
+    return {
+        "referencia": referencia.strftime("%Y-%m-%d"),
+        "faixas": [
+            {"faixa": nome, "dias_de": de, "dias_ate": ate, **_totais(linhas.get(nome))}
+            for nome, de, ate in FAIXAS_ATRASO
+        ],
+    }
+
+
+def totais_por_filial(filial=None, inicio=None, fim=None):
+    """Contratos, valores e conversão em acordos por filial, da maior carteira para a menor."""
+    fonte = fonte_analises("carteira" if inicio or fim else "mes")
+    somas = _somas(fonte)
+    consulta = (
+        select(fonte.c.filial, *somas)
+        .where(*_filtros(fonte, filial, inicio, fim))
+        .group_by(fonte.c.filial)
+        .order_by(somas[1].desc(), fonte.c.filial)
+    )
+    return [{"filial": linha.filial, **_totais(linha)} for linha in db.session.execute(consulta)]
+
+
+def conversao(filial=None, inicio=None, fim=None):
+    """
+    Situação do último acordo de cada contrato: quantos contratos e quanto valor
+    há em cada status, a taxa de conversão (contratos com acordo / total) e a de
+    recuperação (valor dos acordos concluídos / valor da carteira).
+    """
+    fonte = fonte_analises("carteira" if filial else "dia")
+    consulta = (
+        select(
+            fonte.c.situacao,
+            func.sum(fonte.c.contratos).label("contratos"),
+            func.sum(fonte.c.valor_contratos).label("valor_total"),
+            func.sum(fonte.c.valor_acordos).label("valor_acordos"),
+        )
+        .where(*_filtros(fonte, filial, inicio, fim))
+        .group_by(fonte.c.situacao)
+    )
+    linhas = {linha.situacao: linha for linha in db.session.execute(consulta)}
+    total = sum(int(linha.contratos) for linha in linhas.values())
+    valor_total = sum(float(linha.valor_total or 0) for linha in linhas.values())
+    sem_acordo = int(linhas[SEM_ACORDO].contratos) if SEM_ACORDO in linhas else 0
+    concluidos = float(linhas["concluido"].valor_acordos or 0) if "concluido" in linhas else 0.0
+
+    ordem = [SEM_ACORDO] + STATUS_ACORDO + sorted(set(linhas) - {SEM_ACORDO, *STATUS_ACORDO})
+    situacoes = []
+    for situacao in ordem:
+        linha = linhas.get(situacao)
+        contratos = int(linha.contratos) if linha else 0
+        situacoes.append({
+            "situacao": situacao,
+            "contratos": contratos,
+            "percentual": round(contratos / total, 4) if total else 0.0,
+            "valor_total": round(float(linha.valor_total or 0), 2) if linha else 0.0,
+            "valor_acordos": round(float(linha.valor_acordos or 0), 2) if linha else 0.0,
+        })
+    return {
+        "contratos": total,
+        "contratos_com_acordo": total - sem_acordo,
+        "taxa_conversao": round((total - sem_acordo) / total, 4) if total else 0.0,
+        "taxa_recuperacao": round(concluidos / valor_total, 4) if valor_total else 0.0,
+        "situacoes": situacoes,
+    }
+
+
+def atualizar(completo=False):
+    return {"recalculados": atualizar_analises(completo)}
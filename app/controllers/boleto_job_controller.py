@@ -0,0 +1,263 @@
+from flask import current_app
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from sqlalchemy import func, insert, select
+from app.database import db
+from app.models.acordo import Acordo, Boleto
+from app.models.boleto_job import BoletoJob
+from app.controllers import acordo_controller
+from app.boleto_pdf import renderizar_boleto_pdf
+import os
+import time
+import uuid
+
+STATUS_ATIVOS = ["pendente", "processando"]
+STATUS_JOB = ["pendente", "processando", "concluido", "erro"]
+
+
+# ------------------- API -------------------
+
+def criar_job(acordo_id):
+    """Enfileira a geração do boleto do acordo. Reaproveita um job ainda ativo do mesmo acordo."""
+    if not Acordo.query.get(acordo_id):
+        return None
+
+    job = BoletoJob.query.filter(BoletoJob.acordo_id == acordo_id, BoletoJob.status.in_(STATUS_ATIVOS)).first()
+    if not job:
+        job = BoletoJob(acordo_id=acordo_id)
+        db.session.add(job)
+        db.session.commit()
+    return job.to_dict()
+
+
+def obter_job(job_id):
+    job = BoletoJob.query.get(job_id)
+    return job.to_dict() if job else None
+
+
+# ------------------- Lotes -------------------
+
+def filtrar_acordos(consulta, vencimento_inicio=None, vencimento_fim=None, status=None):
+    """Aplica à consulta o filtro de lote: vencimento ("YYYY-MM-DD", fim inclusivo) e/ou status do acordo."""
+    if not (vencimento_inicio or vencimento_fim or status):
+        raise ValueError("Informe um intervalo de vencimento ou um status.")
+
+    try:
+        if vencimento_inicio:
+            consulta = consulta.where(Acordo.vencimento >= datetime.strptime(vencimento_inicio, "%Y-%m-%d"))
+        if vencimento_fim:
+            fim = datetime.strptime(vencimento_fim, "%Y-%m-%d") + timedelta(days=1)
+            consulta = consulta.where(Acordo.vencimento < fim)
+    except ValueError:
+        raise ValueError("Datas devem estar no formato YYYY-MM-DD.")
+    if status:
+        consulta = consulta.where(Acordo.status == status)
+    return consulta
+
+
+def criar_lote(vencimento_inicio=None, vencimento_fim=None, status=None, regerar=False, tamanho_bloco=5000):
+    """
+    Enfileira um job para cada acordo com vencimento no intervalo (datas "YYYY-MM-DD",
+    fim inclusivo) e/ou com o status informado. Acordos que já têm job ativo ficam de
+    fora, e os que já têm boleto também, a menos que `regerar` seja verdadeiro; por
+    isso rodar de novo o mesmo filtro retoma um lote interrompido. Sem nenhum
+    acordo a enfileirar, nenhum lote é criado (`lote_id` None).
+    """
+    consulta = filtrar_acordos(select(Acordo.id).order_by(Acordo.id), vencimento_inicio, vencimento_fim, status)
+    consulta = consulta.where(
+        ~Acordo.id.in_(select(BoletoJob.acordo_id).where(BoletoJob.status.in_(STATUS_ATIVOS)))
+    )
+    if not regerar:
+        consulta = consulta.where(~Acordo.id.in_(select(Boleto.acordo_id)))
+
+    acordo_ids = db.session.execute(consulta).scalars().all()
+    if not acordo_ids:
+        return {"lote_id": None, "total": 0}
+
+    lote_id = uuid.uuid4().hex
+    for inicio in range(0, len(acordo_ids), tamanho_bloco):
+        db.session.execute(insert(BoletoJob), [
+            {"acordo_id": acordo_id, "lote_id": lote_id}
+            for acordo_id in acordo_ids[inicio:inicio + tamanho_bloco]
+        ])
+    db.session.commit()
+
+    return {"lote_id": lote_id, "total": len(acordo_ids)}
+
+
+def progresso_lote(lote_id):
+    contagem = dict(
+        db.session.query(BoletoJob.status, func.count())
+        .filter(BoletoJob.lote_id == lote_id)
+        .group_by(BoletoJob.status)
+        .all()
+    )
+    total = sum(contagem.values())
+    if not total:
+        return None
+
+    progresso = {"lote_id": lote_id, "total": total}
+    progresso.update({status: contagem.get(status, 0) for status in STATUS_JOB})
+    progresso["percentual"] = round(100 * (progresso["concluido"] + progresso["erro"]) / total, 2)
+    return progresso
+
+
+# ------------------- Worker -------------------
+
+def _recuperar_jobs_travados():
+    """
+    Devolve para a fila jobs 'processando' há mais que BOLETO_JOB_TIMEOUT (worker
+    que morreu no meio). Os que já usaram BOLETO_JOB_MAX_TENTATIVAS viram 'erro':
+    um boleto que derruba o worker não volta para a fila para sempre.
+    """
+    agora = datetime.utcnow()
+    travados = BoletoJob.query.filter(
+        BoletoJob.status == "processando",
+        BoletoJob.iniciado_em < agora - timedelta(seconds=current_app.config["BOLETO_JOB_TIMEOUT"])
+    )
+    max_tentativas = current_app.config["BOLETO_JOB_MAX_TENTATIVAS"]
+    travados.filter(BoletoJob.tentativas >= max_tentativas).update(
+        {"status": "erro", "erro": "Tempo esgotado: o worker parou no meio em todas as tentativas.",
+         "finalizado_em": agora},
+        synchronize_session=False
+    )
+    travados.filter(BoletoJob.tentativas < max_tentativas).update({"status": "pendente"}, synchronize_session=False)
+    db.session.commit()
+
+
+def _reservar_jobs(quantidade):
+    """
+    Marca até `quantidade` jobs pendentes como 'processando' com um único UPDATE.
+    Ele só vale para jobs ainda pendentes e grava um token de reserva, então dois
+    workers nunca pegam o mesmo job.
+    """
+    ids = select(BoletoJob.id).where(BoletoJob.status == "pendente").order_by(BoletoJob.criado_em).limit(quantidade)
+    ids = db.session.execute(ids).scalars().all()
+    if not ids:
+        return []
+
+    reserva = uuid.uuid4().hex
+    BoletoJob.query.filter(BoletoJob.id.in_(ids), BoletoJob.status == "pendente").update(
+        {"status": "processando", "reserva": reserva, "iniciado_em": datetime.utcnow(),
+         "tentativas": BoletoJob.tentativas + 1},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return BoletoJob.query.filter_by(reserva=reserva).all()
+
+
+def _finalizar_jobs(job_ids, resultados, reserva):
+    """
+    Grava os PDFs prontos (`preparar_boletos`) e atualiza os jobs na mesma
+    transação. `resultados` é {job_id: pdf ou mensagem de erro}. Só vale para os
+    jobs que ainda são da `reserva`: um job que passou do BOLETO_JOB_TIMEOUT e
+    foi pego por outro worker fica com o resultado do outro.
+    """
+    jobs = (
+        BoletoJob.query.filter(BoletoJob.id.in_(job_ids), BoletoJob.reserva == reserva)
+        .with_for_update()
+        .all()
+    )
+    pdfs = {job.acordo_id: resultados[job.id] for job in jobs if isinstance(resultados[job.id], bytes)}
+    boletos, substituidos = acordo_controller.preparar_boletos(pdfs) if pdfs else ({}, {})
+
+    agora = datetime.utcnow()
+    max_tentativas = current_app.config["BOLETO_JOB_MAX_TENTATIVAS"]
+    for job in jobs:
+        resultado = resultados[job.id]
+        if isinstance(resultado, bytes):
+            job.status = "concluido"
+            job.boleto_id = boletos[job.acordo_id].id
+            job.erro = None
+        else:
+            job.erro = resultado
+            job.status = "erro" if job.tentativas >= max_tentativas else "pendente"
+        job.finalizado_em = agora
+    db.session.commit()
+
+    acordo_controller.remover_arquivos_sem_uso(substituidos)
+
+
+def _iniciar_processo():
+    # Cada processo do pool tem seu próprio app para poder renderizar o template.
+    from app import create_app
+    create_app().app_context().push()
+
+
+def _renderizar_bloco(infos):
+    """Roda no pool: renderiza um bloco de boletos, devolvendo o PDF ou o erro de cada um."""
+    resultados = {}
+    for job_id, boleto_info in infos.items():
+        try:
+            resultados[job_id] = renderizar_boleto_pdf(boleto_info)
+        except Exception as e:
+            resultados[job_id] = str(e) or e.__class__.__name__
+    return resultados
+
+
+def executar_worker(processos=None, intervalo=None, uma_vez=False, ao_progredir=None):
+    """
+    Consome a fila de `boleto_jobs`, renderizando os PDFs num pool de processos
+    (um por núcleo por padrão). Os dados de cada bloco de jobs são carregados com
+    `infos_boleto` e os resultados gravados com um commit por bloco. Com
+    `uma_vez=True`, termina quando a fila esvazia. `ao_progredir(concluidos, erros)`
+    é chamado a cada bloco finalizado.
+    """
+    processos = processos or current_app.config["BOLETO_WORKER_PROCESSOS"] or os.cpu_count() or 1
+    intervalo = intervalo or current_app.config["BOLETO_WORKER_INTERVALO"]
+    tamanho_bloco = current_app.config["BOLETO_WORKER_BLOCO"]
+    current_app.logger.info(f"Worker de boletos iniciado com {processos} processos.")
+
+    concluidos = erros = 0
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo) as executor:
+        em_andamento = {}
+
+        while True:
+            _recuperar_jobs_travados()
+
+            # Mantém até dois blocos por processo no pool para ele não ficar ocioso entre um e outro.
+            while len(em_andamento) < processos * 2:
+                jobs = _reservar_jobs(tamanho_bloco)
+                if not jobs:
+                    break
+                reserva = jobs[0].reserva
+
+                infos = acordo_controller.infos_boleto([job.acordo_id for job in jobs])
+                sem_dados = [job for job in jobs if job.acordo_id not in infos]
+                if sem_dados:
+                    _finalizar_jobs([job.id for job in sem_dados], {job.id: "Não foi possível montar os dados do boleto (acordo, contrato, cliente ou valores inválidos)." for job in sem_dados}, reserva)
+                    erros += len(sem_dados)
+
+                bloco = {job.id: infos[job.acordo_id] for job in jobs if job.acordo_id in infos}
+                if bloco:
+                    em_andamento[executor.submit(_renderizar_bloco, bloco)] = (list(bloco), reserva)
+
+            if not em_andamento:
+                if uma_vez:
+                    break
+                time.sleep(intervalo)
+                continue
+
+            prontos, _ = wait(em_andamento, timeout=intervalo, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                job_ids, reserva = em_andamento.pop(futuro)
+                try:
+                    resultados = futuro.result()
+                except Exception as e:
+                    current_app.logger.error(f"Erro ao renderizar bloco de boletos: {e}")
+                    resultados = {job_id: str(e) or e.__class__.__name__ for job_id in job_ids}
+
+                try:
+                    _finalizar_jobs(job_ids, resultados, reserva)
+                except Exception as e:
+                    db.session.rollback()
+                    current_app.logger.error(f"Erro ao salvar bloco de boletos: {e}")
+                    _finalizar_jobs(job_ids, {job_id: str(e) for job_id in job_ids}, reserva)
+
+                falhas = sum(1 for resultado in resultados.values() if not isinstance(resultado, bytes))
+                concluidos += len(job_ids) - falhas
+                erros += falhas
+                if ao_progredir:
+                    ao_progredir(concluidos, erros)
+
+    return {"concluidos": concluidos, "erros": erros}
@@ -1,11 +1,16 @@
-from flask import jsonify
+from flask import jsonify, current_app
 from app.database import db
 from app.models.cliente import Cliente, Endereco
 from app.models.contrato import Contrato
+from app.controllers.oferta_controller import invalidar_ofertas
+from app.paginacao import paginar
+from app.busca import filtro_cpf, ids_por_nome
+from app.importacao import chaves_existentes, importar_em_blocos, ler_data, linhas_docx, upsert
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import load_only, selectinload
 from datetime import datetime, timedelta
 import os
 import re
-from docx import Document
 from flask_jwt_extended import create_access_token
 
 def criar_cliente(data):
@@ -34,9 +39,26 @@ def criar_cliente(data):
     db.session.commit()
     return cliente.to_dict()
 
-def listar_clientes():
-    clientes = Cliente.query.all()
-    return [c.to_dict() for c in clientes]
+def _consulta_clientes(campos=None):
+    """Query de clientes carregando só as colunas pedidas e os endereços (se pedidos) num único SELECT ... IN."""
+    campos = campos or Cliente.CAMPOS
+    colunas = [getattr(Cliente, c) for c in campos if c not in ("id", "enderecos")]
+    query = Cliente.query.options(load_only(Cliente.id, *colunas))
+    if "enderecos" in campos:
+        query = query.options(selectinload(Cliente.enderecos))
+    return query
+
+
+def listar_clientes(after=None, limite=None, campos=None):
+    query = paginar(_consulta_clientes(campos), Cliente.id, after, limite, int)
+    return [c.to_dict(campos) for c in query]
+
+
+def iterar_clientes(after=None, limite=None, campos=None, tamanho_bloco=1000):
+    """Como `listar_clientes`, mas lendo do banco em blocos (yield_per) para respostas em streaming."""
+    query = paginar(_consulta_clientes(campos), Cliente.id, after, limite, int)
+    query = query.yield_per(tamanho_bloco)
+    return (c.to_dict(campos) for c in query)
 
 def obter_cliente(id):
     cliente = Cliente.query.get(id)
@@ -78,15 +100,47 @@ def deletar_cliente(id):
     
     db.session.delete(cliente)
     db.session.commit()
+    invalidar_ofertas()
     return {"mensagem": "Cliente e dependências excluídos com sucesso."}
 
 def buscar_clientes_por_cpf(cpf: str):
-    clientes = Cliente.query.filter(Cliente.cpf.like(f"{cpf}%")).all()
+    clientes = _consulta_clientes().filter(filtro_cpf(cpf)).order_by(Cliente.cpf).all()
     return [c.to_dict() for c in clientes]
 
+def _clientes_por_ids(ids, campos=None):
+    """Clientes dos `ids`, na mesma ordem (a do ranking da busca)."""
+    clientes = {c.id: c for c in _consulta_clientes(campos).filter(Cliente.id.in_(ids))} if ids else {}
+    return [clientes[i].to_dict(campos) for i in ids if i in clientes]
+
 def buscar_clientes_por_nome(nome: str):
-    clientes = Cliente.query.filter(Cliente.nome.ilike(f"%{nome}%")).all()
-    return [c.to_dict() for c in clientes]
+    return _clientes_por_ids(ids_por_nome(nome))
+
+def buscar_clientes(termo, pagina=1, limite=None, campos=None):
+    """
+    Busca da caixa de pesquisa dos operadores: só dígitos (pontuação de CPF é
+    ignorada) é prefixo de CPF, em ordem de CPF; o resto é nome, sem acento e
+    ordenado por relevância. Devolve (clientes da página, se há próxima página).
+    """
+    termo = (termo or "").strip()
+    if not termo:
+        raise ValueError("Informe o termo de busca em 'q'.")
+    if pagina < 1:
+        raise ValueError("O parâmetro 'page' deve ser maior que zero.")
+    if limite is None:
+        limite = current_app.config["BUSCA_LIMITE_PADRAO"]
+    elif limite < 1:
+        raise ValueError("O parâmetro 'limit' deve ser maior que zero.")
+    limite = min(limite, current_app.config["BUSCA_LIMITE_MAXIMO"])
+    offset = (pagina - 1) * limite
+
+    cpf = re.sub(r"[.\-\s]", "", termo)
+    if cpf.isdigit():
+        clientes = (_consulta_clientes(campos).filter(filtro_cpf(cpf)).order_by(Cliente.cpf)
+                    .offset(offset).limit(limite + 1).all())
+        itens = [c.to_dict(campos) for c in clientes]
+    else:
+        itens = _clientes_por_ids(ids_por_nome(termo, limite + 1, offset), campos)
+    return itens[:limite], len(itens) > limite
 
 def login_cliente(data):
     cpf = data.get("cpf")
@@ -112,87 +166,88 @@ def login_cliente(data):
 def validar_telefone(telefone):
     return bool(re.match(r'^\d{10,11}$', telefone))
 
+# ------------------- Importação -------------------
+
+COLUNAS_IMPORTACAO = ["nome", "cpf", "telefone", "email", "data_nascimento", "rua", "numero", "cidade", "estado", "cep"]
+
+
+def validar_linha_cliente(cells):
+    """
+    Regras de uma linha de clientes: nome, cpf, telefone, email, data de nascimento
+    (dd/mm/aaaa) e, opcionalmente, rua, número, cidade, estado e cep. Devolve
+    (cliente, endereço ou None) como dicts; levanta ValueError se a linha é inválida.
+    """
+    if len(cells) < 5:
+        raise ValueError("Linha inválida (faltando colunas).")
+
+    nome, cpf, telefone, email = (c.strip() for c in cells[:4])
+    if not nome or not cpf:
+        raise ValueError("Registro inválido (nome e CPF são obrigatórios).")
+    if not validar_telefone(telefone):
+        raise ValueError("Telefone inválido.")
+    try:
+        data_nascimento = ler_data(cells[4], "%d/%m/%Y").date()
+    except ValueError:
+        raise ValueError(f"Data de nascimento inválida: {cells[4]}")
+
+    cliente = {"nome": nome, "cpf": cpf, "telefone": telefone, "email": email, "data_nascimento": data_nascimento}
+
+    rua, numero, cidade, estado, cep = ([c.strip() for c in cells[5:10]] + [""] * 5)[:5]
+    endereco = None
+    if rua or numero or cidade or estado or cep:
+        endereco = {"rua": rua, "numero": numero, "cidade": cidade, "estado": estado, "cep": cep}
+    return cliente, endereco
+
+
+def _gravar_bloco_clientes(bloco, relatorio):
+    clientes = {}
+    enderecos = {}
+    validas = 0
+    for numero_linha, cells in bloco:
+        relatorio.processados += 1
+        try:
+            cliente, endereco = validar_linha_cliente(cells)
+        except ValueError as e:
+            relatorio.erro(numero_linha, str(e))
+            continue
+        validas += 1
+        clientes[cliente["cpf"]] = cliente  # CPF repetido no arquivo: vale a última linha
+        if endereco:
+            enderecos[cliente["cpf"]] = endereco
+
+    if not clientes:
+        return
+
+    existentes = chaves_existentes(Cliente.cpf, clientes)
+    upsert(Cliente, list(clientes.values()), "cpf", ["nome", "telefone", "email", "data_nascimento"])
+
+    # Como na importação linha a linha: um endereço informado substitui os anteriores do cliente.
+    if enderecos:
+        ids = chaves_existentes(Cliente.cpf, enderecos, Cliente.id)
+        db.session.execute(delete(Endereco).where(Endereco.cliente_id.in_(list(ids.values()))))
+        db.session.execute(insert(Endereco), [
+            {**endereco, "cliente_id": ids[cpf]} for cpf, endereco in enderecos.items()
+        ])
+
+    inseridos = len(clientes) - len(existentes)
+    relatorio.inseridos += inseridos
+    relatorio.atualizados += validas - inseridos
+
+
+def importar_clientes(linhas, tamanho_lote=None, ao_progredir=None, processos=None, importacao=None, retomar=False):
+    """
+    Importa clientes de um iterável de (número da linha, células). Cada bloco de
+    IMPORTACAO_LOTE linhas faz uma consulta dos CPFs já cadastrados, um upsert em
+    lote pelo CPF, a troca dos endereços em lote e um commit. Devolve o relatório
+    (contadores, erros por linha e por bloco e linhas por segundo).
+    """
+    relatorio = importar_em_blocos(_gravar_bloco_clientes, linhas, tamanho_lote, ao_progredir,
+                                   processos, importacao, retomar)
+
+    current_app.logger.info(f"Importação de clientes concluída: {relatorio}")
+    return relatorio.to_dict()
+
+
 def importar_clientes_docx(caminho_arquivo, app):
     with app.app_context():
-        doc = Document(caminho_arquivo)
-        clientes_importados = 0
-        clientes_atualizados = 0
-
-        for tabela in doc.tables:
-            for i, linha in enumerate(tabela.rows):
-                if i == 0:
-                    continue
-
-                cells = [c.text.strip() for c in linha.cells]
-
-                if len(cells) < 4:
-                    print(f"Linha {i+1} inválida (faltando colunas). Ignorada.")
-                    continue
-
-                nome = cells[0]
-                cpf = cells[1]
-                telefone = cells[2]
-                email = cells[3]
-                data_nascimento = datetime.strptime(cells[4], "%d/%m/%Y").date()
-                rua = cells[5] if len(cells) > 4 else ""
-                numero_end = cells[6].strip() if len(cells) > 5 else None
-                cidade = cells[7] if len(cells) > 6 else ""
-                estado = cells[8] if len(cells) > 7 else ""
-                cep = cells[9] if len(cells) > 8 else ""
-
-                if not nome or not cpf:
-                    print(f"Registro inválido na linha {i + 1}")
-                    continue
-
-                if not validar_telefone(telefone):
-                    print(f"Telefone inválido na linha {i + 1}. Ignorado.")
-                    continue
-
-                cliente = Cliente.query.filter_by(cpf=cpf).first()
-                if cliente is not None:
-                    cliente.nome = nome
-                    cliente.telefone = telefone
-                    cliente.email = email
-                    cliente.data_nascimento = data_nascimento
-
-                    if rua or numero_end or cidade or estado or cep:
-                        Endereco.query.filter_by(cliente_id=cliente.id).delete()
-                        endereco = Endereco(
-                            rua=rua,
-                            numero=int(numero_end) if numero_end and numero_end.isdigit() else None,
-                            cidade=cidade,
-                            estado=estado,
-                            cep=cep,
-                            cliente_id=cliente.id
-                        )
-                        db.session.add(endereco)
-
-                    clientes_atualizados += 1
-                    print(f"Cliente com CPF {cpf} atualizado.")
-                else:
-                    cliente = Cliente(
-                        nome=nome,
-                        cpf=cpf,
-                        telefone=telefone,
-                        email=email,
-                        data_nascimento=data_nascimento
-                    )
-                    db.session.add(cliente)
-                    db.session.flush()
-
-                    if rua or numero_end or cidade or estado or cep:
-                        endereco = Endereco(
-                            rua=rua,
-                            numero=int(numero_end) if numero_end and numero_end.isdigit() else None,
-                            cidade=cidade,
-                            estado=estado,
-                            cep=cep,
-                            cliente_id=cliente.id
-                        )
-                        db.session.add(endereco)
-
-                    clientes_importados += 1
-                    print(f"Cliente com CPF {cpf} adicionado.")
-
-        db.session.commit()
-        print(f"Importação concluída: {clientes_importados} clientes adicionados, {clientes_atualizados} clientes atualizados.")
\ No newline at end of file
+        return importar_clientes(linhas_docx(caminho_arquivo))
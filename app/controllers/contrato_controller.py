@@ -1,23 +1,28 @@
+from flask import current_app
 from app.database import db
-from datetime import datetime
+from datetime import datetime, timedelta
+from app.models.cliente import Cliente
 from app.models.contrato import Contrato
+from app.controllers.oferta_controller import invalidar_ofertas
+from app.importacao import checksum_arquivo, chaves_existentes, importar_em_blocos, ler_data, linhas_docx, upsert
+from app.paginacao import paginar
+from app.busca import filtro_prefixo, normalizar
+from app.lote import resultado_lote
+from app.numeracao import avancar_numeracao_contrato, reservar_numeros_contrato
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
 import os
-from docx import Document
 
 def gerar_numero_contrato():
-    ultimo = db.session.query(Contrato).order_by(Contrato.numero_contrato.desc()).first()
-    if not ultimo:
-        return "000001"
-    proximo = int(ultimo.numero_contrato) + 1
-    return f"{proximo:06d}"
+    return reservar_numeros_contrato(1)[0]
 
 def criar_contrato(data): 
     
-    numero = gerar_numero_contrato()
     try:
         vencimento = datetime.strptime(data["vencimento"], "%Y-%m-%d")
     except ValueError:
         raise ValueError("Data de vencimento inválida. Use o formato YYYY-MM-DD.")
+    numero = gerar_numero_contrato()
     contrato = Contrato(
         numero_contrato=numero,
         cliente_id=data["cliente_id"],
@@ -29,8 +34,85 @@ def criar_contrato(data):
     db.session.commit()
     return contrato
 
-def listar_contratos():
-    return Contrato.query.all()
+# ------------------- Criação em lote -------------------
+
+def _validar_contrato_lote(item):
+    """Colunas de um contrato do POST /contratos/lote; levanta ValueError se o item é inválido."""
+    if not isinstance(item, dict):
+        raise ValueError("Item deve ser um objeto.")
+    faltando = [c for c in ("cliente_id", "vencimento", "valor_total", "filial") if item.get(c) in (None, "")]
+    if faltando:
+        raise ValueError(f"Campos obrigatórios ausentes: {', '.join(faltando)}.")
+    try:
+        cliente_id = int(item["cliente_id"])
+    except (TypeError, ValueError):
+        raise ValueError(f"ID de cliente inválido: {item['cliente_id']}")
+    try:
+        vencimento = datetime.strptime(str(item["vencimento"]), "%Y-%m-%d")
+    except ValueError:
+        raise ValueError("Data de vencimento inválida. Use o formato YYYY-MM-DD.")
+    try:
+        valor_total = float(item["valor_total"])
+    except (TypeError, ValueError):
+        raise ValueError(f"Valor total inválido: {item['valor_total']}")
+    filial = str(item["filial"]).strip()
+    if not filial:
+        raise ValueError("Filial é obrigatória.")
+
+    return {"cliente_id": cliente_id, "vencimento": vencimento, "valor_total": valor_total,
+            "filial": filial, "filial_normalizada": normalizar(filial)}
+
+
+def criar_contratos_lote(itens):
+    """
+    Cria os contratos válidos de `itens` numa transação: uma consulta (IN) para
+    os clientes, uma reserva de números e um INSERT em lote. Devolve o resultado
+    de cada item, na ordem recebida (ver `app.lote`).
+    """
+    resultados = [None] * len(itens)
+    validos = {}
+    for indice, item in enumerate(itens):
+        try:
+            validos[indice] = _validar_contrato_lote(item)
+        except ValueError as e:
+            resultados[indice] = {"indice": indice, "status": "erro", "erro": str(e)}
+
+    clientes = chaves_existentes(Cliente.id, {contrato["cliente_id"] for contrato in validos.values()})
+    for indice, contrato in list(validos.items()):
+        if contrato["cliente_id"] not in clientes:
+            resultados[indice] = {"indice": indice, "status": "erro",
+                                  "erro": f"Cliente {contrato['cliente_id']} não encontrado."}
+            del validos[indice]
+
+    if validos:
+        try:
+            for (indice, contrato), numero in zip(validos.items(), reservar_numeros_contrato(len(validos))):
+                contrato["numero_contrato"] = numero
+                resultados[indice] = {"indice": indice, "status": "criado", "numero_contrato": numero}
+            db.session.execute(Contrato.__table__.insert(), list(validos.values()))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return resultado_lote(resultados)
+
+CAMPOS_CONTRATO = ["numero_contrato", "cliente_id", "vencimento", "valor_total", "filial"]
+
+
+def _consulta_contratos(after=None, limite=None, campos=None):
+    colunas = [getattr(Contrato, c) for c in (campos or CAMPOS_CONTRATO) if c != "numero_contrato"]
+    query = Contrato.query.options(load_only(Contrato.numero_contrato, *colunas))
+    return paginar(query, Contrato.numero_contrato, after, limite)
+
+
+def listar_contratos(after=None, limite=None, campos=None):
+    return [contrato_to_dict(c, campos) for c in _consulta_contratos(after, limite, campos)]
+
+
+def iterar_contratos(after=None, limite=None, campos=None, tamanho_bloco=1000):
+    """Como `listar_contratos`, mas lendo do banco em blocos (yield_per) para respostas em streaming."""
+    query = _consulta_contratos(after, limite, campos).yield_per(tamanho_bloco)
+    return (contrato_to_dict(c, campos) for c in query)
 
 def obter_contrato(numero_contrato):
     return Contrato.query.get(numero_contrato)
@@ -42,18 +124,27 @@ def atualizar_contrato(numero_contrato, data):
     for key, value in data.items():
         setattr(contrato, key, value)
     db.session.commit()
+    invalidar_ofertas(numero_contrato)
     return contrato
 
 def buscar_contratos_por_cliente(cliente_id):
     return Contrato.query.filter_by(cliente_id=cliente_id).all()
 
-def buscar_contratos_por_filial(filial: str):
+def buscar_contratos_por_filial(filial: str, exata=False):
+    """
+    Contratos da filial, comparando sem maiúsculas nem acentos ("sao paulo" acha
+    "São Paulo"). Por padrão é busca por prefixo ("loja" acha "Loja Centro" e
+    "Loja Norte"); com `exata`, só a filial com esse nome. As duas usam o índice.
+    """
+    filial = normalizar(filial)
     if not filial:
         raise ValueError("Filial não pode ser vazia.")
-    return Contrato.query.filter(Contrato.filial.ilike(f"%{filial}%")).all()
+    filtro = Contrato.filial_normalizada == filial if exata else filtro_prefixo(Contrato.filial_normalizada, filial)
+    return Contrato.query.filter(filtro).order_by(Contrato.filial_normalizada, Contrato.numero_contrato).all()
 
-def buscar_contratos_por_valor(valor_minimo=None, valor_maximo=None):
-    query = Contrato.query
+def buscar_contratos_por_valor(valor_minimo=None, valor_maximo=None, campos=None):
+    colunas = [getattr(Contrato, c) for c in (campos or CAMPOS_CONTRATO) if c != "numero_contrato"]
+    query = Contrato.query.options(load_only(Contrato.numero_contrato, *colunas))
 
     try:
         if valor_minimo is not None:
@@ -65,28 +156,31 @@ def buscar_contratos_por_valor(valor_minimo=None, valor_maximo=None):
     except ValueError:
         raise ValueError("Os valores mínimo e máximo devem ser numéricos.")
 
-    contratos = query.all()
-    return [contrato_to_dict(c) for c in contratos]
+    contratos = query.order_by(Contrato.valor_total, Contrato.numero_contrato).all()
+    return [contrato_to_dict(c, campos) for c in contratos]
 
 
 def buscar_contratos_por_vencimento(data_inicio=None, data_fim=None):
-    query = Contrato.query
-
+    """
+    Números dos contratos com vencimento no dia `data_inicio` ou, com `data_fim`,
+    entre as duas datas (inclusive). O filtro é uma faixa semiaberta
+    [início, fim + 1 dia) sobre a coluna, sem função em volta, então usa o
+    índice (vencimento, numero_contrato) e nem lê a tabela.
+    """
+    if not data_inicio:
+        raise ValueError("É necessário informar ao menos uma data de vencimento.")
     try:
-        if data_inicio and data_fim:
-            dt_inicio = datetime.strptime(data_inicio, "%Y-%m-%d")
-            dt_fim = datetime.strptime(data_fim, "%Y-%m-%d")
-            query = query.filter(Contrato.vencimento.between(dt_inicio, dt_fim))
-        elif data_inicio:
-            dt_inicio = datetime.strptime(data_inicio, "%Y-%m-%d")
-            query = query.filter(db.func.date(Contrato.vencimento) == dt_inicio.date())
-        else:
-            raise ValueError("É necessário informar ao menos uma data de vencimento.")
+        inicio = datetime.strptime(data_inicio, "%Y-%m-%d")
+        fim = datetime.strptime(data_fim, "%Y-%m-%d") if data_fim else inicio
     except ValueError:
         raise ValueError("Formato de data inválido. Use YYYY-MM-DD.")
 
-    contratos = query.all()
-    return [c.numero_contrato for c in contratos]
+    consulta = (
+        select(Contrato.numero_contrato)
+        .where(Contrato.vencimento >= inicio, Contrato.vencimento < fim + timedelta(days=1))
+        .order_by(Contrato.vencimento, Contrato.numero_contrato)
+    )
+    return db.session.execute(consulta).scalars().all()
 
 def deletar_contrato(numero_contrato):
     contrato = Contrato.query.get(numero_contrato)
@@ -94,6 +188,7 @@ def deletar_contrato(numero_contrato):
         return None
     db.session.delete(contrato)
     db.session.commit()
+    invalidar_ofertas(numero_contrato)
     return contrato
 
 
@@ -101,65 +196,103 @@ def resetar_contratos():
     try:
         db.session.query(Contrato).delete()
         db.session.commit()
+        invalidar_ofertas()
         return {"mensagem": "Todos os contratos foram excluídos com sucesso."}
     except Exception as e:
         db.session.rollback()
         return {"erro": f"Erro ao excluir contratos: {str(e)}"}
 
 
-def importar_contratos_docx(caminho_arquivo, app):
+# ------------------- Importação -------------------
+
+COLUNAS_IMPORTACAO = ["numero_contrato", "cliente_id", "vencimento", "valor_total", "filial"]
+
+
+def validar_linha_contrato(cells):
+    """
+    Regras de uma linha de contratos: número (até 6 caracteres), id do cliente,
+    vencimento (YYYY-MM-DD), valor total (aceita vírgula decimal) e filial.
+    Devolve o contrato como dict; levanta ValueError se a linha é inválida.
+    """
+    if len(cells) < 5:
+        raise ValueError("Linha inválida (faltando colunas).")
+
+    numero_contrato, cliente_id, vencimento, valor_total, filial = (c.strip() for c in cells[:5])
+    if not numero_contrato or len(numero_contrato) > 6:
+        raise ValueError(f"Número de contrato inválido: {numero_contrato}")
+    try:
+        cliente_id = int(cliente_id)
+    except ValueError:
+        raise ValueError(f"ID de cliente inválido: {cliente_id}")
+    try:
+        vencimento = ler_data(vencimento, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Data inválida: {vencimento}")
+    try:
+        valor_total = float(valor_total.replace(",", "."))
+    except ValueError:
+        raise ValueError(f"Valor total inválido: {valor_total}")
+    if not filial:
+        raise ValueError("Filial é obrigatória.")
+
+    return {"numero_contrato": numero_contrato, "cliente_id": cliente_id, "vencimento": vencimento,
+            "valor_total": valor_total, "filial": filial, "filial_normalizada": normalizar(filial)}
+
+
+def _gravar_bloco_contratos(bloco, relatorio):
+    contratos = {}
+    linhas = {}
+    for numero_linha, cells in bloco:
+        relatorio.processados += 1
+        try:
+            contrato = validar_linha_contrato(cells)
+        except ValueError as e:
+            relatorio.erro(numero_linha, str(e))
+            continue
+        contratos[contrato["numero_contrato"]] = contrato  # número repetido no arquivo: vale a última linha
+        linhas[contrato["numero_contrato"]] = numero_linha
+
+    clientes = chaves_existentes(Cliente.id, {contrato["cliente_id"] for contrato in contratos.values()})
+    for numero, contrato in list(contratos.items()):
+        if contrato["cliente_id"] not in clientes:
+            relatorio.erro(linhas[numero], f"Cliente {contrato['cliente_id']} não encontrado.")
+            del contratos[numero]
+    if not contratos:
+        return
+
+    existentes = chaves_existentes(Contrato.numero_contrato, contratos)
+    upsert(Contrato, list(contratos.values()), "numero_contrato",
+           ["cliente_id", "vencimento", "valor_total", "filial", "filial_normalizada"])
+    avancar_numeracao_contrato(contratos)
+    relatorio.inseridos += len(contratos) - len(existentes)
+    relatorio.atualizados += len(existentes)
+
+
+def importar_contratos(linhas, tamanho_lote=None, ao_progredir=None, processos=None, importacao=None, retomar=False):
+    """
+    Importa contratos de um iterável de (número da linha, células), em blocos de
+    IMPORTACAO_LOTE linhas com upsert pelo número do contrato e um commit por bloco.
+    Os blocos podem rodar em `processos` processos e, com `importacao`, deixam
+    checkpoint para `retomar` uma importação interrompida (ver `importar_em_blocos`).
+    """
+    relatorio = importar_em_blocos(_gravar_bloco_contratos, linhas, tamanho_lote, ao_progredir,
+                                   processos, importacao, retomar)
+    invalidar_ofertas()
+    current_app.logger.info(f"Importação de contratos concluída: {relatorio}")
+    return relatorio.to_dict()
+
+
+def importar_contratos_docx(caminho_arquivo, app, processos=None, retomar=False):
     with app.app_context():
-        doc = Document(caminho_arquivo)
-        contratos_importados = 0
-        contratos_atualizados = 0
-
-        for tabela in doc.tables:
-            for i, linha in enumerate(tabela.rows):
-                if i == 0:
-                    continue
-
-                numero_contrato = linha.cells[0].text.strip()
-                cliente_id = int(linha.cells[1].text.strip())
-                vencimento_str = linha.cells[2].text.strip()
-                valor_total = float(linha.cells[3].text.strip().replace(',', '.'))
-                filial = linha.cells[4].text.strip()
-
-                try:
-                    vencimento = datetime.strptime(vencimento_str, "%Y-%m-%d")
-                except ValueError:
-                    print(f"Data inválida na linha {i + 1}: {vencimento_str}")
-                    continue
-
-                contrato = Contrato.query.filter_by(numero_contrato=numero_contrato).first()
-
-                if contrato is not None:
-                    contrato.cliente_id = cliente_id
-                    contrato.vencimento = vencimento
-                    contrato.valor_total = valor_total
-                    contrato.filial = filial
-
-                    contratos_atualizados += 1
-                    print(f"Contrato {numero_contrato} atualizado.")
-                else:
-                    contrato = Contrato(
-                        numero_contrato=numero_contrato,
-                        cliente_id=cliente_id,
-                        vencimento=vencimento,
-                        valor_total=valor_total,
-                        filial=filial
-                    )
-                    db.session.add(contrato)
-                    contratos_importados += 1
-                    print(f"Contrato {numero_contrato} adicionado.")
+        return importar_contratos(linhas_docx(caminho_arquivo), processos=processos,
+                                  importacao=f"contratos:{checksum_arquivo(caminho_arquivo)}", retomar=retomar)
 
-        db.session.commit()
-        print(f"Importação concluída: {contratos_importados} contratos adicionados, {contratos_atualizados} contratos atualizados.")
-
-def contrato_to_dict(contrato):
-    return {
-        "numero_contrato": contrato.numero_contrato,
-        "cliente_id": contrato.cliente_id,
-        "vencimento": contrato.vencimento.strftime("%Y-%m-%d"),
-        "valor_total": contrato.valor_total,
-        "filial": contrato.filial
-    }
\ No newline at end of file
+def contrato_to_dict(contrato, campos=None):
+    valores = {
+        "numero_contrato": lambda: contrato.numero_contrato,
+        "cliente_id": lambda: contrato.cliente_id,
+        "vencimento": lambda: contrato.vencimento.strftime("%Y-%m-%d"),
+        "valor_total": lambda: contrato.valor_total,
+        "filial": lambda: contrato.filial
+    }
+    return {campo: valores[campo]() for campo in (campos or CAMPOS_CONTRATO)}
\ No newline at end of file
@@ -0,0 +1,278 @@
+from flask import current_app
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.orm import load_only
+from app.database import db
+from app.models.acordo import Acordo, Boleto
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato
+from app.models.envio_boleto import EnvioBoleto
+from app.controllers import acordo_controller
+from app.controllers.boleto_job_controller import filtrar_acordos
+from app.armazenamento import armazenamento_boletos
+from app.correio import PoolSMTP, falha_permanente, montar_mensagem_boleto
+import time
+import uuid
+
+STATUS_ATIVOS = ["pendente", "enviando"]
+STATUS_ENVIO = ["pendente", "enviando", "enviado", "erro"]
+
+
+# ------------------- API -------------------
+
+def enfileirar_envio(acordo_id):
+    """
+    Enfileira o envio por e-mail do boleto do acordo, gerando o PDF se ainda não
+    existir. Reaproveita um envio ainda ativo do mesmo boleto.
+    """
+    acordo = Acordo.query.get(acordo_id)
+    if not acordo:
+        return None
+
+    email = (
+        db.session.query(Cliente.email)
+        .join(Contrato, Contrato.cliente_id == Cliente.id)
+        .filter(Contrato.numero_contrato == acordo.contrato_id)
+        .scalar()
+    )
+    if not email:
+        raise ValueError("Cliente do acordo não tem e-mail cadastrado.")
+
+    boleto, _ = acordo_controller.gerar_boleto(acordo_id)
+    envio = EnvioBoleto.query.filter(
+        EnvioBoleto.boleto_id == boleto.id, EnvioBoleto.status.in_(STATUS_ATIVOS)
+    ).first()
+    if not envio:
+        envio = EnvioBoleto(boleto_id=boleto.id, destinatario=email)
+        db.session.add(envio)
+        db.session.commit()
+    return envio.to_dict()
+
+
+def obter_envio(envio_id):
+    envio = EnvioBoleto.query.get(envio_id)
+    return envio.to_dict() if envio else None
+
+
+# ------------------- Lotes -------------------
+
+def criar_lote_envios(vencimento_inicio=None, vencimento_fim=None, status=None, reenviar=False, tamanho_bloco=5000):
+    """
+    Enfileira o envio dos boletos já gerados dos acordos filtrados (mesmos filtros
+    de `criar_lote`). Ficam de fora boletos com envio ativo, clientes sem e-mail e,
+    a menos que `reenviar` seja verdadeiro, boletos já enviados. Sem nenhum
+    boleto a enfileirar, nenhum lote é criado (`lote_id` None).
+    """
+    consulta = (
+        select(Boleto.id, Cliente.email)
+        .join(Acordo, Acordo.id == Boleto.acordo_id)
+        .join(Contrato, Contrato.numero_contrato == Acordo.contrato_id)
+        .join(Cliente, Cliente.id == Contrato.cliente_id)
+        .where(Boleto.caminho.isnot(None), Cliente.email != "")
+        .order_by(Boleto.id)
+    )
+    consulta = filtrar_acordos(consulta, vencimento_inicio, vencimento_fim, status)
+    consulta = consulta.where(
+        ~Boleto.id.in_(select(EnvioBoleto.boleto_id).where(EnvioBoleto.status.in_(STATUS_ATIVOS)))
+    )
+    if not reenviar:
+        consulta = consulta.where(or_(Boleto.enviado.is_(False), Boleto.enviado.is_(None)))
+
+    linhas = db.session.execute(consulta).all()
+    if not linhas:
+        return {"lote_id": None, "total": 0}
+
+    lote_id = uuid.uuid4().hex
+    for inicio in range(0, len(linhas), tamanho_bloco):
+        db.session.execute(insert(EnvioBoleto), [
+            {"boleto_id": boleto_id, "destinatario": email, "lote_id": lote_id}
+            for boleto_id, email in linhas[inicio:inicio + tamanho_bloco]
+        ])
+    db.session.commit()
+
+    return {"lote_id": lote_id, "total": len(linhas)}
+
+
+def progresso_lote_envios(lote_id):
+    contagem = dict(
+        db.session.query(EnvioBoleto.status, func.count())
+        .filter(EnvioBoleto.lote_id == lote_id)
+        .group_by(EnvioBoleto.status)
+        .all()
+    )
+    total = sum(contagem.values())
+    if not total:
+        return None
+
+    progresso = {"lote_id": lote_id, "total": total}
+    progresso.update({status: contagem.get(status, 0) for status in STATUS_ENVIO})
+    progresso["percentual"] = round(100 * (progresso["enviado"] + progresso["erro"]) / total, 2)
+    return progresso
+
+
+# ------------------- Worker -------------------
+
+def _recuperar_envios_travados():
+    """
+    Devolve para a fila envios 'enviando' há mais que MAIL_ENVIO_TIMEOUT (worker
+    que morreu no meio); os que já usaram MAIL_ENVIO_MAX_TENTATIVAS viram 'erro'.
+    """
+    agora = datetime.utcnow()
+    travados = EnvioBoleto.query.filter(
+        EnvioBoleto.status == "enviando",
+        EnvioBoleto.iniciado_em < agora - timedelta(seconds=current_app.config["MAIL_ENVIO_TIMEOUT"])
+    )
+    max_tentativas = current_app.config["MAIL_ENVIO_MAX_TENTATIVAS"]
+    travados.filter(EnvioBoleto.tentativas >= max_tentativas).update(
+        {"status": "erro", "erro": "Tempo esgotado: o worker parou no meio em todas as tentativas."},
+        synchronize_session=False
+    )
+    travados.filter(EnvioBoleto.tentativas < max_tentativas).update({"status": "pendente"}, synchronize_session=False)
+    db.session.commit()
+
+
+def _reservar_envios(quantidade):
+    """Mesma reserva de `_reservar_jobs`, só com envios cujo backoff já passou."""
+    agora = datetime.utcnow()
+    ids = (
+        select(EnvioBoleto.id)
+        .where(EnvioBoleto.status == "pendente", EnvioBoleto.proxima_tentativa <= agora)
+        .order_by(EnvioBoleto.proxima_tentativa)
+        .limit(quantidade)
+    )
+    ids = db.session.execute(ids).scalars().all()
+    if not ids:
+        return []
+
+    reserva = uuid.uuid4().hex
+    EnvioBoleto.query.filter(EnvioBoleto.id.in_(ids), EnvioBoleto.status == "pendente").update(
+        {"status": "enviando", "reserva": reserva, "iniciado_em": agora,
+         "tentativas": EnvioBoleto.tentativas + 1},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return EnvioBoleto.query.filter_by(reserva=reserva).all()
+
+
+def _montar_mensagens(envios):
+    """{envio_id: mensagem ou erro}. Um PDF compartilhado por vários boletos é lido uma vez só."""
+    boletos = {
+        boleto.id: boleto
+        for boleto in Boleto.query.options(load_only(Boleto.id, Boleto.nome_arquivo, Boleto.caminho))
+        .filter(Boleto.id.in_({envio.boleto_id for envio in envios}))
+    }
+    remetente = current_app.config["MAIL_DEFAULT_SENDER"] or current_app.config["MAIL_USERNAME"]
+    armazenamento = armazenamento_boletos()
+
+    pdfs = {}
+    mensagens = {}
+    for envio in envios:
+        boleto = boletos.get(envio.boleto_id)
+        if boleto and boleto.caminho and boleto.caminho not in pdfs:
+            pdfs[boleto.caminho] = armazenamento.ler(boleto.caminho)
+        pdf = pdfs.get(boleto.caminho) if boleto and boleto.caminho else None
+        if pdf is None:
+            mensagens[envio.id] = ValueError("PDF do boleto não encontrado.")
+        else:
+            mensagens[envio.id] = montar_mensagem_boleto(remetente, envio.destinatario, boleto.nome_arquivo, pdf)
+    return mensagens
+
+
+def _finalizar_envios(resultados, reservas):
+    """
+    Grava o resultado de um bloco de envios ({envio_id: None ou exceção}) com um
+    commit só, marcando `Boleto.enviado` dos que foram. Falhas temporárias voltam
+    para a fila com espera de MAIL_ENVIO_BACKOFF * 2^(tentativas - 1). Envios que
+    já não são da reserva deste worker (`reservas`: {envio_id: reserva}; tempo
+    esgotado e pegos por outro worker) ficam como estão.
+    """
+    agora = datetime.utcnow()
+    max_tentativas = current_app.config["MAIL_ENVIO_MAX_TENTATIVAS"]
+    backoff = current_app.config["MAIL_ENVIO_BACKOFF"]
+
+    enviados = []
+    for envio in EnvioBoleto.query.filter(EnvioBoleto.id.in_(list(resultados))).with_for_update():
+        if envio.reserva != reservas[envio.id]:
+            continue
+        erro = resultados[envio.id]
+        if erro is None:
+            envio.status = "enviado"
+            envio.enviado_em = agora
+            envio.erro = None
+            enviados.append(envio.boleto_id)
+            continue
+
+        envio.erro = str(erro) or erro.__class__.__name__
+        if isinstance(erro, ValueError) or falha_permanente(erro) or envio.tentativas >= max_tentativas:
+            envio.status = "erro"
+        else:
+            envio.status = "pendente"
+            envio.proxima_tentativa = agora + timedelta(seconds=backoff * 2 ** (envio.tentativas - 1))
+
+    if enviados:
+        Boleto.query.filter(Boleto.id.in_(enviados)).update({"enviado": True}, synchronize_session=False)
+    db.session.commit()
+    return len(enviados)
+
+
+def executar_envios(conexoes=None, intervalo=None, uma_vez=False, ao_progredir=None):
+    """
+    Consome a fila de `envios_boleto`: cada thread manda mensagens por uma conexão
+    do `PoolSMTP` (MAIL_ENVIO_CONEXOES), enquanto esta thread reserva os próximos
+    blocos e grava os resultados. Com `uma_vez=True`, termina quando não houver
+    mais envios pendentes, esperando o backoff das falhas temporárias.
+    `ao_progredir(enviados, erros)` é chamado a cada bloco gravado.
+    """
+    config = current_app.config
+    conexoes = conexoes or config["MAIL_ENVIO_CONEXOES"]
+    intervalo = intervalo or config["MAIL_ENVIO_INTERVALO"]
+    tamanho_bloco = config["MAIL_ENVIO_BLOCO"]
+    pool = PoolSMTP.da_config(config, conexoes)
+    current_app.logger.info(f"Worker de e-mails iniciado com {conexoes} conexões SMTP.")
+
+    enviados = erros = 0
+    resultados = {}
+    reservas = {}
+    em_andamento = {}
+    try:
+        with ThreadPoolExecutor(max_workers=conexoes) as executor:
+            while True:
+                _recuperar_envios_travados()
+
+                # Até dois blocos em voo: as conexões não esperam a gravação do bloco anterior.
+                while len(em_andamento) < tamanho_bloco:
+                    envios = _reservar_envios(tamanho_bloco)
+                    if not envios:
+                        break
+                    reservas.update((envio.id, envio.reserva) for envio in envios)
+                    for envio_id, mensagem in _montar_mensagens(envios).items():
+                        if isinstance(mensagem, Exception):
+                            resultados[envio_id] = mensagem
+                        else:
+                            em_andamento[executor.submit(pool.enviar, mensagem)] = envio_id
+
+                if em_andamento:
+                    prontos, _ = wait(em_andamento, timeout=intervalo, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        resultados[em_andamento.pop(futuro)] = futuro.exception()
+
+                if resultados and (len(resultados) >= tamanho_bloco or not em_andamento):
+                    ok = _finalizar_envios(resultados, reservas)
+                    enviados += ok
+                    erros += len(resultados) - ok
+                    for envio_id in resultados:
+                        del reservas[envio_id]
+                    resultados = {}
+                    if ao_progredir:
+                        ao_progredir(enviados, erros)
+
+                if not em_andamento and not resultados:
+                    if uma_vez and not EnvioBoleto.query.filter_by(status="pendente").first():
+                        break
+                    time.sleep(intervalo)
+    finally:
+        pool.fechar()
+
+    current_app.logger.info(f"Worker de e-mails: {pool.conexoes_abertas} conexões SMTP abertas no total.")
+    return {"enviados": enviados, "erros": erros}
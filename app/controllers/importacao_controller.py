@@ -0,0 +1,270 @@
+from flask import current_app
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from app.database import db
+from app.models.importacao import ImportacaoJob
+from app.controllers import cliente_controller, contrato_controller, usuario_controller
+from app.importacao import FORMATOS, checksum_arquivo, linhas_arquivo
+import json
+import os
+import shutil
+import time
+import uuid
+
+# entidade -> (importador, colunas esperadas no arquivo, na ordem das planilhas .docx)
+IMPORTADORES = {
+    "clientes": (cliente_controller.importar_clientes, cliente_controller.COLUNAS_IMPORTACAO),
+    "contratos": (contrato_controller.importar_contratos, contrato_controller.COLUNAS_IMPORTACAO),
+    "usuarios": (usuario_controller.importar_usuarios, usuario_controller.COLUNAS_IMPORTACAO),
+}
+
+
+def formato_do_arquivo(nome_arquivo, formato=None):
+    """Formato informado ou, na falta dele, a extensão do arquivo (.csv, .parquet/.pq, .docx)."""
+    formato = (formato or os.path.splitext(nome_arquivo or "")[1].lstrip(".")).lower()
+    if formato == "pq":
+        formato = "parquet"
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato deve ser um de {FORMATOS}.")
+    return formato
+
+
+def importar_arquivo(entidade, arquivo, formato, tamanho_lote=None, separador=",", ao_progredir=None,
+                     processos=None, retomar=False, importacao=None):
+    """
+    Importa um arquivo (caminho ou arquivo aberto) de clientes, contratos ou
+    usuários com as mesmas regras das planilhas .docx. CSV e Parquet são lidos
+    em pedaços de IMPORTACAO_LOTE linhas, gravados assim que validados, em até
+    `processos` processos (padrão IMPORTACAO_PROCESSOS; para usuários, os
+    processos que geram os hashes das senhas, padrão SENHA_HASH_PROCESSOS).
+
+    Cada bloco gravado deixa um checkpoint com a chave "<entidade>:<sha256 do
+    arquivo>"; com `retomar=True` e o mesmo arquivo e tamanho de bloco, os
+    blocos já gravados de uma importação interrompida são pulados. `importacao`
+    troca essa chave (os jobs usam a deles).
+    """
+    if entidade not in IMPORTADORES:
+        raise ValueError(f"Entidade deve ser uma de {list(IMPORTADORES)}.")
+
+    importar, colunas = IMPORTADORES[entidade]
+    tamanho_lote = tamanho_lote or current_app.config["IMPORTACAO_LOTE"]
+    importacao = importacao or f"{entidade}:{checksum_arquivo(arquivo)}"
+    linhas = linhas_arquivo(arquivo, formato, colunas, tamanho_lote, separador)
+    return importar(linhas, tamanho_lote, ao_progredir, processos, importacao, retomar)
+
+
+# ------------------- Jobs -------------------
+
+STATUS_ATIVOS = ["pendente", "processando"]
+
+
+class FilaDeImportacaoCheia(Exception):
+    """Já há IMPORTACAO_JOBS_MAX_FILA importações pendentes ou rodando."""
+
+
+def _job_da_chave(chave):
+    return ImportacaoJob.query.filter_by(chave=chave).first() if chave else None
+
+
+def criar_job_importacao(entidade, arquivo, formato, nome_arquivo=None, separador=",", tamanho_lote=None,
+                         chave=None, depois_de=None):
+    """
+    Enfileira a importação de um arquivo para o worker (worker_importacoes.py).
+    `arquivo` é um caminho no servidor (usado direto) ou um upload aberto, salvo
+    em IMPORTACAO_PASTA e apagado quando o job termina.
+
+    Com `chave` (idempotência), pedir de novo devolve o job já criado com ela
+    (na fila, rodando ou concluído), em vez de importar outra vez. Se esse job
+    terminou em erro, ele fica no histórico sem a chave e um job novo é criado
+    no lugar. Devolve (job, criado).
+    """
+    if entidade not in IMPORTADORES:
+        raise ValueError(f"Entidade deve ser uma de {list(IMPORTADORES)}.")
+
+    anterior = _job_da_chave(chave)
+    if anterior and anterior.status != "erro":
+        return anterior.to_dict(), False
+
+    ativos = ImportacaoJob.query.filter(ImportacaoJob.status.in_(STATUS_ATIVOS)).count()
+    if ativos >= current_app.config["IMPORTACAO_JOBS_MAX_FILA"]:
+        raise FilaDeImportacaoCheia(f"Já há {ativos} importações na fila. Tente novamente mais tarde.")
+
+    job = ImportacaoJob(id=uuid.uuid4().hex, chave=chave, entidade=entidade, formato=formato,
+                        nome_arquivo=nome_arquivo, separador=separador, tamanho_lote=tamanho_lote,
+                        depois_de=depois_de)
+    if isinstance(arquivo, str):
+        job.arquivo, job.arquivo_temporario = arquivo, False
+    else:
+        pasta = current_app.config["IMPORTACAO_PASTA"]
+        os.makedirs(pasta, exist_ok=True)
+        job.arquivo = os.path.join(pasta, f"{job.id}.{formato}")
+        with open(job.arquivo, "wb") as destino:
+            shutil.copyfileobj(arquivo, destino, 1 << 20)
+
+    try:
+        if anterior:
+            anterior.chave = None
+            db.session.flush()
+        db.session.add(job)
+        db.session.commit()
+    except IntegrityError:
+        # Outra requisição (talvez em outro worker do gunicorn) criou a mesma chave agora há pouco.
+        db.session.rollback()
+        if job.arquivo_temporario:
+            os.remove(job.arquivo)
+        return _job_da_chave(chave).to_dict(), False
+    return job.to_dict(), True
+
+
+def obter_job_importacao(job_id):
+    job = ImportacaoJob.query.get(job_id)
+    return job.to_dict() if job else None
+
+
+# ------------------- Worker -------------------
+
+def _recuperar_importacoes_travadas():
+    """
+    Devolve para a fila importações sem progresso há mais que
+    IMPORTACAO_JOB_TIMEOUT (worker que morreu); as que já usaram
+    IMPORTACAO_JOB_MAX_TENTATIVAS viram 'erro' e o upload temporário é apagado.
+    """
+    agora = datetime.utcnow()
+    travados = ImportacaoJob.query.filter(
+        ImportacaoJob.status == "processando",
+        ImportacaoJob.atualizado_em < agora - timedelta(seconds=current_app.config["IMPORTACAO_JOB_TIMEOUT"])
+    )
+    max_tentativas = current_app.config["IMPORTACAO_JOB_MAX_TENTATIVAS"]
+    desistidos = travados.filter(ImportacaoJob.tentativas >= max_tentativas).all()
+    for job in desistidos:
+        job.status = "erro"
+        job.erro = "Tempo esgotado: o worker parou no meio em todas as tentativas."
+        job.finalizado_em = agora
+    travados.filter(ImportacaoJob.tentativas < max_tentativas).update(
+        {"status": "pendente"}, synchronize_session=False
+    )
+    db.session.commit()
+    for job in desistidos:
+        if job.arquivo_temporario and os.path.exists(job.arquivo):
+            os.remove(job.arquivo)
+
+
+def _reservar_importacao():
+    """
+    Pega a importação pendente mais antiga, se a que ela espera (`depois_de`) já
+    terminou e se há menos de IMPORTACAO_JOBS_SIMULTANEOS rodando no total. O
+    UPDATE só vale enquanto as duas condições são verdadeiras, então dois
+    workers nunca pegam o mesmo job. Para o limite valer entre workers, as
+    reservas são feitas uma de cada vez: no PostgreSQL, com um advisory lock
+    da transação (em READ COMMITTED, duas reservas de jobs diferentes veriam
+    a mesma contagem); no SQLite, o próprio UPDATE já segura o banco.
+    """
+    if db.session.get_bind().dialect.name == "postgresql":
+        db.session.execute(text("SELECT pg_advisory_xact_lock(hashtext('importacao_jobs'))"))
+
+    terminados = select(ImportacaoJob.id).where(ImportacaoJob.status.in_(["concluido", "erro"]))
+    job_id = db.session.execute(
+        select(ImportacaoJob.id)
+        .where(ImportacaoJob.status == "pendente")
+        .where(or_(ImportacaoJob.depois_de.is_(None), ImportacaoJob.depois_de.in_(terminados)))
+        .order_by(ImportacaoJob.criado_em)
+        .limit(1)
+    ).scalar()
+    if not job_id:
+        db.session.commit()
+        return None
+
+    rodando = (
+        select(func.count()).select_from(ImportacaoJob)
+        .where(ImportacaoJob.status == "processando")
+        .scalar_subquery()
+    )
+    reserva = uuid.uuid4().hex
+    agora = datetime.utcnow()
+    ImportacaoJob.query.filter(
+        ImportacaoJob.id == job_id, ImportacaoJob.status == "pendente",
+        rodando < current_app.config["IMPORTACAO_JOBS_SIMULTANEOS"]
+    ).update(
+        {"status": "processando", "reserva": reserva, "iniciado_em": agora, "atualizado_em": agora,
+         "tentativas": ImportacaoJob.tentativas + 1},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return ImportacaoJob.query.filter_by(reserva=reserva).first()
+
+
+def _gravar_progresso(job_id, relatorio, **campos):
+    ImportacaoJob.query.filter_by(id=job_id).update({
+        "processados": relatorio["processados"], "inseridos": relatorio["inseridos"],
+        "atualizados": relatorio["atualizados"], "ignorados": relatorio["ignorados"],
+        "invalidos": relatorio["invalidos"], "linhas_por_segundo": relatorio["linhas_por_segundo"],
+        "atualizado_em": datetime.utcnow(), **campos
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+def executar_importacao(job):
+    """
+    Roda um job reservado com `importar_arquivo`, gravando o progresso a cada
+    bloco. Os checkpoints usam o id do job, então uma nova tentativa (worker
+    que caiu, erro de banco) continua dos blocos que faltam.
+    """
+    job_id = job.id
+
+    def ao_progredir(relatorio):
+        _gravar_progresso(job_id, relatorio.to_dict())
+
+    try:
+        relatorio = importar_arquivo(job.entidade, job.arquivo, job.formato, job.tamanho_lote, job.separador,
+                                     ao_progredir=ao_progredir, retomar=job.tentativas > 1,
+                                     importacao=f"job:{job_id}")
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Erro na importação {job_id}: {e}")
+        job = ImportacaoJob.query.get(job_id)
+        job.erro = str(e) or e.__class__.__name__
+        job.status = "erro" if job.tentativas >= current_app.config["IMPORTACAO_JOB_MAX_TENTATIVAS"] else "pendente"
+        if job.status == "erro":
+            job.finalizado_em = datetime.utcnow()
+        db.session.commit()
+        if job.status == "erro" and job.arquivo_temporario and os.path.exists(job.arquivo):
+            os.remove(job.arquivo)
+        return job.to_dict()
+
+    _gravar_progresso(job_id, relatorio, status="concluido", erro=None, erros=json.dumps(relatorio["erros"]),
+                      finalizado_em=datetime.utcnow())
+    job = ImportacaoJob.query.get(job_id)
+    if job.arquivo_temporario and os.path.exists(job.arquivo):
+        os.remove(job.arquivo)
+    return job.to_dict()
+
+
+def executar_worker_importacoes(intervalo=None, uma_vez=False, ao_concluir=None):
+    """
+    Consome a fila de `importacao_jobs`, um job por vez neste processo (o
+    paralelismo dentro de cada importação vem de IMPORTACAO_PROCESSOS). Com
+    `uma_vez=True`, termina quando não há mais nada que possa rodar agora.
+    """
+    intervalo = intervalo or current_app.config["IMPORTACAO_WORKER_INTERVALO"]
+    current_app.logger.info("Worker de importações iniciado.")
+
+    concluidos = erros = 0
+    while True:
+        _recuperar_importacoes_travadas()
+        job = _reservar_importacao()
+        if not job:
+            if uma_vez:
+                break
+            time.sleep(intervalo)
+            continue
+
+        resultado = executar_importacao(job)
+        if resultado["status"] == "concluido":
+            concluidos += 1
+        elif resultado["status"] == "erro":
+            erros += 1
+        if ao_concluir:
+            ao_concluir(resultado)
+
+    return {"concluidos": concluidos, "erros": erros}
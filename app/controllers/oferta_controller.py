@@ -0,0 +1,80 @@
+from flask import current_app
+from datetime import datetime
+from sqlalchemy import select
+from app.cache import CacheLRU
+from app.database import db
+from app.models.contrato import Contrato
+from calculadora import calcular_lote, linha_do_lote
+
+QUANTIDADES_PARCELAS = [1] + list(range(2, 25))
+
+_cache_ofertas = None
+
+
+def _cache():
+    global _cache_ofertas
+    if _cache_ofertas is None:
+        _cache_ofertas = CacheLRU(
+            tamanho_maximo=current_app.config.get("OFERTAS_CACHE_TAMANHO", 10000),
+            ttl=current_app.config.get("OFERTAS_CACHE_TTL", 86400),
+        )
+    return _cache_ofertas
+
+
+def _calcular_matriz(contrato, data_referencia):
+    dias_em_atraso = max((data_referencia - contrato.vencimento.date()).days, 0)
+    n = len(QUANTIDADES_PARCELAS)
+
+    lote = calcular_lote({
+        "valor_original": [contrato.valor_total] * n,
+        "dias_em_atraso": [dias_em_atraso] * n,
+        "tipo_pagamento": ["avista" if q == 1 else "parcelado" for q in QUANTIDADES_PARCELAS],
+        "quantidade_parcelas": [0 if q == 1 else q for q in QUANTIDADES_PARCELAS],
+    })
+
+    return {
+        "numero_contrato": contrato.numero_contrato,
+        "data_referencia": data_referencia.strftime("%Y-%m-%d"),
+        "dias_em_atraso": dias_em_atraso,
+        "valor_original": round(contrato.valor_total, 2),
+        "ofertas": [linha_do_lote(lote, i) for i in range(n)],
+    }
+
+
+def matriz_ofertas(numero_contrato):
+    """
+    Retorna todas as ofertas do contrato (à vista e 2x a 24x, entrada padrão).
+    A matriz fica no cache LRU/TTL com chave (numero_contrato, data, valor_total,
+    vencimento): muda uma vez por dia, quando os dias em atraso mudam, e assim
+    que o contrato muda, mesmo que a alteração tenha vindo de outro processo
+    (outro worker do gunicorn, worker_importacoes.py, importar.py). Cada
+    chamada lê só essas colunas do contrato, pela chave primária.
+    """
+    contrato = db.session.execute(
+        select(Contrato.numero_contrato, Contrato.valor_total, Contrato.vencimento)
+        .where(Contrato.numero_contrato == numero_contrato)
+    ).first()
+    if not contrato:
+        return None
+
+    data_referencia = datetime.utcnow().date()
+    chave = (numero_contrato, data_referencia, contrato.valor_total, contrato.vencimento)
+
+    matriz = _cache().obter(chave)
+    if matriz is None:
+        matriz = _calcular_matriz(contrato, data_referencia)
+        _cache().definir(chave, matriz)
+    return matriz
+
+
+def invalidar_ofertas(numero_contrato=None):
+    """
+    Descarta as matrizes de um contrato (ou de todos, sem argumento) deste
+    processo. Só libera memória: a chave já muda quando o contrato muda.
+    """
+    if _cache_ofertas is None:
+        return
+    if numero_contrato is None:
+        _cache_ofertas.limpar()
+    else:
+        _cache_ofertas.remover_se(lambda chave: chave[0] == numero_contrato)
@@ -1,10 +1,15 @@
+from flask import current_app
 from app.database import db
-from app.models.usuario import Usuario
+from app.models.usuario import Usuario, gerar_hash_senha
 from flask_jwt_extended import create_access_token
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
+from functools import partial
 import os
-from docx import Document
-from werkzeug.security import generate_password_hash
+from app.importacao import chaves_existentes, importar_em_blocos, linhas_docx
+from app.paginacao import paginar
+from sqlalchemy import insert
+from sqlalchemy.orm import load_only
 
 def criar_usuario(data):
     usuario = Usuario(
@@ -17,9 +22,14 @@ def criar_usuario(data):
     db.session.commit()
     return usuario_to_dict(usuario)
 
-def listar_usuarios():
-    usuarios = Usuario.query.all()
-    return [usuario_to_dict(u) for u in usuarios]
+CAMPOS_USUARIO = ["id", "nome", "login", "cargo"]
+
+
+def listar_usuarios(after=None, limite=None, campos=None):
+    colunas = [getattr(Usuario, c) for c in (campos or CAMPOS_USUARIO) if c != "id"]
+    query = Usuario.query.options(load_only(Usuario.id, *colunas))
+    query = paginar(query, Usuario.id, after, limite, int)
+    return [usuario_to_dict(u, campos) for u in query]
 
 def obter_usuario(id):
     usuario = Usuario.query.get(id)
@@ -86,58 +96,85 @@ def login_usuario(data):
         "usuario": usuario_to_dict(usuario)
     }, 200
 
-def usuario_to_dict(usuario):
-        return {
-            "id": usuario.id,
-            "nome": usuario.nome,
-            "login": usuario.login,
-            "cargo": usuario.cargo
-        }
+def usuario_to_dict(usuario, campos=None):
+        return {campo: getattr(usuario, campo) for campo in (campos or CAMPOS_USUARIO)}
 
 
-def importar_usuarios_docx(caminho_arquivo, app):
-    with app.app_context():
-        doc = Document(caminho_arquivo)
-        usuarios_importados = 0
-        erro_ocorrido = False
-
-        for tabela in doc.tables:
-            for i, linha in enumerate(tabela.rows):
-                if i == 0:
-                    continue
-                
-                try:
-                    nome = linha.cells[0].text.strip()
-                    login = linha.cells[1].text.strip()
-                    senha = linha.cells[2].text.strip()
-                    cargo = linha.cells[3].text.strip()
-
-                    usuario_existente = Usuario.query.filter_by(login=login).first()
-                    if usuario_existente:
-                        print(f"Login duplicado encontrado para {login}. Usuário não será inserido.")
-                        continue
-
-                    usuario = Usuario(
-                        nome=nome,
-                        login=login,
-                        cargo=cargo
-                    )
-                    usuario.set_senha(senha)
-
-                    db.session.add(usuario)
-                    usuarios_importados += 1
-                except Exception as e:
-                    erro_ocorrido = True
-                    print(f"Erro ao processar a linha {i + 1}: {e}")
+# ------------------- Importação -------------------
+
+COLUNAS_IMPORTACAO = ["nome", "login", "senha", "cargo"]
+
 
+def validar_linha_usuario(cells):
+    """Regras de uma linha de usuários: nome, login, senha e cargo, todos obrigatórios."""
+    if len(cells) < 4:
+        raise ValueError("Linha inválida (faltando colunas).")
+
+    nome, login, senha, cargo = (c.strip() for c in cells[:4])
+    if not nome or not login or not senha or not cargo:
+        raise ValueError("Nome, login, senha e cargo são obrigatórios.")
+    return {"nome": nome, "login": login, "senha": senha, "cargo": cargo}
+
+
+def _hashes_em_serie(senhas):
+    return [gerar_hash_senha(senha) for senha in senhas]
+
+
+def _gravar_bloco_usuarios(bloco, relatorio, hashear=_hashes_em_serie):
+    usuarios = {}
+    for numero_linha, cells in bloco:
+        relatorio.processados += 1
         try:
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            print(f"Erro ao realizar commit: {e}")
-            erro_ocorrido = True
-
-        if erro_ocorrido:
-            print(f"Importação concluída com {usuarios_importados} usuários, mas houve erros durante o processo.")
-        else:
-            print(f"Importação concluída: {usuarios_importados} usuários adicionados.")
+            usuario = validar_linha_usuario(cells)
+        except ValueError as e:
+            relatorio.erro(numero_linha, str(e))
+            continue
+        if usuario["login"] in usuarios:
+            relatorio.ignorados += 1  # login repetido no arquivo: vale a primeira linha
+            continue
+        usuarios[usuario["login"]] = usuario
+
+    # Login que já existe não é sobrescrito, como na importação linha a linha.
+    existentes = chaves_existentes(Usuario.login, usuarios)
+    novos = [usuario for login, usuario in usuarios.items() if login not in existentes]
+    relatorio.ignorados += len(existentes)
+    if not novos:
+        return
+
+    for usuario, senha in zip(novos, hashear([usuario["senha"] for usuario in novos])):
+        usuario["senha"] = senha
+    db.session.execute(insert(Usuario), novos)
+    relatorio.inseridos += len(novos)
+
+
+def importar_usuarios(linhas, tamanho_lote=None, ao_progredir=None, processos=None, importacao=None, retomar=False):
+    """
+    Importa usuários de um iterável de (número da linha, células), em blocos: uma
+    consulta dos logins já cadastrados, um INSERT em lote e um commit por bloco.
+
+    O custo está no hash das senhas (lento de propósito), então aqui `processos`
+    (padrão SENHA_HASH_PROCESSOS) é o tamanho do pool que gera os hashes de cada
+    bloco em paralelo, com o método e custo de SENHA_HASH_METODO.
+    """
+    processos = processos or current_app.config["SENHA_HASH_PROCESSOS"] or os.cpu_count() or 1
+    if processos <= 1:
+        relatorio = importar_em_blocos(_gravar_bloco_usuarios, linhas, tamanho_lote, ao_progredir,
+                                       1, importacao, retomar)
+    else:
+        # O processo do pool não tem app: o método e o salt vão junto da função.
+        gerar = partial(gerar_hash_senha, metodo=current_app.config["SENHA_HASH_METODO"],
+                        tamanho_salt=current_app.config["SENHA_HASH_SALT"])
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            def hashear(senhas):
+                return list(executor.map(gerar, senhas, chunksize=max(len(senhas) // (processos * 4), 1)))
+
+            relatorio = importar_em_blocos(partial(_gravar_bloco_usuarios, hashear=hashear), linhas,
+                                           tamanho_lote, ao_progredir, 1, importacao, retomar)
+
+    current_app.logger.info(f"Importação de usuários concluída: {relatorio}")
+    return relatorio.to_dict()
+
+
+def importar_usuarios_docx(caminho_arquivo, app):
+    with app.app_context():
+        return importar_usuarios(linhas_docx(caminho_arquivo))
@@ -0,0 +1,138 @@
+"""
+Envio de e-mails por SMTP com conexões reaproveitadas.
+
+Abrir a conexão (TLS) e fazer login custa bem mais que mandar uma mensagem,
+então `PoolSMTP` mantém até `tamanho` conexões já autenticadas e manda as
+mensagens uma atrás da outra em cada uma. Uma conexão é trocada depois de
+`mensagens_por_conexao` envios (limite comum dos provedores) ou quando o
+servidor a derruba.
+"""
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.mime.application import MIMEApplication
+import queue
+import smtplib
+import threading
+
+ASSUNTO_BOLETO = "Boleto do seu acordo - CobAle"
+CORPO_BOLETO = "Olá, segue em anexo o boleto referente ao seu acordo."
+
+
+def montar_mensagem_boleto(remetente, destinatario, nome_arquivo, pdf):
+    msg = MIMEMultipart()
+    msg['From'] = remetente
+    msg['To'] = destinatario
+    msg['Subject'] = ASSUNTO_BOLETO
+    msg.attach(MIMEText(CORPO_BOLETO, 'plain'))
+
+    attach = MIMEApplication(pdf, _subtype="pdf")
+    attach.add_header('Content-Disposition', 'attachment', filename=nome_arquivo)
+    msg.attach(attach)
+    return msg
+
+
+def falha_permanente(erro):
+    """
+    Erros que não adianta tentar de novo: destinatário/remetente recusado ou
+    qualquer resposta 5xx do servidor. Falha de login fica de fora: costuma ser
+    configuração, e o envio deve continuar na fila até ela ser corrigida.
+    """
+    if isinstance(erro, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(erro, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(erro, smtplib.SMTPResponseException) and 500 <= erro.smtp_code < 600
+
+
+class PoolSMTP:
+    """Conexões SMTP autenticadas, compartilhadas entre as threads de envio."""
+
+    def __init__(self, servidor, porta, usuario=None, senha=None, ssl=True, starttls=False,
+                 tamanho=4, mensagens_por_conexao=100, timeout=30):
+        self.servidor = servidor
+        self.porta = porta
+        self.usuario = usuario
+        self.senha = senha
+        self.ssl = ssl
+        self.starttls = starttls
+        self.mensagens_por_conexao = mensagens_por_conexao
+        self.timeout = timeout
+        self.livres = queue.LifoQueue()
+        self.vagas = threading.Semaphore(tamanho)
+        self.conexoes_abertas = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def da_config(cls, config, tamanho=None):
+        return cls(
+            config["MAIL_SERVER"], config["MAIL_PORT"],
+            usuario=config["MAIL_USERNAME"], senha=config["MAIL_PASSWORD"],
+            ssl=config["MAIL_USE_SSL"], starttls=config["MAIL_USE_TLS"],
+            tamanho=tamanho or config["MAIL_ENVIO_CONEXOES"],
+            mensagens_por_conexao=config["MAIL_ENVIO_MENSAGENS_POR_CONEXAO"],
+        )
+
+    def _conectar(self):
+        if self.ssl:
+            smtp = smtplib.SMTP_SSL(self.servidor, self.porta, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.servidor, self.porta, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls()
+        if self.usuario:
+            smtp.login(self.usuario, self.senha)
+        with self._lock:
+            self.conexoes_abertas += 1
+        return [smtp, 0]  # conexão e quantas mensagens já mandou
+
+    @staticmethod
+    def _fechar(conexao):
+        try:
+            conexao[0].quit()
+        except (smtplib.SMTPException, OSError):
+            conexao[0].close()
+
+    def enviar(self, mensagem):
+        """
+        Manda uma mensagem por uma conexão livre do pool (ou abre uma, até o
+        limite). Se uma conexão reaproveitada tiver caído, abre outra e tenta de
+        novo uma vez; os demais erros sobem para quem chamou.
+        """
+        with self.vagas:
+            try:
+                conexao = self.livres.get_nowait()
+            except queue.Empty:
+                conexao = self._conectar()
+
+            try:
+                try:
+                    conexao[0].send_message(mensagem)
+                except smtplib.SMTPServerDisconnected:
+                    if not conexao[1]:
+                        raise
+                    conexao = self._conectar()
+                    conexao[0].send_message(mensagem)
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                # Recusa de uma mensagem não invalida a conexão (o smtplib já mandou RSET),
+                # exceto 421, que é o servidor avisando que vai fechar.
+                if getattr(e, "smtp_code", None) == 421:
+                    self._fechar(conexao)
+                else:
+                    self.livres.put(conexao)
+                raise
+            except Exception:
+                self._fechar(conexao)
+                raise
+
+            conexao[1] += 1
+            if conexao[1] >= self.mensagens_por_conexao:
+                self._fechar(conexao)
+            else:
+                self.livres.put(conexao)
+
+    def fechar(self):
+        while True:
+            try:
+                self._fechar(self.livres.get_nowait())
+            except queue.Empty:
+                return
@@ -0,0 +1,359 @@
+"""
+Peças comuns dos importadores em massa (clientes, contratos, usuários).
+
+Os importadores recebem um iterável de linhas (listas de células já em texto),
+validam e gravam em blocos: cada bloco é uma consulta para saber o que já existe,
+um upsert em lote e um commit. Assim a memória depende só do tamanho do bloco,
+não do arquivo.
+
+As linhas vêm de .docx (tabelas do Word), CSV (pandas, em pedaços de
+`chunksize`) ou Parquet (lotes de registros do pyarrow). CSV e Parquet são lidos
+aos poucos, então arquivos com milhões de linhas não são carregados inteiros.
+"""
+from flask import current_app
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from sqlalchemy import bindparam, insert, select
+from app.database import db
+from app.models.importacao import ImportacaoBloco
+from datetime import datetime
+from docx import Document
+import hashlib
+import itertools
+import json
+import os
+import time
+
+FORMATOS = ["csv", "parquet", "docx"]
+
+
+def ler_data(valor, formato):
+    """
+    Data no `formato` das planilhas. Aceita também ISO (YYYY-MM-DD, com ou sem
+    hora), que é como datas tipadas saem de CSV exportado por sistema e de Parquet.
+    """
+    valor = valor.strip()
+    try:
+        return datetime.strptime(valor, formato)
+    except ValueError:
+        return datetime.fromisoformat(valor)
+
+
+# ------------------- Leitura -------------------
+
+def _indices_colunas(cabecalho, colunas):
+    """
+    Posição no arquivo de cada uma das `colunas` esperadas, pelo nome, quando o
+    cabeçalho traz os nomes (colunas ausentes ficam vazias). Sem nomes
+    reconhecidos, None: as colunas são lidas na ordem do arquivo, como no .docx.
+    """
+    nomes = [str(nome).strip().lower() for nome in cabecalho]
+    if colunas and any(coluna in nomes for coluna in colunas):
+        return [nomes.index(coluna) if coluna in nomes else None for coluna in colunas]
+    return None
+
+
+def _celulas(valores, indices):
+    if indices is None:
+        return list(valores)
+    return [valores[i] if i is not None else "" for i in indices]
+
+def linhas_docx(caminho_arquivo):
+    """(número da linha, células) de todas as tabelas do .docx, sem o cabeçalho de cada uma."""
+    doc = Document(caminho_arquivo)
+    for tabela in doc.tables:
+        for i, linha in enumerate(tabela.rows):
+            if i == 0:
+                continue
+            yield i + 1, [c.text.strip() for c in linha.cells]
+
+
+def linhas_csv(arquivo, colunas=None, tamanho_bloco=None, separador=","):
+    """(número da linha, células) de um CSV com cabeçalho, lido em pedaços de `tamanho_bloco` linhas."""
+    import pandas as pd
+
+    tamanho_bloco = tamanho_bloco or current_app.config["IMPORTACAO_LOTE"]
+    leitor = pd.read_csv(arquivo, sep=separador, dtype=str, keep_default_na=False,
+                         chunksize=tamanho_bloco, encoding="utf-8-sig")
+    numero_linha = 1  # a linha 1 é o cabeçalho
+    with leitor:
+        for pedaco in leitor:
+            indices = _indices_colunas(pedaco.columns, colunas)
+            for valores in pedaco.itertuples(index=False, name=None):
+                numero_linha += 1
+                yield numero_linha, _celulas(valores, indices)
+
+
+def linhas_parquet(arquivo, colunas=None, tamanho_bloco=None):
+    """(número da linha, células) de um Parquet, lido em lotes de registros; valores convertidos para texto."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Instale pyarrow para importar arquivos Parquet.")
+
+    tamanho_bloco = tamanho_bloco or current_app.config["IMPORTACAO_LOTE"]
+    parquet = pq.ParquetFile(arquivo)
+    indices = _indices_colunas(parquet.schema_arrow.names, colunas)
+    numero_linha = 0
+    for lote in parquet.iter_batches(batch_size=tamanho_bloco):
+        valores_por_coluna = [
+            ["" if valor is None else str(valor) for valor in coluna.to_pylist()] for coluna in lote.columns
+        ]
+        for valores in zip(*valores_por_coluna):
+            numero_linha += 1
+            yield numero_linha, _celulas(valores, indices)
+
+
+def linhas_arquivo(arquivo, formato, colunas=None, tamanho_bloco=None, separador=","):
+    if formato == "csv":
+        return linhas_csv(arquivo, colunas, tamanho_bloco, separador)
+    if formato == "parquet":
+        return linhas_parquet(arquivo, colunas, tamanho_bloco)
+    if formato == "docx":
+        return linhas_docx(arquivo)
+    raise ValueError(f"Formato deve ser um de {FORMATOS}.")
+
+
+def checksum_arquivo(arquivo):
+    """sha256 de um caminho ou arquivo aberto (que volta para o início), lido em pedaços."""
+    soma = hashlib.sha256()
+    if isinstance(arquivo, (str, bytes)) or hasattr(arquivo, "__fspath__"):
+        with open(arquivo, "rb") as f:
+            for pedaco in iter(lambda: f.read(1 << 20), b""):
+                soma.update(pedaco)
+    else:
+        for pedaco in iter(lambda: arquivo.read(1 << 20), b""):
+            soma.update(pedaco)
+        arquivo.seek(0)
+    return soma.hexdigest()
+
+
+def em_blocos(iteravel, tamanho):
+    iterador = iter(iteravel)
+    while True:
+        bloco = list(itertools.islice(iterador, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+# ------------------- Gravação -------------------
+
+def upsert(modelo, linhas, chave, atualizar):
+    """
+    INSERT ... ON CONFLICT (chave) DO UPDATE das `linhas` (dicts) em um comando,
+    executado como executemany. PostgreSQL e SQLite têm a cláusula; nos demais
+    bancos as chaves existentes são buscadas antes e viram um UPDATE em lote.
+    """
+    if not linhas:
+        return
+    tabela = modelo.__table__
+    dialeto = db.session.get_bind().dialect.name
+
+    if dialeto in ("postgresql", "sqlite"):
+        if dialeto == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+        else:
+            from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+        comando = insert_dialeto(tabela)
+        comando = comando.on_conflict_do_update(
+            index_elements=[chave],
+            set_={coluna: comando.excluded[coluna] for coluna in atualizar},
+        )
+        db.session.execute(comando, linhas)
+        return
+
+    existentes = set(db.session.execute(
+        select(tabela.c[chave]).where(tabela.c[chave].in_([linha[chave] for linha in linhas]))
+    ).scalars())
+    novas = [linha for linha in linhas if linha[chave] not in existentes]
+    if novas:
+        db.session.execute(insert(tabela), novas)
+    atualizadas = [linha for linha in linhas if linha[chave] in existentes]
+    if atualizadas:
+        coluna_chave = tabela.c[chave]
+        db.session.execute(
+            tabela.update().where(coluna_chave == bindparam("_chave")).values(
+                {coluna: bindparam(coluna) for coluna in atualizar}
+            ),
+            [{"_chave": linha[chave], **{coluna: linha[coluna] for coluna in atualizar}} for linha in atualizadas],
+        )
+
+
+def chaves_existentes(coluna, valores, coluna_valor=None):
+    """{chave: valor} das chaves que já estão no banco, numa consulta só (ex.: {cpf: id})."""
+    if not valores:
+        return {}
+    coluna_valor = coluna_valor if coluna_valor is not None else coluna
+    return dict(db.session.execute(select(coluna, coluna_valor).where(coluna.in_(list(valores)))).all())
+
+
+# ------------------- Relatório -------------------
+
+class RelatorioImportacao:
+    """
+    Contadores de uma importação e os primeiros IMPORTACAO_MAX_ERROS erros
+    (linha e motivo), no lugar de um print por linha.
+    """
+
+    def __init__(self, max_erros=None):
+        self.inseridos = 0
+        self.atualizados = 0
+        self.ignorados = 0
+        self.processados = 0
+        self.erros = []
+        self.total_erros = 0
+        self.blocos = []
+        self.max_erros = max_erros if max_erros is not None else current_app.config["IMPORTACAO_MAX_ERROS"]
+        self.inicio = time.perf_counter()
+
+    def erro(self, linha, motivo):
+        self.total_erros += 1
+        if len(self.erros) < self.max_erros:
+            self.erros.append({"linha": linha, "erro": motivo})
+
+    def somar(self, outro):
+        """Junta ao relatório geral o de um bloco (vindo do pool de processos ou de um checkpoint)."""
+        self.processados += outro.processados
+        self.inseridos += outro.inseridos
+        self.atualizados += outro.atualizados
+        self.ignorados += outro.ignorados
+        self.total_erros += outro.total_erros
+        self.erros.extend(outro.erros[:max(self.max_erros - len(self.erros), 0)])
+        self.blocos.extend(outro.blocos)
+
+    @property
+    def linhas_por_segundo(self):
+        duracao = time.perf_counter() - self.inicio
+        return round(self.processados / duracao, 1) if duracao > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            "processados": self.processados,
+            "inseridos": self.inseridos,
+            "atualizados": self.atualizados,
+            "ignorados": self.ignorados,
+            "invalidos": self.total_erros,
+            "erros": self.erros,
+            "segundos": round(time.perf_counter() - self.inicio, 3),
+            "linhas_por_segundo": self.linhas_por_segundo,
+            "blocos": sorted(self.blocos, key=lambda bloco: bloco["bloco"]),
+        }
+
+    def __str__(self):
+        return (
+            f"{self.processados} linhas ({self.linhas_por_segundo:.0f}/s): {self.inseridos} inseridas, "
+            f"{self.atualizados} atualizadas, {self.ignorados} ignoradas, {self.total_erros} inválidas"
+        )
+
+
+# ------------------- Execução em blocos -------------------
+
+def _iniciar_processo():
+    # Cada processo do pool tem seu próprio app, e portanto sua própria engine e sessão.
+    from app import create_app
+    create_app().app_context().push()
+
+
+def _executar_bloco(gravar_bloco, importacao, indice, bloco):
+    """
+    Valida e grava um bloco com `gravar_bloco(bloco, relatorio)` e, se houver
+    `importacao`, o checkpoint dele na mesma transação: um bloco está no banco
+    inteiro, com checkpoint, ou não está. Roda no processo atual ou no pool.
+    """
+    relatorio = RelatorioImportacao()
+    try:
+        gravar_bloco(bloco, relatorio)
+        status = "concluido"
+    except Exception as e:
+        db.session.rollback()
+        erros, total_erros = relatorio.erros, relatorio.total_erros
+        relatorio = RelatorioImportacao()
+        relatorio.processados = len(bloco)
+        relatorio.erros, relatorio.total_erros = erros, total_erros
+        relatorio.erro(f"{bloco[0][0]}-{bloco[-1][0]}", f"Bloco não gravado: {e}")
+        status = "erro"
+
+    resumo = {"bloco": indice, "linha_inicial": bloco[0][0], "linha_final": bloco[-1][0], "status": status,
+              "processados": relatorio.processados, "inseridos": relatorio.inseridos,
+              "atualizados": relatorio.atualizados, "ignorados": relatorio.ignorados,
+              "invalidos": relatorio.total_erros}
+    relatorio.blocos.append(resumo)
+
+    if importacao:
+        ImportacaoBloco.query.filter_by(importacao=importacao, bloco=indice).delete()
+        db.session.add(ImportacaoBloco(importacao=importacao, erros=json.dumps(relatorio.erros), **resumo))
+    db.session.commit()
+    return relatorio
+
+
+def _relatorio_do_checkpoint(checkpoint):
+    relatorio = RelatorioImportacao()
+    relatorio.processados = checkpoint.processados
+    relatorio.inseridos = checkpoint.inseridos
+    relatorio.atualizados = checkpoint.atualizados
+    relatorio.ignorados = checkpoint.ignorados
+    relatorio.total_erros = checkpoint.invalidos
+    relatorio.erros = json.loads(checkpoint.erros) if checkpoint.erros else []
+    resumo = checkpoint.to_dict()
+    resumo.pop("erros")
+    resumo["status"] = "retomado"
+    relatorio.blocos.append(resumo)
+    return relatorio
+
+
+def importar_em_blocos(gravar_bloco, linhas, tamanho_lote=None, ao_progredir=None,
+                       processos=None, importacao=None, retomar=False):
+    """
+    Divide as linhas em blocos de IMPORTACAO_LOTE e grava cada um com
+    `gravar_bloco(bloco, relatorio)`, que valida, faz o upsert e não commita.
+
+    Com `processos` (padrão IMPORTACAO_PROCESSOS) > 1 os blocos rodam num pool de processos, cada um com sua
+    sessão, e no máximo dois blocos por processo ficam em memória. Com
+    `importacao` (uma chave do arquivo), cada bloco gravado deixa um checkpoint
+    em `importacao_blocos`; com `retomar=True`, blocos já concluídos dessa
+    importação são pulados, então uma importação interrompida continua de onde
+    parou. Sem `retomar`, checkpoints antigos da mesma chave são descartados.
+    """
+    tamanho_lote = tamanho_lote or current_app.config["IMPORTACAO_LOTE"]
+    processos = processos or current_app.config["IMPORTACAO_PROCESSOS"] or os.cpu_count() or 1
+    relatorio = RelatorioImportacao()
+
+    concluidos = {}
+    if importacao and retomar:
+        concluidos = {
+            checkpoint.bloco: checkpoint
+            for checkpoint in ImportacaoBloco.query.filter_by(importacao=importacao, status="concluido")
+        }
+    elif importacao:
+        ImportacaoBloco.query.filter_by(importacao=importacao).delete()
+        db.session.commit()
+
+    def registrar(relatorio_bloco):
+        relatorio.somar(relatorio_bloco)
+        if ao_progredir:
+            ao_progredir(relatorio)
+
+    blocos = enumerate(em_blocos(linhas, tamanho_lote))
+    if processos <= 1:
+        for indice, bloco in blocos:
+            if indice in concluidos:
+                registrar(_relatorio_do_checkpoint(concluidos[indice]))
+            else:
+                registrar(_executar_bloco(gravar_bloco, importacao, indice, bloco))
+        return relatorio
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo) as executor:
+        em_andamento = set()
+        for indice, bloco in blocos:
+            if indice in concluidos:
+                registrar(_relatorio_do_checkpoint(concluidos[indice]))
+                continue
+            if len(em_andamento) >= processos * 2:
+                prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    registrar(futuro.result())
+            em_andamento.add(executor.submit(_executar_bloco, gravar_bloco, importacao, indice, bloco))
+
+        for futuro in wait(em_andamento).done:
+            registrar(futuro.result())
+    return relatorio
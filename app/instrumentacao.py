@@ -0,0 +1,382 @@
+"""
+Instrumentação opcional da API (INSTRUMENTACAO=True), sem serviço externo:
+
+    - latência por rota (histograma por método, regra da rota e status)
+    - consultas SQL por requisição, com contagem e tempo vindos dos eventos
+      do SQLAlchemy, e log das consultas acima de INSTRUMENTACAO_CONSULTA_LENTA_MS
+    - perfil por amostragem das threads que estão atendendo requisições,
+      salvo em pstats (`python -m pstats`, snakeviz) e em pilhas "folded"
+      (flamegraph.pl, speedscope)
+
+Tudo sai em GET /metrics, no formato texto do Prometheus. Cada requisição
+também devolve o cabeçalho `Server-Timing` (total e banco, com o número de
+consultas), que aparece no DevTools do navegador. As métricas ficam na
+memória do processo: com vários processos (gunicorn -w N), cada um tem as suas.
+"""
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import datetime
+from flask import Response, current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from app.database import db
+import atexit
+import marshal
+import os
+import sys
+import threading
+import time
+
+LIMITES_REQUISICAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_CONSULTA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+LIMITES_CONSULTAS_POR_REQUISICAO = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+FORA_DE_REQUISICAO = "-"  # rótulo `rota` das consultas de workers, scripts e startup
+
+
+def _rotulos(nomes, valores):
+    def escapar(valor):
+        return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{nome}="{escapar(valor)}"' for nome, valor in zip(nomes, valores))
+
+
+def _numero(valor):
+    return repr(float(valor)) if valor != int(valor) else str(int(valor))
+
+
+class Contador:
+    """Contador do Prometheus por combinação de rótulos. Seguro para uso entre threads."""
+
+    tipo = "counter"
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self._valores = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def somar(self, *valores_rotulos, valor=1):
+        with self._lock:
+            self._valores[valores_rotulos] += valor
+
+    def valor(self, *valores_rotulos):
+        with self._lock:
+            return self._valores.get(valores_rotulos, 0)
+
+    def amostras(self):
+        with self._lock:
+            itens = list(self._valores.items())
+        for valores, total in sorted(itens):
+            rotulos = _rotulos(self.rotulos, valores)
+            yield f"{self.nome}{{{rotulos}}} {_numero(total)}" if rotulos else f"{self.nome} {_numero(total)}"
+
+
+class Medidor(Contador):
+    """Valor que sobe e desce (requisições em andamento)."""
+
+    tipo = "gauge"
+
+
+class Histograma:
+    """Histograma do Prometheus (faixas cumulativas `le`, `_sum` e `_count`) por combinação de rótulos."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome, ajuda, limites, rotulos=()):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self.limites = tuple(limites)
+        self._series = {}  # valores dos rótulos -> [contagem de cada faixa..., +Inf, soma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores_rotulos):
+        faixa = bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [0] * (len(self.limites) + 1) + [0.0]
+            serie[faixa] += 1
+            serie[-1] += valor
+
+    def amostras(self):
+        with self._lock:
+            series = [(valores, list(serie)) for valores, serie in self._series.items()]
+        for valores, serie in sorted(series):
+            rotulos = _rotulos(self.rotulos, valores)
+            prefixo = f"{rotulos}," if rotulos else ""
+            acumulado = 0
+            for limite, contagem in zip(self.limites + (float("inf"),), serie):
+                acumulado += contagem
+                le = "+Inf" if limite == float("inf") else _numero(limite)
+                yield f'{self.nome}_bucket{{{prefixo}le="{le}"}} {acumulado}'
+            sufixo = f"{{{rotulos}}}" if rotulos else ""
+            yield f"{self.nome}_sum{sufixo} {_numero(serie[-1])}"
+            yield f"{self.nome}_count{sufixo} {acumulado}"
+
+
+class Metricas:
+    """As métricas do app, guardadas em app.extensions["instrumentacao"]."""
+
+    def __init__(self):
+        self.requisicoes = Histograma(
+            "cobale_requisicao_duracao_segundos", "Latência das requisições por rota.",
+            LIMITES_REQUISICAO, ("metodo", "rota", "status"))
+        self.em_andamento = Medidor("cobale_requisicoes_em_andamento", "Requisições sendo atendidas agora.")
+        self.consultas = Contador(
+            "cobale_sql_consultas_total", "Consultas SQL executadas, por rota.", ("rota",))
+        self.duracao_consultas = Histograma(
+            "cobale_sql_duracao_segundos", "Tempo de cada consulta SQL, por rota.", LIMITES_CONSULTA, ("rota",))
+        self.consultas_por_requisicao = Histograma(
+            "cobale_sql_consultas_por_requisicao", "Consultas SQL feitas por requisição (N+1 aparece aqui).",
+            LIMITES_CONSULTAS_POR_REQUISICAO, ("metodo", "rota"))
+        self.consultas_lentas = Contador(
+            "cobale_sql_consultas_lentas_total", "Consultas SQL acima de INSTRUMENTACAO_CONSULTA_LENTA_MS.", ("rota",))
+        self.perfil_amostras = Contador(
+            "cobale_perfil_amostras_total", "Pilhas coletadas pelo perfil por amostragem.")
+
+    def todas(self):
+        return [self.requisicoes, self.em_andamento, self.consultas, self.duracao_consultas,
+                self.consultas_por_requisicao, self.consultas_lentas, self.perfil_amostras]
+
+    def texto(self):
+        linhas = []
+        for metrica in self.todas():
+            linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.extend(metrica.amostras())
+        return "\n".join(linhas) + "\n"
+
+
+# Threads atendendo requisições agora: o perfil só amostra essas (as outras estão paradas esperando conexão).
+_threads_em_requisicao = set()
+
+
+def _funcao(codigo):
+    return codigo.co_filename, codigo.co_firstlineno, codigo.co_name
+
+
+class PerfilAmostragem:
+    """
+    Perfil por amostragem: a cada `intervalo` segundos, guarda a pilha de cada
+    thread que está atendendo uma requisição (ou de todas, com
+    `todas_as_threads`). Custa pouco para ligar em produção; as contagens são de
+    amostras, não de chamadas, e o tempo é amostras x intervalo.
+    """
+
+    def __init__(self, intervalo=0.005, todas_as_threads=False, ao_amostrar=None):
+        self.intervalo = intervalo
+        self.todas_as_threads = todas_as_threads
+        self.ao_amostrar = ao_amostrar
+        self.iniciado_em = None
+        self._pilhas = Counter()
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    @property
+    def ativo(self):
+        return self._thread is not None
+
+    def iniciar(self):
+        if self._thread is not None:
+            raise RuntimeError("O perfil já está rodando.")
+        self._parar.clear()
+        self._pilhas = Counter()
+        self.iniciado_em = datetime.now()
+        self._thread = threading.Thread(target=self._rodar, name="perfil-amostragem", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        """Para a coleta e devolve as pilhas: {(função da base, ..., função do topo): amostras}."""
+        if self._thread is None:
+            raise RuntimeError("O perfil não está rodando.")
+        self._parar.set()
+        self._thread.join()
+        self._thread = None
+        with self._lock:
+            return dict(self._pilhas)
+
+    def _rodar(self):
+        propria = threading.get_ident()
+        while not self._parar.wait(self.intervalo):
+            quadros = sys._current_frames()
+            threads = quadros.keys() if self.todas_as_threads else list(_threads_em_requisicao)
+            coletadas = 0
+            for ident in threads:
+                quadro = quadros.get(ident)
+                if quadro is None or ident == propria:
+                    continue
+                pilha = []
+                while quadro is not None:
+                    pilha.append(_funcao(quadro.f_code))
+                    quadro = quadro.f_back
+                with self._lock:
+                    self._pilhas[tuple(reversed(pilha))] += 1
+                coletadas += 1
+            if coletadas and self.ao_amostrar:
+                self.ao_amostrar(coletadas)
+
+    def salvar(self, pilhas, pasta, prefixo="perfil"):
+        """Grava `pilhas` em `<prefixo>-<data>.pstats` e `.folded`; devolve os caminhos."""
+        os.makedirs(pasta, exist_ok=True)
+        base = os.path.join(pasta, f"{prefixo}-{datetime.now():%Y%m%d-%H%M%S}")
+        with open(base + ".folded", "w", encoding="utf-8") as arquivo:
+            for pilha, amostras in sorted(pilhas.items()):
+                nomes = ";".join(f"{nome} ({os.path.basename(arquivo_fonte)}:{linha})"
+                                 for arquivo_fonte, linha, nome in pilha)
+                arquivo.write(f"{nomes} {amostras}\n")
+        with open(base + ".pstats", "wb") as arquivo:
+            marshal.dump(self._estatisticas(pilhas), arquivo)
+        return {"pstats": base + ".pstats", "flamegraph": base + ".folded"}
+
+    def _estatisticas(self, pilhas):
+        # Formato que pstats.Stats lê: {função: (chamadas primitivas, chamadas, tempo próprio, tempo acumulado,
+        # {quem chamou: (as mesmas quatro colunas)})}. Aqui "chamadas" são amostras.
+        proprio, amostras = Counter(), Counter()
+        chamadores = defaultdict(Counter)
+        for pilha, n in pilhas.items():
+            if not pilha:
+                continue
+            proprio[pilha[-1]] += n
+            for funcao in set(pilha):  # recursão conta uma vez por amostra
+                amostras[funcao] += n
+            for chamador, chamada in set(zip(pilha, pilha[1:])):
+                chamadores[chamada][chamador] += n
+        dt = self.intervalo
+        return {
+            funcao: (n, n, proprio[funcao] * dt, n * dt,
+                     {chamador: (m, m, 0.0, m * dt) for chamador, m in chamadores[funcao].items()})
+            for funcao, n in amostras.items()
+        }
+
+
+def _rota():
+    regra = request.url_rule
+    return regra.rule if regra is not None else "(sem rota)"
+
+
+def _instalar_eventos_sql(app, metricas, engine):
+    limite_lenta = app.config["INSTRUMENTACAO_CONSULTA_LENTA_MS"] / 1000
+    logger = app.logger
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._cobale_inicio = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "_cobale_inicio", None)
+        if inicio is None:
+            return
+        duracao = time.perf_counter() - inicio
+        rota = FORA_DE_REQUISICAO
+        if has_request_context():
+            rota = _rota()
+            g._cobale_consultas = g.get("_cobale_consultas", 0) + 1
+            g._cobale_tempo_sql = g.get("_cobale_tempo_sql", 0.0) + duracao
+        metricas.consultas.somar(rota)
+        metricas.duracao_consultas.observar(duracao, rota)
+        if limite_lenta and duracao >= limite_lenta:
+            metricas.consultas_lentas.somar(rota)
+            # Sem os parâmetros: podem trazer CPF, e-mail e senha.
+            logger.warning(f"Consulta lenta ({1000 * duracao:.1f} ms, rota {rota}): {' '.join(statement.split())[:2000]}")
+
+
+def _instalar_requisicoes(app, metricas):
+    @app.before_request
+    def _inicio_requisicao():
+        g._cobale_inicio = time.perf_counter()
+        g._cobale_consultas = 0
+        g._cobale_tempo_sql = 0.0
+        _threads_em_requisicao.add(threading.get_ident())
+        metricas.em_andamento.somar(valor=1)
+
+    @app.after_request
+    def _cabecalho_tempos(resposta):
+        # Respostas em streaming continuam depois daqui: o tempo delas é até o primeiro byte.
+        if "_cobale_inicio" not in g:
+            return resposta
+        total = 1000 * (time.perf_counter() - g._cobale_inicio)
+        resposta.headers["Server-Timing"] = (
+            f'db;dur={1000 * g._cobale_tempo_sql:.1f};desc="{g._cobale_consultas} consultas", total;dur={total:.1f}'
+        )
+        g._cobale_status = resposta.status_code
+        return resposta
+
+    @app.teardown_request
+    def _fim_requisicao(erro=None):
+        inicio = g.pop("_cobale_inicio", None)
+        if inicio is None:
+            return
+        _threads_em_requisicao.discard(threading.get_ident())
+        metricas.em_andamento.somar(valor=-1)
+        rota = _rota()
+        status = g.get("_cobale_status", 500)
+        metricas.requisicoes.observar(time.perf_counter() - inicio, request.method, rota, status)
+        metricas.consultas_por_requisicao.observar(g.get("_cobale_consultas", 0), request.method, rota)
+
+
+def _perfil():
+    return current_app.extensions["instrumentacao_perfil"]
+
+
+def _instalar_rotas(app, metricas):
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(metricas.texto(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+    @app.route("/metrics/perfil", methods=["GET"])
+    def estado_perfil():
+        perfil = _perfil()
+        return jsonify({
+            "ativo": perfil.ativo,
+            "iniciado_em": perfil.iniciado_em.strftime("%Y-%m-%d %H:%M:%S") if perfil.ativo else None,
+            "intervalo": perfil.intervalo,
+        }), 200
+
+    @app.route("/metrics/perfil", methods=["POST"])
+    def iniciar_perfil():
+        perfil = _perfil()
+        if perfil.ativo:
+            return jsonify({"erro": "O perfil já está rodando."}), 409
+        perfil.iniciar()
+        return jsonify({"mensagem": "Perfil iniciado."}), 201
+
+    @app.route("/metrics/perfil", methods=["DELETE"])
+    def parar_perfil():
+        perfil = _perfil()
+        if not perfil.ativo:
+            return jsonify({"erro": "O perfil não está rodando."}), 409
+        pilhas = perfil.parar()
+        arquivos = perfil.salvar(pilhas, current_app.config["INSTRUMENTACAO_PERFIL_PASTA"])
+        return jsonify({"amostras": sum(pilhas.values()), **arquivos}), 200
+
+
+def instalar_instrumentacao(app):
+    """
+    Liga a instrumentação quando INSTRUMENTACAO é True: hooks de requisição,
+    eventos SQL nos engines do app, GET /metrics e o liga/desliga do perfil em
+    /metrics/perfil (POST inicia, DELETE para e salva os arquivos). Com
+    INSTRUMENTACAO_PERFIL, o perfil já começa ligado e é salvo quando o processo termina.
+    """
+    if not app.config.get("INSTRUMENTACAO"):
+        return None
+
+    metricas = Metricas()
+    perfil = PerfilAmostragem(app.config["INSTRUMENTACAO_PERFIL_INTERVALO"],
+                              ao_amostrar=lambda n: metricas.perfil_amostras.somar(valor=n))
+    app.extensions["instrumentacao"] = metricas
+    app.extensions["instrumentacao_perfil"] = perfil
+
+    with app.app_context():
+        for engine in db.engines.values():
+            _instalar_eventos_sql(app, metricas, engine)
+    _instalar_requisicoes(app, metricas)
+    _instalar_rotas(app, metricas)
+
+    if app.config.get("INSTRUMENTACAO_PERFIL"):
+        perfil.iniciar()
+
+        def _salvar_ao_sair():
+            if perfil.ativo:
+                perfil.salvar(perfil.parar(), app.config["INSTRUMENTACAO_PERFIL_PASTA"])
+
+        atexit.register(_salvar_ao_sair)
+    return metricas
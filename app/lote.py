@@ -0,0 +1,34 @@
+"""
+Criação em lote (POST /contratos/lote, POST /acordos/lote): leitura do corpo e
+resultado item a item.
+
+Os controllers validam todos os itens, resolvem as referências com um IN só e
+gravam os válidos com um INSERT em lote, numa transação. Um item inválido não
+impede os outros; o resultado diz, na ordem do corpo, o que foi criado e o erro
+de cada item recusado.
+"""
+from flask import current_app
+
+
+def ler_itens(data, chave="itens"):
+    """Lista de itens do corpo: a própria lista ou {"itens": [...]}."""
+    itens = data.get(chave) if isinstance(data, dict) else data
+    if not isinstance(itens, list) or not itens:
+        raise ValueError(f"Envie uma lista de itens (ou {{\"{chave}\": [...]}}).")
+    maximo = current_app.config.get("CRIACAO_LOTE_MAXIMO")
+    if maximo and len(itens) > maximo:
+        raise ValueError(f"Máximo de {maximo} itens por lote; recebidos {len(itens)}.")
+    return itens
+
+
+def resultado_lote(resultados):
+    """Resumo do lote a partir de um resultado por item ({"indice", "status", ...})."""
+    criados = sum(1 for r in resultados if r["status"] == "criado")
+    return {"total": len(resultados), "criados": criados, "erros": len(resultados) - criados, "itens": resultados}
+
+
+def status_http(resultado):
+    """201 se todos foram criados, 207 se só parte, 400 se nenhum."""
+    if not resultado["erros"]:
+        return 201
+    return 207 if resultado["criados"] else 400
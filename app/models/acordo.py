@@ -5,7 +5,7 @@ class Acordo(db.Model):
     __tablename__ = "acordos"
 
     id = db.Column(db.Integer, primary_key=True)
-    contrato_id = db.Column(db.String(6), db.ForeignKey("contrato.numero_contrato"), nullable=False)
+    contrato_id = db.Column(db.String(6), db.ForeignKey("contrato.numero_contrato"), nullable=False, index=True)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     vencimento = db.Column(db.DateTime, nullable=False)
     tipo_pagamento = db.Column(db.String(20), nullable=False)
@@ -13,13 +13,16 @@ class Acordo(db.Model):
     valor_total = db.Column(db.Numeric(10, 2), nullable=False)
     desconto = db.Column(db.Numeric(10, 2), nullable=False)
     juros = db.Column(db.Numeric(10, 2), default=0)
-    status = db.Column(db.String(20), default="em andamento")
+    status = db.Column(db.String(20), default="em andamento", index=True)
 
     parcelamento_json = db.Column(db.Text, nullable=True)
 
     contrato = db.relationship("Contrato", backref=db.backref("acordos", lazy=True))
 
-    def to_dict(self, include_boletos=False):
+    CAMPOS = ["id", "contrato_id", "tipo_pagamento", "qtd_parcelas", "valor_total", "desconto", "juros",
+              "vencimento", "status", "data_criacao", "parcelamento"]
+
+    def _parcelamento(self):
         import json
         parcelamento_dict = {}
         if self.parcelamento_json:
@@ -27,20 +30,23 @@ class Acordo(db.Model):
                 parcelamento_dict = json.loads(self.parcelamento_json)
             except Exception:
                 parcelamento_dict = {}
+        return parcelamento_dict
 
-        data = {
-            "id": self.id,
-            "contrato_id": self.contrato_id,
-            "tipo_pagamento": self.tipo_pagamento,
-            "qtd_parcelas": self.qtd_parcelas,
-            "valor_total": float(self.valor_total),
-            "desconto": float(self.desconto),
-            "juros": float(self.juros),
-            "vencimento": self.vencimento.strftime("%Y-%m-%d"),
-            "status": self.status,
-            "data_criacao": self.data_criacao.strftime("%Y-%m-%d %H:%M:%S"),
-            "parcelamento": parcelamento_dict,
+    def to_dict(self, include_boletos=False, campos=None):
+        valores = {
+            "id": lambda: self.id,
+            "contrato_id": lambda: self.contrato_id,
+            "tipo_pagamento": lambda: self.tipo_pagamento,
+            "qtd_parcelas": lambda: self.qtd_parcelas,
+            "valor_total": lambda: float(self.valor_total),
+            "desconto": lambda: float(self.desconto),
+            "juros": lambda: float(self.juros),
+            "vencimento": lambda: self.vencimento.strftime("%Y-%m-%d"),
+            "status": lambda: self.status,
+            "data_criacao": lambda: self.data_criacao.strftime("%Y-%m-%d %H:%M:%S"),
+            "parcelamento": self._parcelamento,
         }
+        data = {campo: valores[campo]() for campo in (campos or self.CAMPOS)}
         if include_boletos:
             data["boletos"] = [boleto.to_dict() for boleto in self.boletos]
         return data
@@ -52,8 +58,11 @@ class Boleto(db.Model):
     __tablename__ = "boletos"
 
     id = db.Column(db.Integer, primary_key=True)
-    acordo_id = db.Column(db.Integer, db.ForeignKey("acordos.id"), nullable=False)
+    acordo_id = db.Column(db.Integer, db.ForeignKey("acordos.id"), nullable=False, index=True)
     nome_arquivo = db.Column(db.String(255), nullable=False)
+    caminho = db.Column(db.String(255), nullable=True)  # chave no armazenamento de boletos (ab/cd/<sha256>.pdf)
+    tamanho = db.Column(db.Integer, nullable=True)
+    checksum = db.Column(db.String(64), nullable=True, index=True)  # sha256 do PDF
     criado_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     enviado = db.Column(db.Boolean, default=False)
 
@@ -64,6 +73,8 @@ class Boleto(db.Model):
             "id": self.id,
             "acordo_id": self.acordo_id,
             "nome_arquivo": self.nome_arquivo,
+            "tamanho": self.tamanho,
+            "checksum": self.checksum,
             "criado_em": self.criado_em.strftime("%Y-%m-%d %H:%M:%S"),
             "enviado": self.enviado
         }
@@ -0,0 +1,52 @@
+from app.database import db
+
+
+class AnaliseCarteira(db.Model):
+    """
+    Resumo da carteira por dia de vencimento, filial e situação do último acordo
+    do contrato ("sem_acordo", "em andamento", "concluido", "cancelado"). Mantido
+    por `app.analises`, junto com os resumos por dia e por mês/filial abaixo.
+    """
+    __tablename__ = "analise_carteira"
+    __table_args__ = (db.Index("ix_analise_carteira_filial", "filial", "vencimento"),)
+
+    vencimento = db.Column(db.Date, primary_key=True)
+    filial = db.Column(db.String(100), primary_key=True)
+    situacao = db.Column(db.String(20), primary_key=True)
+    contratos = db.Column(db.Integer, nullable=False, default=0)
+    valor_contratos = db.Column(db.Float, nullable=False, default=0)
+    valor_acordos = db.Column(db.Float, nullable=False, default=0)  # valor total dos últimos acordos
+
+    def __repr__(self):
+        return f"<AnaliseCarteira {self.vencimento} {self.filial} {self.situacao}: {self.contratos}>"
+
+
+class AnaliseCarteiraDia(db.Model):
+    """`analise_carteira` somada por dia de vencimento e situação (aging e conversão da carteira toda)."""
+    __tablename__ = "analise_carteira_dia"
+
+    vencimento = db.Column(db.Date, primary_key=True)
+    situacao = db.Column(db.String(20), primary_key=True)
+    contratos = db.Column(db.Integer, nullable=False, default=0)
+    valor_contratos = db.Column(db.Float, nullable=False, default=0)
+    valor_acordos = db.Column(db.Float, nullable=False, default=0)
+
+
+class AnaliseCarteiraMes(db.Model):
+    """`analise_carteira` somada por mês de vencimento, filial e situação (totais por filial)."""
+    __tablename__ = "analise_carteira_mes"
+
+    mes = db.Column(db.Date, primary_key=True)  # primeiro dia do mês
+    filial = db.Column(db.String(100), primary_key=True)
+    situacao = db.Column(db.String(20), primary_key=True)
+    contratos = db.Column(db.Integer, nullable=False, default=0)
+    valor_contratos = db.Column(db.Float, nullable=False, default=0)
+    valor_acordos = db.Column(db.Float, nullable=False, default=0)
+
+
+class AnalisePendencia(db.Model):
+    """Dia de vencimento e filial com contratos/acordos alterados desde o último recálculo (preenchida por triggers)."""
+    __tablename__ = "analise_pendencias"
+
+    vencimento = db.Column(db.Date, primary_key=True)
+    filial = db.Column(db.String(100), primary_key=True)
@@ -0,0 +1,36 @@
+from app.database import db
+from datetime import datetime
+import uuid
+
+
+class BoletoJob(db.Model):
+    __tablename__ = "boleto_jobs"
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    acordo_id = db.Column(db.Integer, db.ForeignKey("acordos.id"), nullable=False, index=True)
+    lote_id = db.Column(db.String(32), nullable=True, index=True)  # preenchido quando o job veio de uma geração em lote
+    status = db.Column(db.String(20), nullable=False, default="pendente", index=True)  # pendente, processando, concluido, erro
+    reserva = db.Column(db.String(32), nullable=True, index=True)  # token do worker que pegou o job
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    erro = db.Column(db.Text, nullable=True)
+    boleto_id = db.Column(db.Integer, db.ForeignKey("boletos.id"), nullable=True)
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    iniciado_em = db.Column(db.DateTime, nullable=True)
+    finalizado_em = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "acordo_id": self.acordo_id,
+            "lote_id": self.lote_id,
+            "status": self.status,
+            "tentativas": self.tentativas,
+            "erro": self.erro,
+            "boleto_id": self.boleto_id,
+            "criado_em": self.criado_em.strftime("%Y-%m-%d %H:%M:%S"),
+            "iniciado_em": self.iniciado_em.strftime("%Y-%m-%d %H:%M:%S") if self.iniciado_em else None,
+            "finalizado_em": self.finalizado_em.strftime("%Y-%m-%d %H:%M:%S") if self.finalizado_em else None
+        }
+
+    def __repr__(self):
+        return f"<BoletoJob {self.id} - Acordo {self.acordo_id} - Status {self.status}>"
@@ -10,16 +10,20 @@ class Cliente(db.Model):
 
     enderecos = db.relationship("Endereco", backref="cliente", cascade="all, delete-orphan", lazy=True)
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "nome": self.nome,
-            "cpf": self.cpf,
-            "telefone": self.telefone,
-            "email": self.email,
-            "data_nascimento": self.data_nascimento.strftime("%Y-%m-%d") if self.data_nascimento else None,
-            "enderecos": [endereco.to_dict() for endereco in self.enderecos]
+    CAMPOS = ["id", "nome", "cpf", "telefone", "email", "data_nascimento", "enderecos"]
+
+    def to_dict(self, campos=None):
+        # Só lê os atributos pedidos, para não disparar lazy-load de colunas/endereços fora da projeção.
+        valores = {
+            "id": lambda: self.id,
+            "nome": lambda: self.nome,
+            "cpf": lambda: self.cpf,
+            "telefone": lambda: self.telefone,
+            "email": lambda: self.email,
+            "data_nascimento": lambda: self.data_nascimento.strftime("%Y-%m-%d") if self.data_nascimento else None,
+            "enderecos": lambda: [endereco.to_dict() for endereco in self.enderecos]
         }
+        return {campo: valores[campo]() for campo in (campos or self.CAMPOS)}
 
 class Endereco(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,15 @@
+from app.database import db
+
+# Numeração dos contratos no PostgreSQL; db.create_all só cria sequences nos bancos que as têm.
+SEQUENCIA_CONTRATO = db.Sequence("contrato_numero_seq", metadata=db.metadata)
+
+
+class Contador(db.Model):
+    """Último número entregue de uma numeração (ex.: "contrato") nos bancos sem sequence."""
+    __tablename__ = "contadores"
+
+    nome = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<Contador {self.nome} = {self.valor}>"
@@ -1,13 +1,29 @@
 from app.database import db
+from app.busca import normalizar
 from datetime import datetime
+from sqlalchemy.orm import validates
 
 class Contrato(db.Model):
     __tablename__ = "contrato"
+    # Índices das buscas por vencimento, valor e filial; com o número do contrato junto, as buscas que só
+    # devolvem o número (ou filtram e paginam por ele) são respondidas pelo índice, sem ler a tabela.
+    __table_args__ = (
+        db.Index("ix_contrato_vencimento", "vencimento", "numero_contrato"),
+        db.Index("ix_contrato_valor_total", "valor_total", "numero_contrato"),
+        db.Index("ix_contrato_filial_normalizada", "filial_normalizada", "numero_contrato",
+                 postgresql_ops={"filial_normalizada": "varchar_pattern_ops"}),
+    )
 
     numero_contrato = db.Column(db.String(6), primary_key=True)
-    cliente_id = db.Column(db.Integer, db.ForeignKey("cliente.id"), nullable=False)
+    cliente_id = db.Column(db.Integer, db.ForeignKey("cliente.id"), nullable=False, index=True)
     vencimento = db.Column(db.DateTime, default=datetime.utcnow)
     valor_total = db.Column(db.Float, nullable=False)
     filial = db.Column(db.String(100), nullable=False)
+    filial_normalizada = db.Column(db.String(100), nullable=True)  # minúsculas, sem acento: chave das buscas por filial
 
     cliente = db.relationship("Cliente", backref=db.backref("contratos", lazy=True))
+
+    @validates("filial")
+    def _normalizar_filial(self, chave, filial):
+        self.filial_normalizada = normalizar(filial)
+        return filial
@@ -0,0 +1,37 @@
+from app.database import db
+from datetime import datetime
+import uuid
+
+
+class EnvioBoleto(db.Model):
+    __tablename__ = "envios_boleto"
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    boleto_id = db.Column(db.Integer, db.ForeignKey("boletos.id"), nullable=False, index=True)
+    lote_id = db.Column(db.String(32), nullable=True, index=True)  # preenchido quando o envio veio de um lote
+    destinatario = db.Column(db.String(120), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pendente", index=True)  # pendente, enviando, enviado, erro
+    reserva = db.Column(db.String(32), nullable=True, index=True)  # token do worker que pegou o envio
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    proxima_tentativa = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)  # backoff entre falhas
+    erro = db.Column(db.Text, nullable=True)
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    iniciado_em = db.Column(db.DateTime, nullable=True)
+    enviado_em = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "boleto_id": self.boleto_id,
+            "lote_id": self.lote_id,
+            "destinatario": self.destinatario,
+            "status": self.status,
+            "tentativas": self.tentativas,
+            "proxima_tentativa": self.proxima_tentativa.strftime("%Y-%m-%d %H:%M:%S") if self.status == "pendente" else None,
+            "erro": self.erro,
+            "criado_em": self.criado_em.strftime("%Y-%m-%d %H:%M:%S"),
+            "enviado_em": self.enviado_em.strftime("%Y-%m-%d %H:%M:%S") if self.enviado_em else None
+        }
+
+    def __repr__(self):
+        return f"<EnvioBoleto {self.id} - Boleto {self.boleto_id} - Status {self.status}>"
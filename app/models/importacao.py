@@ -0,0 +1,98 @@
+from app.database import db
+from datetime import datetime
+import json
+import uuid
+
+
+class ImportacaoBloco(db.Model):
+    """Checkpoint de um bloco de uma importação, gravado na mesma transação que os dados do bloco."""
+    __tablename__ = "importacao_blocos"
+    __table_args__ = (db.UniqueConstraint("importacao", "bloco", name="uq_importacao_bloco"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    importacao = db.Column(db.String(80), nullable=False, index=True)  # "<entidade>:<sha256 do arquivo>"
+    bloco = db.Column(db.Integer, nullable=False)
+    linha_inicial = db.Column(db.Integer, nullable=True)
+    linha_final = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(20), nullable=False)  # concluido, erro
+    processados = db.Column(db.Integer, nullable=False, default=0)
+    inseridos = db.Column(db.Integer, nullable=False, default=0)
+    atualizados = db.Column(db.Integer, nullable=False, default=0)
+    ignorados = db.Column(db.Integer, nullable=False, default=0)
+    invalidos = db.Column(db.Integer, nullable=False, default=0)
+    erros = db.Column(db.Text, nullable=True)  # JSON: [{"linha": ..., "erro": ...}]
+    finalizado_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            "bloco": self.bloco,
+            "linha_inicial": self.linha_inicial,
+            "linha_final": self.linha_final,
+            "status": self.status,
+            "processados": self.processados,
+            "inseridos": self.inseridos,
+            "atualizados": self.atualizados,
+            "ignorados": self.ignorados,
+            "invalidos": self.invalidos,
+            "erros": json.loads(self.erros) if self.erros else [],
+            "finalizado_em": self.finalizado_em.strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def __repr__(self):
+        return f"<ImportacaoBloco {self.importacao} #{self.bloco} - Status {self.status}>"
+
+
+class ImportacaoJob(db.Model):
+    """Importação de um arquivo rodando em segundo plano (worker_importacoes.py)."""
+    __tablename__ = "importacao_jobs"
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    chave = db.Column(db.String(120), unique=True, nullable=True)  # chave de idempotência: mesma chave, mesmo job
+    entidade = db.Column(db.String(20), nullable=False)  # clientes, contratos, usuarios
+    arquivo = db.Column(db.Text, nullable=False)  # caminho no servidor
+    arquivo_temporario = db.Column(db.Boolean, nullable=False, default=True)  # upload: apagado ao terminar
+    nome_arquivo = db.Column(db.String(255), nullable=True)
+    formato = db.Column(db.String(10), nullable=False)
+    separador = db.Column(db.String(5), nullable=False, default=",")
+    tamanho_lote = db.Column(db.Integer, nullable=True)
+    depois_de = db.Column(db.String(32), nullable=True)  # job que precisa terminar antes (contratos depois de clientes)
+    status = db.Column(db.String(20), nullable=False, default="pendente", index=True)  # pendente, processando, concluido, erro
+    reserva = db.Column(db.String(32), nullable=True, index=True)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    processados = db.Column(db.Integer, nullable=False, default=0)
+    inseridos = db.Column(db.Integer, nullable=False, default=0)
+    atualizados = db.Column(db.Integer, nullable=False, default=0)
+    ignorados = db.Column(db.Integer, nullable=False, default=0)
+    invalidos = db.Column(db.Integer, nullable=False, default=0)
+    linhas_por_segundo = db.Column(db.Float, nullable=True)
+    erros = db.Column(db.Text, nullable=True)  # JSON: erros por linha e blocos não gravados
+    erro = db.Column(db.Text, nullable=True)  # falha que interrompeu a importação
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    iniciado_em = db.Column(db.DateTime, nullable=True)
+    atualizado_em = db.Column(db.DateTime, nullable=True)  # último bloco gravado; job parado há muito volta para a fila
+    finalizado_em = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "chave": self.chave,
+            "entidade": self.entidade,
+            "nome_arquivo": self.nome_arquivo,
+            "formato": self.formato,
+            "status": self.status,
+            "tentativas": self.tentativas,
+            "processados": self.processados,
+            "inseridos": self.inseridos,
+            "atualizados": self.atualizados,
+            "ignorados": self.ignorados,
+            "invalidos": self.invalidos,
+            "linhas_por_segundo": self.linhas_por_segundo,
+            "erros": json.loads(self.erros) if self.erros else [],
+            "erro": self.erro,
+            "criado_em": self.criado_em.strftime("%Y-%m-%d %H:%M:%S"),
+            "iniciado_em": self.iniciado_em.strftime("%Y-%m-%d %H:%M:%S") if self.iniciado_em else None,
+            "finalizado_em": self.finalizado_em.strftime("%Y-%m-%d %H:%M:%S") if self.finalizado_em else None
+        }
+
+    def __repr__(self):
+        return f"<ImportacaoJob {self.id} - {self.entidade} - Status {self.status}>"
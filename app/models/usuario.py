@@ -1,6 +1,15 @@
+from flask import current_app
 from ..database import db
 from werkzeug.security import generate_password_hash, check_password_hash
 
+
+def gerar_hash_senha(senha, metodo=None, tamanho_salt=None):
+    """Hash com o método/custo de SENHA_HASH_METODO (formato do werkzeug, ex. "scrypt:32768:8:1")."""
+    metodo = metodo or current_app.config["SENHA_HASH_METODO"]
+    tamanho_salt = tamanho_salt or current_app.config["SENHA_HASH_SALT"]
+    return generate_password_hash(senha, method=metodo, salt_length=tamanho_salt)
+
+
 class Usuario(db.Model):
     __tablename__ = "usuarios"
 
@@ -11,7 +20,7 @@ class Usuario(db.Model):
     cargo = db.Column(db.String(20), nullable=False) # operador, supervisor, gerente
 
     def set_senha(self, senha):
-        self.senha = generate_password_hash(senha)
+        self.senha = gerar_hash_senha(senha)
 
     def verificar_senha(self, senha):
         return check_password_hash(self.senha, senha)
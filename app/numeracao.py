@@ -0,0 +1,134 @@
+"""
+Numeração dos contratos (`numero_contrato`, seis dígitos).
+
+Cada banco usa o que tem:
+
+    postgresql -> sequence `contrato_numero_seq`: nextval não bloqueia ninguém e
+                  um bloco de N números sai em um SELECT (generate_series)
+    outros     -> linha "contrato" da tabela `contadores`, incrementada com um
+                  UPDATE ... RETURNING; o UPDATE trava a linha (no SQLite, o
+                  banco) até o fim da transação, então dois pedidos nunca
+                  recebem o mesmo número
+
+A reserva entra na transação da sessão: no contador, um rollback devolve os
+números; na sequence, eles viram um buraco na numeração. O migration
+`e2b7c9d4a613` cria a sequence a partir do maior número existente, e
+`preparar_numeracao` faz o mesmo ao subir o app (sequence criada por
+`db.create_all`, que começa em 1); o contador é criado no primeiro uso, também
+a partir do maior número.
+
+Contratos importados trazem o próprio número: `avancar_numeracao_contrato` leva a
+numeração para depois deles.
+"""
+from sqlalchemy import func, select, text, update
+from sqlalchemy.exc import IntegrityError
+from app.database import db
+from app.models.contador import Contador, SEQUENCIA_CONTRATO
+from app.models.contrato import Contrato
+
+CONTADOR_CONTRATO = "contrato"
+MAIOR_NUMERO_CONTRATO = 999999
+
+
+# Leva a sequence ao maior número numérico gravado, só quando ela está atrás dele.
+AJUSTAR_SEQUENCIA_POSTGRES = (
+    "SELECT setval('contrato_numero_seq', m.maior) FROM contrato_numero_seq s, "
+    "(SELECT max(numero_contrato::bigint) AS maior FROM contrato WHERE numero_contrato ~ '^[0-9]+$') m "
+    "WHERE m.maior > s.last_value OR (m.maior = s.last_value AND NOT s.is_called)"
+)
+
+
+def preparar_numeracao(app):
+    """
+    No PostgreSQL, garante que `contrato_numero_seq` continue do maior número de
+    contrato existente: num banco que já tinha contratos, a sequence criada por
+    `db.create_all` entregaria 000001, 000002... Só escreve no banco quando ela está atrás.
+    """
+    if db.engine.dialect.name != "postgresql":
+        return
+    try:
+        with db.engine.begin() as conexao:
+            conexao.exec_driver_sql(AJUSTAR_SEQUENCIA_POSTGRES)
+    except Exception as e:
+        app.logger.warning(f"Não foi possível ajustar a sequence dos números de contrato: {e}")
+
+
+def formatar_numero_contrato(numero):
+    if numero > MAIOR_NUMERO_CONTRATO:
+        raise RuntimeError(f"Numeração de contratos esgotada (máximo {MAIOR_NUMERO_CONTRATO}).")
+    return f"{numero:06d}"
+
+
+def _dialeto():
+    return db.session.get_bind().dialect
+
+
+def _maior_numero_existente():
+    # Só no primeiro uso do contador. Números importados podem vir sem zeros à esquerda ("99" > "000100"
+    # como texto), por isso o maior é calculado como inteiro.
+    numeros = db.session.execute(select(Contrato.numero_contrato)).scalars()
+    return max((int(numero) for numero in numeros if numero.isdigit()), default=0)
+
+
+def _criar_contador(nome):
+    linha = {"nome": nome, "valor": _maior_numero_existente()}
+    if _dialeto().name in ("postgresql", "sqlite"):
+        if _dialeto().name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+        else:
+            from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+        db.session.execute(insert_dialeto(Contador).values(linha).on_conflict_do_nothing(index_elements=["nome"]))
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(Contador.__table__.insert().values(linha))
+    except IntegrityError:
+        pass  # outro processo criou o contador antes
+
+
+def _reservar_no_contador(nome, quantidade):
+    comando = update(Contador).where(Contador.nome == nome).values(valor=Contador.valor + quantidade)
+    if _dialeto().update_returning:
+        ultimo = db.session.execute(comando.returning(Contador.valor)).scalar()
+    elif db.session.execute(comando).rowcount:
+        ultimo = db.session.execute(select(Contador.valor).where(Contador.nome == nome)).scalar()
+    else:
+        ultimo = None
+    if ultimo is None:
+        _criar_contador(nome)
+        return _reservar_no_contador(nome, quantidade)
+    return list(range(ultimo - quantidade + 1, ultimo + 1))
+
+
+def reservar_numeros_contrato(quantidade=1):
+    """
+    Reserva `quantidade` números de contrato numa ida ao banco e os devolve
+    formatados ("000123"), em ordem crescente. No contador o bloco é contínuo; na
+    sequence pode intercalar com reservas simultâneas, mas nunca se repete.
+    """
+    if quantidade < 1:
+        return []
+    if _dialeto().name == "postgresql":
+        numeros = db.session.execute(
+            select(SEQUENCIA_CONTRATO.next_value()).select_from(func.generate_series(1, quantidade))
+        ).scalars().all()
+    else:
+        numeros = _reservar_no_contador(CONTADOR_CONTRATO, quantidade)
+    return [formatar_numero_contrato(numero) for numero in sorted(numeros)]
+
+
+def avancar_numeracao_contrato(numeros):
+    """Garante que os próximos números reservados sejam maiores que os `numeros` (contratos já gravados)."""
+    maior = max((int(numero) for numero in numeros if str(numero).isdigit()), default=0)
+    if not maior:
+        return
+    if _dialeto().name == "postgresql":
+        db.session.execute(text(
+            "SELECT setval('contrato_numero_seq', :maior) FROM contrato_numero_seq "
+            "WHERE last_value < :maior OR (last_value = :maior AND NOT is_called)"
+        ), {"maior": maior})
+        return
+    # Sem a linha do contador não há o que avançar: ao ser criado, ele parte do maior número gravado.
+    db.session.execute(
+        update(Contador).where(Contador.nome == CONTADOR_CONTRATO, Contador.valor < maior).values(valor=maior)
+    )
@@ -0,0 +1,115 @@
+from flask import current_app, jsonify, Response, stream_with_context
+import json
+
+
+def ler_paginacao(args, limite_padrao=None, limite_maximo=None, conversor=str):
+    """
+    Lê `after` (cursor) e `limit` da query string. Sem `limit`, usa
+    `limite_padrao`; o valor nunca passa de `limite_maximo`. O cursor já sai
+    convertido por `conversor` (int para ids): um cursor inválido vira
+    ValueError aqui, antes da consulta (ou do stream) começar.
+    """
+    after = args.get("after") or None
+    if after is not None:
+        try:
+            after = conversor(after)
+        except (TypeError, ValueError):
+            raise ValueError("Cursor 'after' inválido.")
+    limite = args.get("limit", type=int) or limite_padrao
+    if limite is not None and limite <= 0:
+        raise ValueError("O parâmetro 'limit' deve ser maior que zero.")
+    if limite is not None and limite_maximo:
+        limite = min(limite, limite_maximo)
+    return after, limite
+
+
+def ler_campos(args, campos_validos):
+    """Lê `fields` (separados por vírgula); None quando não informado."""
+    fields = args.get("fields")
+    if not fields:
+        return None
+    campos = [c.strip() for c in fields.split(",") if c.strip()]
+    invalidos = [c for c in campos if c not in campos_validos]
+    if invalidos:
+        raise ValueError(f"Campos inválidos em 'fields': {', '.join(invalidos)}.")
+    return campos
+
+
+def ler_listagem(args, campos_validos, chave, conversor=str):
+    """
+    Parâmetros comuns das rotas de listagem: (after, limite, campos). A `chave`
+    do cursor sempre entra na projeção para que a próxima página possa ser pedida;
+    `conversor` é o tipo dela (ver `ler_paginacao`).
+    Em modo stream não há limite padrão: a memória já fica constante.
+    """
+    stream = quer_stream(args)
+    after, limite = ler_paginacao(
+        args,
+        limite_padrao=None if stream else current_app.config.get("LISTAGEM_LIMITE_PADRAO"),
+        limite_maximo=None if stream else current_app.config.get("LISTAGEM_LIMITE_MAXIMO"),
+        conversor=conversor,
+    )
+    campos = ler_campos(args, campos_validos)
+    if campos and chave not in campos:
+        campos = [chave] + campos
+    return after, limite, campos
+
+
+def paginar(query, coluna, after=None, limite=None, conversor=str):
+    """Aplica paginação por cursor (keyset) ordenando pela coluna única `coluna`."""
+    if after is not None:
+        try:
+            after = conversor(after)
+        except (TypeError, ValueError):
+            raise ValueError("Cursor 'after' inválido.")
+        query = query.filter(coluna > after)
+    query = query.order_by(coluna)
+    if limite:
+        query = query.limit(limite)
+    return query
+
+
+def quer_stream(args):
+    """Retorna 'json', 'ndjson' ou None conforme o parâmetro `stream`."""
+    stream = (args.get("stream") or "").lower()
+    if stream in ("", "0", "false"):
+        return None
+    if stream == "ndjson":
+        return "ndjson"
+    return "json"
+
+
+def proximo_cursor(itens, limite, chave):
+    """Cursor da próxima página, ou None quando a página veio incompleta."""
+    if not limite or len(itens) < limite:
+        return None
+    return str(itens[-1][chave])
+
+
+def resposta_listagem(itens, limite, chave):
+    """jsonify da página com o cursor da próxima em X-Proximo-Cursor."""
+    resposta = jsonify(itens)
+    cursor = proximo_cursor(itens, limite, chave)
+    if cursor:
+        resposta.headers["X-Proximo-Cursor"] = cursor
+    return resposta
+
+
+def gerar_json_array(itens):
+    """Serializa um iterável de dicts como array JSON, item a item."""
+    yield "["
+    for i, item in enumerate(itens):
+        yield ("," if i else "") + json.dumps(item, ensure_ascii=False, separators=(",", ":"), default=str)
+    yield "]"
+
+
+def gerar_ndjson(itens):
+    for item in itens:
+        yield json.dumps(item, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+
+
+def resposta_stream(itens, formato):
+    """Response em streaming (array JSON em chunks ou NDJSON) mantendo o contexto da requisição."""
+    if formato == "ndjson":
+        return Response(stream_with_context(gerar_ndjson(itens)), mimetype="application/x-ndjson")
+    return Response(stream_with_context(gerar_json_array(itens)), mimetype="application/json")
@@ -1,7 +1,12 @@
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, current_app, request, jsonify, Response, stream_with_context, url_for
 from flask_cors import cross_origin
 from functools import wraps
-from app.controllers import acordo_controller
+from app.controllers import acordo_controller, oferta_controller, boleto_job_controller, envio_boleto_controller
+from app.models.acordo import Acordo
+from app.armazenamento import resposta_pdf_boleto
+from app.lote import ler_itens, status_http
+from app.paginacao import ler_paginacao, ler_listagem, quer_stream, resposta_listagem, resposta_stream
+import json
 import traceback
 
 
@@ -30,11 +35,32 @@ def criar():
     return jsonify(resultado), 201
 
 
+@acordo_bp.route("/lote", methods=["POST"])
+@safe_route
+def criar_lote():
+    """Cria vários acordos de uma vez; devolve o resultado de cada item (201, 207 se só parte, 400 se nenhum)."""
+    try:
+        itens = ler_itens(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    resultado = acordo_controller.criar_acordos_lote(itens)
+    return jsonify(resultado), status_http(resultado)
+
+
 @acordo_bp.route("/", methods=["GET"])
 @safe_route
 def listar():
-    acordos = acordo_controller.listar_acordos()
-    return jsonify([acordo.to_dict() for acordo in acordos]), 200
+    try:
+        after, limite, campos = ler_listagem(request.args, Acordo.CAMPOS, "id", int)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+
+    formato = quer_stream(request.args)
+    if formato:
+        return resposta_stream(acordo_controller.iterar_acordos(after, limite, campos), formato)
+
+    acordos = acordo_controller.listar_acordos(after, limite, campos)
+    return resposta_listagem(acordos, limite, "id"), 200
 
 
 @acordo_bp.route("/<int:id>", methods=["GET"])
@@ -57,12 +83,18 @@ def obter_por_contrato(numero_contrato):
 @acordo_bp.route('/buscar_por_status/<status>', methods=['GET'])
 def clientes_por_acordo_route(status):
     try:
-        clientes = acordo_controller.cliente_por_acordo(status)
-        return jsonify(clientes), 200
+        conversor = str if acordo_controller.chave_cursor_cliente_por_acordo(status) == "contrato_numero" else int
+        after, limite = ler_paginacao(request.args, conversor=conversor)
+        formato = quer_stream(request.args)
+        if formato:
+            return resposta_stream(acordo_controller.iterar_cliente_por_acordo(status, after, limite), formato)
+
+        clientes = acordo_controller.cliente_por_acordo(status, after, limite)
+        return resposta_listagem(clientes, limite, acordo_controller.chave_cursor_cliente_por_acordo(status)), 200
     except ValueError as e:
         return jsonify({"erro": str(e)}), 400
     except Exception as e:
-        print("Erro:", e)
+        current_app.logger.exception(f"Erro ao listar clientes por acordo: {e}")
         return jsonify({"erro": "Erro interno no servidor"}), 500
 
 @acordo_bp.route('/buscar_por_cliente/<int:cliente_id>', methods=['GET'])
@@ -122,6 +154,35 @@ def simular_acordo():
     return jsonify(resultado), 200
 
 
+@acordo_bp.route("/simular/lote", methods=["POST"])
+@cross_origin()
+@safe_route
+def simular_acordos_lote():
+    """
+    Recebe uma lista de simulações (ou uma dívida + quantidades_parcelas) e
+    devolve os resultados em NDJSON, uma linha por simulação, à medida que são calculados.
+    """
+    try:
+        payloads = acordo_controller.payloads_simulacao_lote(request.get_json())
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+
+    linhas = (
+        json.dumps(resultado, ensure_ascii=False) + "\n"
+        for resultado in acordo_controller.simular_acordos_lote(payloads)
+    )
+    return Response(stream_with_context(linhas), mimetype="application/x-ndjson")
+
+
+@acordo_bp.route("/ofertas/<string:numero_contrato>", methods=["GET"])
+@safe_route
+def ofertas_contrato(numero_contrato):
+    matriz = oferta_controller.matriz_ofertas(numero_contrato)
+    if not matriz:
+        return jsonify({"erro": "Contrato não encontrado"}), 404
+    return jsonify(matriz), 200
+
+
 # ------------------- Boletos -------------------
 
 @acordo_bp.route("/info_boleto/<int:acordo_id>", methods=["GET"])
@@ -134,29 +195,115 @@ def info_boleto(acordo_id):
 @acordo_bp.route("/gerar_boleto/<int:acordo_id>", methods=["GET"])
 @safe_route
 def gerar_boleto(acordo_id):
-    pdf, nome_arquivo, boleto_id = acordo_controller.gerar_boleto(acordo_id)
-    response = make_response(pdf)
-    response.headers["Content-Type"] = "application/pdf"
-    response.headers["Content-Disposition"] = f"inline; filename={nome_arquivo}"
-    response.headers["X-Boleto-Id"] = str(boleto_id)
+    boleto, arquivo = acordo_controller.gerar_boleto(acordo_id)
+    return resposta_pdf_boleto(boleto, arquivo)
+
+
+@acordo_bp.route("/gerar_boleto/<int:acordo_id>/async", methods=["POST"])
+@safe_route
+def gerar_boleto_async(acordo_id):
+    job = boleto_job_controller.criar_job(acordo_id)
+    if not job:
+        return jsonify({"erro": "Acordo não encontrado"}), 404
+    response = jsonify(job)
+    response.status_code = 202
+    response.headers["Location"] = url_for("acordos.status_job_boleto", job_id=job["id"])
+    return response
+
+
+@acordo_bp.route("/boletos/jobs/<string:job_id>", methods=["GET"])
+@safe_route
+def status_job_boleto(job_id):
+    job = boleto_job_controller.obter_job(job_id)
+    if not job:
+        return jsonify({"erro": "Job não encontrado"}), 404
+    return jsonify(job), 200
+
+
+@acordo_bp.route("/boletos/lote", methods=["POST"])
+@safe_route
+def gerar_boletos_lote():
+    data = request.get_json() or {}
+    try:
+        lote = boleto_job_controller.criar_lote(
+            data.get("vencimento_inicio"), data.get("vencimento_fim"),
+            data.get("status"), bool(data.get("regerar", False))
+        )
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    if not lote["lote_id"]:
+        return jsonify(lote), 200
+    response = jsonify(lote)
+    response.status_code = 202
+    response.headers["Location"] = url_for("acordos.progresso_lote_boletos", lote_id=lote["lote_id"])
     return response
 
 
+@acordo_bp.route("/boletos/lotes/<string:lote_id>", methods=["GET"])
+@safe_route
+def progresso_lote_boletos(lote_id):
+    progresso = boleto_job_controller.progresso_lote(lote_id)
+    if not progresso:
+        return jsonify({"erro": "Lote não encontrado"}), 404
+    return jsonify(progresso), 200
+
+
 @acordo_bp.route("/enviar_boleto/<int:acordo_id>", methods=["POST"])
 @safe_route
 def enviar_boleto(acordo_id):
     try:
-        resultado = acordo_controller.enviar_boleto(acordo_id)
-        return jsonify(resultado), 200
-    except Exception as e:
-        traceback.print_exc()
+        envio = envio_boleto_controller.enfileirar_envio(acordo_id)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    if not envio:
+        return jsonify({"erro": "Acordo não encontrado"}), 404
+    response = jsonify(envio)
+    response.status_code = 202
+    response.headers["Location"] = url_for("acordos.status_envio_boleto", envio_id=envio["id"])
+    return response
+
+
+@acordo_bp.route("/boletos/envios/<string:envio_id>", methods=["GET"])
+@safe_route
+def status_envio_boleto(envio_id):
+    envio = envio_boleto_controller.obter_envio(envio_id)
+    if not envio:
+        return jsonify({"erro": "Envio não encontrado"}), 404
+    return jsonify(envio), 200
+
+
+@acordo_bp.route("/boletos/envios/lote", methods=["POST"])
+@safe_route
+def enviar_boletos_lote():
+    data = request.get_json() or {}
+    try:
+        lote = envio_boleto_controller.criar_lote_envios(
+            data.get("vencimento_inicio"), data.get("vencimento_fim"),
+            data.get("status"), bool(data.get("reenviar", False))
+        )
+    except ValueError as e:
         return jsonify({"erro": str(e)}), 400
+    if not lote["lote_id"]:
+        return jsonify(lote), 200
+    response = jsonify(lote)
+    response.status_code = 202
+    response.headers["Location"] = url_for("acordos.progresso_lote_envios", lote_id=lote["lote_id"])
+    return response
+
+
+@acordo_bp.route("/boletos/envios/lotes/<string:lote_id>", methods=["GET"])
+@safe_route
+def progresso_lote_envios(lote_id):
+    progresso = envio_boleto_controller.progresso_lote_envios(lote_id)
+    if not progresso:
+        return jsonify({"erro": "Lote não encontrado"}), 404
+    return jsonify(progresso), 200
 
 
 @acordo_bp.route("/boletos/<int:acordo_id>", methods=["GET"])
 @safe_route
 def listar_boletos(acordo_id):
-    boletos = acordo_controller.listar_boletos_por_pasta(acordo_id)
+    boletos = acordo_controller.listar_boletos_do_acordo(acordo_id)
     return jsonify({
         "acordo_id": acordo_id,
         "boletos": boletos
@@ -169,8 +316,12 @@ def deletar_boletos():
     return acordo_controller.deletar_todos_boletos()
 
 @acordo_bp.route("/codigobr/<int:acordo_id>", methods=["GET"])
+@safe_route
 def gerar_code(acordo_id):
-    codigo_barras, linha_digitavel = acordo_controller.gerar_linha_digitavel(acordo_id)
+    codigos = acordo_controller.gerar_linha_digitavel(acordo_id)
+    if not codigos:
+        return jsonify({"erro": "Acordo não encontrado"}), 404
+    codigo_barras, linha_digitavel = codigos
     return jsonify({
         "codigo_barras": codigo_barras,
         "linha_digitavel": linha_digitavel
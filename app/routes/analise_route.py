@@ -0,0 +1,42 @@
+from flask import Blueprint, request, jsonify
+from app.controllers import analise_controller
+
+analise_bp = Blueprint("analises", __name__)
+
+
+@analise_bp.route("/aging", methods=["GET"])
+def aging():
+    """Carteira por faixa de atraso (0-59, 60-99, 100-150 e 151+ dias)."""
+    try:
+        filtros = analise_controller.ler_filtros(request.args)
+        referencia = analise_controller.ler_referencia(request.args)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    return jsonify(analise_controller.aging(referencia, **filtros)), 200
+
+
+@analise_bp.route("/filiais", methods=["GET"])
+def filiais():
+    """Totais e conversão em acordos por filial."""
+    try:
+        filtros = analise_controller.ler_filtros(request.args)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    return jsonify(analise_controller.totais_por_filial(**filtros)), 200
+
+
+@analise_bp.route("/conversao", methods=["GET"])
+def conversao():
+    """Contratos por situação do último acordo, taxa de conversão e de recuperação."""
+    try:
+        filtros = analise_controller.ler_filtros(request.args)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    return jsonify(analise_controller.conversao(**filtros)), 200
+
+
+@analise_bp.route("/atualizar", methods=["POST"])
+def atualizar():
+    """Recalcula os dias pendentes do resumo; com ?completo=1, o resumo inteiro."""
+    completo = request.args.get("completo", "").lower() in ("1", "true", "sim")
+    return jsonify(analise_controller.atualizar(completo)), 200
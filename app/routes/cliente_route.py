@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
 from app.controllers.cliente_controller import (
-    criar_cliente, listar_clientes, obter_cliente, 
-    atualizar_cliente, deletar_cliente, buscar_clientes_por_cpf, login_cliente
+    criar_cliente, listar_clientes, iterar_clientes, obter_cliente, 
+    atualizar_cliente, deletar_cliente, buscar_clientes_por_cpf, buscar_clientes, login_cliente
 )
+from app.models.cliente import Cliente
+from app.paginacao import ler_campos, ler_listagem, quer_stream, resposta_listagem, resposta_stream
 
 cliente_bp = Blueprint('cliente_bp', __name__)
 
@@ -21,7 +23,30 @@ def rota_listar_clientes():
     if cpf:
         return jsonify(buscar_clientes_por_cpf(cpf)), 200
     
-    return jsonify(listar_clientes()), 200
+    try:
+        after, limite, campos = ler_listagem(request.args, Cliente.CAMPOS, "id", int)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+
+    formato = quer_stream(request.args)
+    if formato:
+        return resposta_stream(iterar_clientes(after, limite, campos), formato)
+
+    return resposta_listagem(listar_clientes(after, limite, campos), limite, "id"), 200
+
+@cliente_bp.route('/clientes/busca', methods=['GET'])
+def rota_buscar_clientes():
+    try:
+        pagina = request.args.get('page', 1, type=int)
+        clientes, tem_mais = buscar_clientes(request.args.get('q'), pagina, request.args.get('limit', type=int),
+                                             ler_campos(request.args, Cliente.CAMPOS))
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+
+    resposta = jsonify(clientes)
+    if tem_mais:
+        resposta.headers["X-Proxima-Pagina"] = str(pagina + 1)
+    return resposta, 200
 
 @cliente_bp.route('/clientes/<int:id>', methods=['GET'])
 def rota_obter_cliente(id):
@@ -1,5 +1,7 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from app.controllers import contrato_controller
+from app.lote import ler_itens, status_http
+from app.paginacao import ler_campos, ler_listagem, quer_stream, resposta_listagem, resposta_stream
 
 contrato_bp = Blueprint("contratos", __name__)
 
@@ -20,16 +22,32 @@ def criar():
     except Exception as e:
         return jsonify({"erro": "Erro ao criar contrato."}), 500
 
+@contrato_bp.route("/lote", methods=["POST"])
+def criar_lote():
+    """Cria vários contratos de uma vez; devolve o resultado de cada item (201, 207 se só parte, 400 se nenhum)."""
+    try:
+        itens = ler_itens(request.get_json(silent=True))
+        resultado = contrato_controller.criar_contratos_lote(itens)
+        return jsonify(resultado), status_http(resultado)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        current_app.logger.exception(f"Erro ao criar contratos em lote: {e}")
+        return jsonify({"erro": "Erro ao criar contratos."}), 500
+
 @contrato_bp.route("/", methods=["GET"])
 def listar():
-    contratos = contrato_controller.listar_contratos()
-    return jsonify([{
-        "numero_contrato": c.numero_contrato,
-        "cliente_id": c.cliente_id,
-        "vencimento": c.vencimento.strftime("%Y-%m-%d"),
-        "valor_total": c.valor_total,
-        "filial": c.filial
-    } for c in contratos])
+    try:
+        after, limite, campos = ler_listagem(request.args, contrato_controller.CAMPOS_CONTRATO, "numero_contrato")
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+
+    formato = quer_stream(request.args)
+    if formato:
+        return resposta_stream(contrato_controller.iterar_contratos(after, limite, campos), formato)
+
+    contratos = contrato_controller.listar_contratos(after, limite, campos)
+    return resposta_listagem(contratos, limite, "numero_contrato")
 
 @contrato_bp.route("/<string:numero_contrato>", methods=["GET"])
 def obter(numero_contrato):
@@ -81,7 +99,8 @@ def buscar_por_cliente(cliente_id):
 @contrato_bp.route("/buscar_por_filial/<string:filial>", methods=["GET"])
 def buscar_por_filial(filial):
     try:
-        contratos = contrato_controller.buscar_contratos_por_filial(filial)
+        exata = request.args.get("exata", "").lower() in ("1", "true", "sim")
+        contratos = contrato_controller.buscar_contratos_por_filial(filial, exata)
         if not contratos:
             return jsonify({"error": "Nenhum contrato encontrado para esta filial"}), 404
 
@@ -97,7 +116,7 @@ def buscar_por_filial(filial):
     except ValueError as e:
         return jsonify({"erro": str(e)}), 400
     except Exception as e:
-        print("Erro ao buscar contratos por filial:", e)
+        current_app.logger.exception(f"Erro ao buscar contratos por filial: {e}")
         return jsonify({"erro": "Erro interno no servidor"}), 500
     
 @contrato_bp.route("/buscar_por_valor", methods=["GET"])
@@ -106,7 +125,8 @@ def buscar_por_valor():
         valor_minimo = request.args.get("min")
         valor_maximo = request.args.get("max")
 
-        contratos = contrato_controller.buscar_contratos_por_valor(valor_minimo, valor_maximo)
+        campos = ler_campos(request.args, contrato_controller.CAMPOS_CONTRATO)
+        contratos = contrato_controller.buscar_contratos_por_valor(valor_minimo, valor_maximo, campos)
         if not contratos:
             return jsonify({"error": "Nenhum contrato encontrado dentro do intervalo especificado"}), 404
 
@@ -114,7 +134,7 @@ def buscar_por_valor():
     except ValueError as e:
         return jsonify({"erro": str(e)}), 400
     except Exception as e:
-        print("Erro ao buscar contratos por valor:", e)
+        current_app.logger.exception(f"Erro ao buscar contratos por valor: {e}")
         return jsonify({"erro": "Erro interno no servidor"}), 500
 
 
@@ -129,7 +149,7 @@ def contratos_por_vencimento_route():
     except ValueError as e:
         return jsonify({"erro": str(e)}), 400
     except Exception as e:
-        print("Erro:", e)
+        current_app.logger.exception(f"Erro ao buscar contratos por vencimento: {e}")
         return jsonify({"erro": "Erro interno no servidor"}), 500
 
     
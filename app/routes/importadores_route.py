@@ -1,97 +1,111 @@
 import os
-from flask import Blueprint, jsonify, current_app
-from ..controllers.cliente_controller import importar_clientes_docx
-from ..controllers.contrato_controller import importar_contratos_docx
-from ..controllers.usuario_controller import importar_usuarios_docx
+from flask import Blueprint, jsonify, request, url_for
+from ..controllers import importacao_controller
 
 import_bp = Blueprint("import_bp", __name__)
 
-ja_importado = False
-
-@import_bp.route("/importar-exemplos")
-def importar_exemplos():
-    global ja_importado
-
-    if ja_importado:
-        return jsonify({"mensagem": "Os dados já foram importados, não é possível rodar novamente."}), 403
-
-    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    clientes_path = os.path.join(root_dir, "importadores/clientes_exemplo.docx")
-    contratos_path = os.path.join(root_dir, "importadores/contratos_exemplo.docx")
-    usuarios_path = os.path.join(root_dir, "importadores/usuarios_exemplo.docx")
-
-    if not os.path.isfile(clientes_path) or not os.path.isfile(contratos_path) or not os.path.isfile(usuarios_path):
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+EXEMPLOS = {
+    "clientes": os.path.join(ROOT_DIR, "importadores/clientes_exemplo.docx"),
+    "contratos": os.path.join(ROOT_DIR, "importadores/contratos_exemplo.docx"),
+    "usuarios": os.path.join(ROOT_DIR, "importadores/usuarios_exemplo.docx"),
+}
+
+
+def _resposta_job(job, criado):
+    response = jsonify(job)
+    response.status_code = 202 if criado else 200
+    response.headers["Location"] = url_for("import_bp.status_importacao", job_id=job["id"])
+    return response
+
+
+def _importar_exemplos(entidades, mensagem):
+    """
+    Enfileira a importação das planilhas de exemplo. A chave de idempotência é
+    fixa por planilha, então chamar de novo (em qualquer worker) devolve os
+    mesmos jobs em vez de importar duas vezes; uma planilha cuja importação
+    terminou em erro é enfileirada de novo.
+    """
+    caminhos = {entidade: EXEMPLOS[entidade] for entidade in entidades}
+    if not all(os.path.isfile(caminho) for caminho in caminhos.values()):
         return jsonify({"erro": "Arquivos de exemplo não encontrados no servidor"}), 404
 
+    jobs = {}
+    criados = False
     try:
-        importar_clientes_docx(clientes_path, current_app)
-        importar_contratos_docx(contratos_path, current_app)
-        importar_usuarios_docx(usuarios_path, current_app)
+        for entidade, caminho in caminhos.items():
+            # Contratos dependem dos clientes: o worker só começa depois que a importação deles terminar.
+            depois_de = jobs["clientes"]["id"] if entidade == "contratos" and "clientes" in jobs else None
+            jobs[entidade], criado = importacao_controller.criar_job_importacao(
+                entidade, caminho, "docx", nome_arquivo=os.path.basename(caminho),
+                chave=f"exemplo:{entidade}", depois_de=depois_de
+            )
+            criados = criados or criado
+    except importacao_controller.FilaDeImportacaoCheia as e:
+        return jsonify({"erro": str(e)}), 429, {"Retry-After": "60"}
     except Exception as e:
-        return jsonify({"erro": f"Erro durante a importação: {str(e)}"}), 500
+        return jsonify({"erro": f"Erro ao enfileirar a importação: {str(e)}"}), 500
+
+    if not criados:
+        mensagem = "Os dados já foram importados (ou estão na fila); acompanhe pelos jobs."
+    return jsonify({
+        "mensagem": mensagem,
+        "jobs": {entidade: url_for("import_bp.status_importacao", job_id=job["id"]) for entidade, job in jobs.items()},
+        "status": {entidade: job["status"] for entidade, job in jobs.items()},
+    }), 202 if criados else 200
 
-    ja_importado = True
-    return jsonify({"mensagem": "Importação concluída com sucesso!"})
+@import_bp.route("/importar-exemplos")
+def importar_exemplos():
+    return _importar_exemplos(["clientes", "contratos", "usuarios"], "Importação dos exemplos enfileirada.")
 
 @import_bp.route("/importar-exemplo-cliente")
 def importar_exemplo_cliente():
-    global ja_importado
-
-    if ja_importado:
-        return jsonify({"mensagem": "Os dados já foram importados, não é possível rodar novamente."}), 403
-
-    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    clientes_path = os.path.join(root_dir, "importadores/clientes_exemplo.docx")
-
-    if not os.path.isfile(clientes_path):
-        return jsonify({"erro": "Arquivo de exemplo de clientes não encontrado no servidor"}), 404
-
-    try:
-        importar_clientes_docx(clientes_path, current_app)
-    except Exception as e:
-        return jsonify({"erro": f"Erro durante a importação: {str(e)}"}), 500
-
-    ja_importado = True
-    return jsonify({"mensagem": "Importação do exemplo de cliente concluída com sucesso!"})
+    return _importar_exemplos(["clientes"], "Importação do exemplo de cliente enfileirada.")
 
 @import_bp.route("/importar-exemplo-contratos")
 def importar_exemplo_contratos():
-    global ja_importado
-
-    if ja_importado:
-        return jsonify({"mensagem": "Os dados já foram importados, não é possível rodar novamente."}), 403
-
-    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    contratos_path = os.path.join(root_dir, "importadores/contratos_exemplo.docx")
-
-    if not os.path.isfile(contratos_path):
-        return jsonify({"erro": "Arquivo de exemplo de contratos não encontrado no servidor"}), 404
-
-    try:
-        importar_contratos_docx(contratos_path, current_app)
-    except Exception as e:
-        return jsonify({"erro": f"Erro durante a importação: {str(e)}"}), 500
-
-    ja_importado = True
-    return jsonify({"mensagem": "Importação do exemplo de contratos concluída com sucesso!"})
+    return _importar_exemplos(["contratos"], "Importação do exemplo de contratos enfileirada.")
 
 @import_bp.route("/importar-exemplo-usuarios")
 def importar_exemplo_usuarios():
-    global ja_importado
-
-    if ja_importado:
-        return jsonify({"mensagem": "Os dados já foram importados, não é possível rodar novamente."}), 403
-
-    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    usuarios_path = os.path.join(root_dir, "importadores/usuarios_exemplo.docx")
-
-    if not os.path.isfile(usuarios_path):
-        return jsonify({"erro": "Arquivo de exemplo de usuários não encontrado no servidor"}), 404
+    return _importar_exemplos(["usuarios"], "Importação do exemplo de usuários enfileirada.")
+
+@import_bp.route("/importar/<entidade>", methods=["POST"])
+def importar_arquivo(entidade):
+    """
+    Enfileira a importação de clientes, contratos ou usuários de um arquivo
+    enviado no campo `arquivo` (multipart) e responde 202 com o job; o progresso
+    fica em /importar/jobs/<id>. Formato pela extensão ou pelo campo `formato`
+    (csv, parquet, docx); CSV aceita `separador` (padrão ","). Com o cabeçalho
+    Idempotency-Key, reenviar a mesma requisição devolve o mesmo job.
+    """
+    if entidade not in importacao_controller.IMPORTADORES:
+        return jsonify({"erro": "Entidade não encontrada. Use clientes, contratos ou usuarios."}), 404
+
+    arquivo = request.files.get("arquivo")
+    if not arquivo:
+        return jsonify({"erro": "Envie o arquivo no campo 'arquivo'."}), 400
 
     try:
-        importar_usuarios_docx(usuarios_path, current_app)
+        formato = importacao_controller.formato_do_arquivo(arquivo.filename, request.form.get("formato"))
+        job, criado = importacao_controller.criar_job_importacao(
+            entidade, arquivo.stream, formato, nome_arquivo=arquivo.filename,
+            separador=request.form.get("separador") or ",",
+            tamanho_lote=request.form.get("lote", type=int),
+            chave=request.headers.get("Idempotency-Key"),
+        )
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except importacao_controller.FilaDeImportacaoCheia as e:
+        return jsonify({"erro": str(e)}), 429, {"Retry-After": "60"}
     except Exception as e:
-        return jsonify({"erro": f"Erro durante a importação: {str(e)}"}), 500
+        return jsonify({"erro": f"Erro ao enfileirar a importação: {str(e)}"}), 500
+
+    return _resposta_job(job, criado)
 
-    ja_importado = True
-    return jsonify({"mensagem": "Importação do exemplo de usuários concluída com sucesso!"})
+@import_bp.route("/importar/jobs/<string:job_id>", methods=["GET"])
+def status_importacao(job_id):
+    job = importacao_controller.obter_job_importacao(job_id)
+    if not job:
+        return jsonify({"erro": "Importação não encontrada"}), 404
+    return jsonify(job), 200
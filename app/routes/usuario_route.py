@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from app.controllers import usuario_controller
 from importadores.role_required import role_required
+from app.paginacao import ler_listagem, resposta_listagem
 
 usuario_bp = Blueprint("usuarios", __name__)
 
@@ -13,8 +14,12 @@ def criar_usuario():
 
 @usuario_bp.route("/listar", methods=["GET"])
 def listar_usuarios():
-    usuarios = usuario_controller.listar_usuarios()
-    return jsonify(usuarios), 200
+    try:
+        after, limite, campos = ler_listagem(request.args, usuario_controller.CAMPOS_USUARIO, "id", int)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    usuarios = usuario_controller.listar_usuarios(after, limite, campos)
+    return resposta_listagem(usuarios, limite, "id"), 200
 
 @usuario_bp.route("/<int:id>", methods=["GET"])
 def obter_usuario(id):
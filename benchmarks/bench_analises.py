@@ -0,0 +1,128 @@
+"""
+Benchmark dos relatórios de /analises: o que o BI fazia (baixar contratos e
+acordos pela listagem e agrupar em Python), o GROUP BY direto nas tabelas e a
+soma do resumo `analise_carteira`, mais o custo de manter o resumo.
+
+Uso:
+    python -m benchmarks.bench_analises [--contratos 1000000] [--consultas 20] [--novos 1000]
+
+Mede a montagem completa do resumo, cada relatório sobre ele e o recálculo
+incremental depois de criar `--novos` contratos e acordos pelo POST em lote.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from benchmarks.bench_busca_contratos import FILIAIS, popular_contratos
+from benchmarks.dados import preparar_app
+
+
+def popular_acordos(n, proporcao=0.4, bloco=50_000):
+    from app.database import db
+    from app.models.acordo import Acordo
+
+    rnd = random.Random(11)
+    status = ["em andamento", "concluido", "cancelado"]
+    hoje = datetime(2025, 1, 1)
+    numeros = [i for i in range(1, n + 1) if rnd.random() < proporcao]
+    for inicio in range(0, len(numeros), bloco):
+        db.session.execute(Acordo.__table__.insert(), [
+            {"contrato_id": f"{i:06d}", "vencimento": hoje, "data_criacao": hoje, "tipo_pagamento": "avista",
+             "qtd_parcelas": 1, "valor_total": round(rnd.uniform(50, 3000), 2), "desconto": 0, "juros": 0,
+             "status": rnd.choice(status)}
+            for i in numeros[inicio:inicio + bloco]
+        ])
+        db.session.commit()
+    return len(numeros)
+
+
+def aging_em_python(referencia):
+    """O que a planilha do BI fazia: todos os contratos e acordos pela listagem, agrupados em Python."""
+    from app.controllers import acordo_controller, contrato_controller
+
+    situacao = {}
+    for acordo in acordo_controller.iterar_acordos(campos=["id", "contrato_id", "status"]):
+        situacao[acordo["contrato_id"]] = acordo["status"]
+    faixas = defaultdict(lambda: [0, 0.0, 0])
+    for contrato in contrato_controller.iterar_contratos():
+        dias = max((referencia - datetime.strptime(contrato["vencimento"], "%Y-%m-%d").date()).days, 0)
+        faixa = "151+" if dias > 150 else "100-150" if dias >= 100 else "60-99" if dias >= 60 else "0-59"
+        faixas[faixa][0] += 1
+        faixas[faixa][1] += contrato["valor_total"]
+        faixas[faixa][2] += contrato["numero_contrato"] in situacao
+    return faixas
+
+
+def medir(nome, funcao, vezes=1):
+    inicio = time.perf_counter()
+    for _ in range(vezes):
+        resultado = funcao()
+    duracao = (time.perf_counter() - inicio) / vezes
+    print(f"  {nome:<50} {1000 * duracao:10.2f} ms")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contratos", type=int, default=1_000_000)
+    parser.add_argument("--consultas", type=int, default=20)
+    parser.add_argument("--novos", type=int, default=1_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        with app.app_context():
+            from app.database import db
+            from app.models.cliente import Cliente
+            from app.analises import consulta_resumo
+            from app.controllers import analise_controller
+
+            db.session.execute(Cliente.__table__.insert(), [
+                {"id": i, "nome": f"Cliente {i}", "cpf": f"{i:011d}", "telefone": "11999998888",
+                 "email": f"c{i}@ex.com", "data_nascimento": date(1990, 1, 1)}
+                for i in range(1, args.contratos // 3 + 2)
+            ])
+            db.session.commit()
+            popular_contratos(args.contratos)
+            acordos = popular_acordos(args.contratos)
+            db.session.execute(db.text("ANALYZE"))
+            referencia = date(2025, 6, 1)
+            print(f"  {args.contratos} contratos, {acordos} acordos, {len(FILIAIS)} filiais")
+
+            medir("aging: listagem + Python (antigo)", lambda: aging_em_python(referencia))
+            print("  GROUP BY direto nos contratos:")
+            app.extensions["analises"] = "direto"
+            medir("aging", lambda: analise_controller.aging(referencia))
+            medir("filiais", analise_controller.totais_por_filial)
+            medir("conversão", analise_controller.conversao)
+
+            app.extensions["analises"] = "resumo"
+            linhas = db.session.execute(db.select(db.func.count()).select_from(consulta_resumo().subquery())).scalar()
+            medir(f"montagem completa do resumo ({linhas} linhas)",
+                  lambda: analise_controller.atualizar(completo=True))
+            db.session.execute(db.text("ANALYZE"))
+            print(f"  Resumo (média de {args.consultas} consultas):")
+            medir("aging", lambda: analise_controller.aging(referencia), args.consultas)
+            medir("aging de uma filial", lambda: analise_controller.aging(referencia, FILIAIS[3]), args.consultas)
+            medir("filiais", analise_controller.totais_por_filial, args.consultas)
+            medir("conversão", analise_controller.conversao, args.consultas)
+
+            rnd = random.Random(3)
+            cliente = app.test_client()
+            novos = [{"cliente_id": rnd.randint(1, args.contratos // 3), "filial": rnd.choice(FILIAIS),
+                      "vencimento": (date(2023, 1, 1) + timedelta(days=rnd.randint(0, 3 * 365))).isoformat(),
+                      "valor_total": 100} for _ in range(args.novos)]
+            numeros = [item["numero_contrato"] for item in cliente.post("/contratos/lote", json=novos).get_json()["itens"]]
+            cliente.post("/acordos/lote", json=[{"contrato_id": numero, "tipo_pagamento": "avista", "valor_total": 80,
+                                                 "vencimento": "2025-01-01"} for numero in numeros])
+            pares = medir(f"recálculo incremental ({args.novos} contratos + acordos)",
+                         lambda: analise_controller.atualizar())["recalculados"]
+            print(f"    {pares} pares (dia, filial) recalculados")
+
+
+if __name__ == "__main__":
+    main()
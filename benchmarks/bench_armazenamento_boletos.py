@@ -0,0 +1,70 @@
+"""
+Benchmark da localização de PDFs de boletos: o layout antigo (boleto_<id>.pdf
+numa pasta só, achado com os.listdir) contra o armazenamento por conteúdo com
+índice na tabela `boletos`.
+
+Uso:
+    python -m benchmarks.bench_armazenamento_boletos [--linhas 100000] [--consultas 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.dados import preparar_app, popular
+
+
+def medir(nome, funcao, consultas):
+    inicio = time.perf_counter()
+    funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<26} {duracao * 1000 / consultas:10.3f} ms/consulta")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--bloco", type=int, default=5_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        app.config["PASTA_BOLETOS"] = os.path.join(pasta, "boletos")
+        pasta_antiga = os.path.join(pasta, "antigo")
+        os.makedirs(pasta_antiga)
+
+        with app.app_context():
+            from app.database import db
+            from app.models.acordo import Acordo, Boleto
+            from app.controllers import acordo_controller
+
+            popular(args.linhas)
+            ids = [i for (i,) in db.session.query(Acordo.id).order_by(Acordo.id)]
+            for inicio in range(0, len(ids), args.bloco):
+                bloco = ids[inicio:inicio + args.bloco]
+                acordo_controller.salvar_boletos({i: f"%PDF boleto {i}".encode() for i in bloco})
+                for i in bloco:
+                    with open(os.path.join(pasta_antiga, f"boleto_{i}.pdf"), "wb") as f:
+                        f.write(f"%PDF boleto {i}".encode())
+                db.session.expunge_all()
+            print(f"{len(ids)} PDFs")
+
+            amostra = ids[::max(1, len(ids) // args.consultas)][:args.consultas]
+
+            def por_pasta():
+                for acordo_id in amostra:
+                    nome = f"boleto_{acordo_id}.pdf"
+                    [arquivo for arquivo in os.listdir(pasta_antiga) if arquivo == nome]
+
+            def por_indice():
+                for acordo_id in amostra:
+                    boleto = Boleto.query.filter_by(acordo_id=acordo_id).first()
+                    acordo_controller.armazenamento_boletos().ler(boleto.caminho)
+
+            medir("os.listdir (antigo)", por_pasta, len(amostra))
+            medir("índice + shard", por_indice, len(amostra))
+
+
+if __name__ == "__main__":
+    main()
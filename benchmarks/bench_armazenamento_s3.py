@@ -0,0 +1,100 @@
+"""
+Benchmark (e conferência) do armazenamento de boletos em S3: `ArmazenamentoS3`
+com um cliente boto3 apontando para o S3 local do moto, passado por `cliente=`.
+Grava os PDFs de N acordos, baixa pelo GET /acordos/gerar_boleto/<id>, apaga um
+acordo e depois todos os boletos, conferindo o bucket a cada passo.
+
+Uso:
+    pip install boto3 "moto[s3]"
+    python -m benchmarks.bench_armazenamento_s3 [--linhas 2000] [--consultas 200]
+
+O moto responde em memória: os tempos medem o caminho do app e do boto3, não a rede.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.dados import preparar_app, popular
+
+BUCKET = "cobale-boletos-bench"
+PREFIXO = "boletos"
+
+
+def medir(nome, funcao, total):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<34} {total:>6} PDFs | {duracao * 1000 / total:8.3f} ms/PDF")
+    return resultado
+
+
+def objetos_no_bucket(cliente):
+    paginas = cliente.get_paginator("list_objects_v2").paginate(Bucket=BUCKET, Prefix=PREFIXO)
+    return {objeto["Key"] for pagina in paginas for objeto in pagina.get("Contents", [])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=2_000)
+    parser.add_argument("--consultas", type=int, default=200)
+    args = parser.parse_args()
+
+    import boto3
+    from moto import mock_aws
+
+    with tempfile.TemporaryDirectory() as pasta, mock_aws():
+        cliente = boto3.client("s3", region_name="us-east-1")
+        cliente.create_bucket(Bucket=BUCKET)
+
+        app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        with app.app_context():
+            from app.armazenamento import ArmazenamentoS3
+            from app.controllers import acordo_controller
+            from app.database import db
+            from app.models.acordo import Acordo, Boleto
+
+            armazenamento = ArmazenamentoS3(BUCKET, prefixo=PREFIXO, cliente=cliente)
+            app.extensions["boletos_armazenamento"] = armazenamento
+            popular(args.linhas)
+            ids = [i for (i,) in db.session.query(Acordo.id).order_by(Acordo.id)]
+            pdfs = {i: f"%PDF-1.4 boleto {i}".encode() for i in ids}
+
+            boletos = medir("salvar_boletos", lambda: acordo_controller.salvar_boletos(pdfs), len(ids))
+            chaves = {f"{PREFIXO}/{boleto.caminho}" for boleto in boletos.values()}
+            assert objetos_no_bucket(cliente) == chaves, "bucket diferente do índice em `boletos`"
+            assert armazenamento.caminho_local(boletos[ids[0]].caminho) is None
+            assert armazenamento.existe(boletos[ids[0]].caminho)
+            assert not armazenamento.existe("00/00/inexistente.pdf")
+            assert armazenamento.ler("00/00/inexistente.pdf") is None
+            db.session.expunge_all()
+
+        client = app.test_client()
+        amostra = ids[::max(1, len(ids) // args.consultas)][:args.consultas]
+
+        def baixar():
+            for acordo_id in amostra:
+                resposta = client.get(f"/acordos/gerar_boleto/{acordo_id}")
+                assert resposta.status_code == 200, resposta.status_code
+                assert resposta.data == pdfs[acordo_id], f"PDF do acordo {acordo_id} veio diferente"
+
+        medir("GET /acordos/gerar_boleto/<id>", baixar, len(amostra))
+
+        with app.app_context():
+            removido = db.session.get(Boleto, boletos[ids[0]].id)
+            chave = f"{PREFIXO}/{removido.caminho}"
+            assert acordo_controller.deletar_acordo(ids[0])
+            assert chave not in objetos_no_bucket(cliente), "deletar_acordo deixou o PDF no bucket"
+
+        resposta = medir("DELETE /acordos/boletos/deletar", lambda: client.delete("/acordos/boletos/deletar"),
+                         len(ids) - 1)
+        assert resposta.status_code == 200, resposta.get_json()
+        print(f"    {resposta.get_json()['mensagem']}")
+        with app.app_context():
+            assert Boleto.query.count() == 0
+        assert not objetos_no_bucket(cliente), "limpar deixou objetos no bucket"
+        print("  ida e volta no S3 conferida")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark da preparação de boletos em lote: `info_boleto` chamado acordo a acordo
+(como faz o GET /acordos/gerar_boleto) contra `infos_boleto` em blocos, e
+opcionalmente a execução completa do worker.
+
+Uso:
+    python -m benchmarks.bench_boletos_lote [--linhas 50000] [--bloco 25] [--renderizar --processos 4]
+
+Registra quantidade de queries e tempo de cada forma de carregar os dados. Com
+--renderizar, enfileira um lote com todos os acordos e mede o worker de ponta a ponta.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.dados import preparar_app, popular
+
+
+def medir(nome, funcao, contador, total):
+    from app.database import db
+
+    db.session.expire_all()
+    db.session.remove()
+    contador["queries"] = 0
+    inicio = time.perf_counter()
+    funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<28} {contador['queries']:>8} queries | {duracao:8.3f}s | {total / duracao:10.0f} boletos/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=50_000)
+    parser.add_argument("--bloco", type=int, default=25)
+    parser.add_argument("--amostra-antigo", type=int, default=5_000, help="acordos usados na medição acordo a acordo")
+    parser.add_argument("--renderizar", action="store_true", help="roda também o worker completo")
+    parser.add_argument("--processos", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        with app.app_context():
+            from sqlalchemy import event
+            from app.database import db
+            from app.models.acordo import Acordo
+            from app.controllers import acordo_controller, boleto_job_controller
+
+            popular(args.linhas)
+            ids = [i for (i,) in db.session.query(Acordo.id).order_by(Acordo.id)]
+            print(f"{len(ids)} acordos")
+
+            contador = {"queries": 0}
+
+            @event.listens_for(db.engine, "before_cursor_execute")
+            def contar(*_):
+                contador["queries"] += 1
+
+            amostra = ids[:args.amostra_antigo]
+            medir(f"info_boleto x{len(amostra)}", lambda: [acordo_controller.info_boleto(i) for i in amostra],
+                  contador, len(amostra))
+
+            def em_blocos():
+                for inicio in range(0, len(ids), args.bloco):
+                    acordo_controller.infos_boleto(ids[inicio:inicio + args.bloco])
+
+            medir(f"infos_boleto (bloco {args.bloco})", em_blocos, contador, len(ids))
+
+            if args.renderizar:
+                app.config["BOLETO_WORKER_BLOCO"] = args.bloco
+                app.config["PASTA_BOLETOS"] = os.path.join(pasta, "boletos")
+                lote = boleto_job_controller.criar_lote(status="em andamento")
+                print(f"worker: {lote['total']} boletos")
+                medir("worker completo", lambda: boleto_job_controller.executar_worker(args.processos, 0.1, uma_vez=True),
+                      contador, lote["total"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark da busca de clientes: os filtros antigos (`LIKE 'cpf%'` e
+`ILIKE '%nome%'`, que varrem a tabela) contra `buscar_clientes`, que usa o
+índice do CPF e o FTS5 (no SQLite) para o nome.
+
+Uso:
+    python -m benchmarks.bench_busca_clientes [--clientes 1000000] [--consultas 50]
+
+Os nomes combinam nomes comuns com sobrenomes sintéticos (sílabas com e sem
+acento), para ter a variedade de uma base real: cada busca casa com poucos
+clientes, e os filtros antigos, como em `buscar_clientes_por_*`, leem todos
+os resultados.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.dados import preparar_app
+
+NOMES = ["João", "José", "Maria", "Ana", "Antônio", "Francisco", "Márcia", "Luís", "Sebastião", "Conceição",
+         "Paulo", "Lúcia", "Carlos", "Fábio", "Patrícia", "Raimundo", "Cláudia", "Júlio", "Vitória", "Rogério"]
+SILABAS = ["ba", "bra", "ca", "cé", "da", "fa", "ga", "gui", "la", "lhe", "ma", "mó", "na", "nhã", "pa", "pe",
+           "ra", "ri", "sa", "sou", "ta", "to", "va", "vi", "za", "ção", "ão", "ês"]
+SOBRENOMES = sorted({(a + b + c).capitalize() for a in SILABAS for b in SILABAS for c in SILABAS[:12]})
+
+
+def popular_clientes(n, bloco=50_000):
+    from app.database import db
+    from app.models.cliente import Cliente
+
+    # CPF = i * k (mod 10^11), com k primo com 10^11 e perto de 10^11/φ: CPFs únicos e espalhados.
+    rnd = random.Random(42)
+    for inicio in range(1, n + 1, bloco):
+        db.session.execute(Cliente.__table__.insert(), [
+            {"id": i, "nome": f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}",
+             "cpf": f"{i * 61_803_398_873 % 10**11:011d}", "telefone": "11999998888", "email": f"c{i}@ex.com",
+             "data_nascimento": date(1990, 1, 1)}
+            for i in range(inicio, min(inicio + bloco, n + 1))
+        ])
+        db.session.commit()
+
+
+def medir(nome, funcao, termos):
+    inicio = time.perf_counter()
+    total = sum(len(funcao(termo)) for termo in termos)
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<34} {len(termos):>4} consultas | {1000 * duracao / len(termos):9.2f} ms/consulta | {total:>8} resultados")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clientes", type=int, default=1_000_000)
+    parser.add_argument("--consultas", type=int, default=50)
+    parser.add_argument("--limite", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        with app.app_context():
+            from app.models.cliente import Cliente
+            from app.controllers.cliente_controller import buscar_clientes
+
+            inicio = time.perf_counter()
+            popular_clientes(args.clientes)
+            print(f"  {args.clientes} clientes inseridos (com o índice FTS5 mantido pelos triggers) "
+                  f"em {time.perf_counter() - inicio:.1f}s")
+
+            rnd = random.Random(7)
+            cpfs = [f"{rnd.randrange(10**6):06d}" for _ in range(args.consultas)]
+            nomes = [rnd.choice(SOBRENOMES)[:5].lower() + " " + rnd.choice(NOMES)[:3] for _ in range(args.consultas)]
+            sobrenomes = [nome.split()[0] for nome in nomes]
+            limite = args.limite
+
+            print("  CPF (prefixo de 6 dígitos):")
+            medir("LIKE 'cpf%' (antigo)", lambda t: Cliente.query.filter(Cliente.cpf.like(f"{t}%")).all(), cpfs)
+            medir("buscar_clientes", lambda t: buscar_clientes(t, 1, limite)[0], cpfs)
+
+            print("  Nome (início do sobrenome, sem acento, e depois com o início do nome):")
+            medir("ILIKE '%nome%' (antigo)", lambda t: Cliente.query.filter(Cliente.nome.ilike(f"%{t}%")).all(),
+                  sobrenomes)
+            medir("buscar_clientes (só o sobrenome)", lambda t: buscar_clientes(t, 1, limite)[0], sobrenomes)
+            medir("buscar_clientes", lambda t: buscar_clientes(t, 1, limite)[0], nomes)
+            medir("buscar_clientes (página 10)", lambda t: buscar_clientes(t, 10, limite)[0], nomes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark das buscas de contratos por vencimento, valor e filial: as consultas
+antigas (`func.date(vencimento) == dia`, `BETWEEN`, `ILIKE '%filial%'`, sem
+índices) contra as de `contrato_controller`, com os índices
+(vencimento/valor/filial normalizada + número do contrato).
+
+Uso:
+    python -m benchmarks.bench_busca_contratos [--contratos 1000000] [--consultas 30]
+
+As consultas antigas rodam antes de criar os índices novos, na mesma base. O
+BETWEEN antigo perde os contratos do último dia (vencimento com hora), por isso
+a semana devolve menos resultados que a faixa semiaberta nova.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.dados import preparar_app
+
+INDICES = ["ix_contrato_vencimento", "ix_contrato_valor_total", "ix_contrato_filial_normalizada"]
+CIDADES = ["São Paulo", "Ribeirão Preto", "Maringá", "Goiânia", "Belém", "Florianópolis", "Jundiaí", "Niterói",
+           "Uberlândia", "Londrina", "Cuiabá", "São Luís", "Vitória", "Macapá", "Petrópolis", "Santarém"]
+FILIAIS = [f"{cidade} {regiao}" for cidade in CIDADES for regiao in ("Centro", "Norte", "Sul", "Leste", "Oeste")]
+
+
+def popular_contratos(n, bloco=50_000):
+    from app.busca import normalizar
+    from app.database import db
+    from app.models.contrato import Contrato
+
+    rnd = random.Random(42)
+    base = datetime(2023, 1, 1)
+    for inicio in range(1, n + 1, bloco):
+        linhas = []
+        for i in range(inicio, min(inicio + bloco, n + 1)):
+            filial = rnd.choice(FILIAIS)
+            linhas.append({
+                "numero_contrato": f"{i:06d}",
+                "cliente_id": rnd.randint(1, n // 3 + 1),
+                "vencimento": base + timedelta(days=rnd.randint(0, 3 * 365), minutes=rnd.randint(0, 24 * 60 - 1)),
+                "valor_total": round(rnd.uniform(50, 5000), 2),
+                "filial": filial,
+                "filial_normalizada": normalizar(filial),
+            })
+        db.session.execute(Contrato.__table__.insert(), linhas)
+        db.session.commit()
+
+
+def medir(nome, funcao, parametros):
+    inicio = time.perf_counter()
+    total = sum(len(funcao(*p)) for p in parametros)
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<44} {len(parametros):>3} consultas | {1000 * duracao / len(parametros):9.2f} ms/consulta | "
+          f"{total:>8} resultados")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contratos", type=int, default=1_000_000)
+    parser.add_argument("--consultas", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        with app.app_context():
+            from app.database import db
+            from app.models.contrato import Contrato
+            from app.controllers import contrato_controller
+
+            for nome in INDICES:
+                db.session.execute(db.text(f"DROP INDEX {nome}"))
+            popular_contratos(args.contratos)
+            db.session.execute(db.text("ANALYZE"))
+            print(f"  {args.contratos} contratos")
+
+            rnd = random.Random(7)
+            dias = [(datetime(2023, 1, 1) + timedelta(days=rnd.randint(0, 3 * 365 - 7))).strftime("%Y-%m-%d")
+                    for _ in range(args.consultas)]
+            semanas = [(d, (datetime.strptime(d, "%Y-%m-%d") + timedelta(days=6)).strftime("%Y-%m-%d")) for d in dias]
+            valores = [(v, v + 5) for v in (rnd.uniform(50, 4990) for _ in range(args.consultas))]
+            filiais = [(rnd.choice(FILIAIS),) for _ in range(args.consultas)]
+
+            def vencimento_antigo(inicio, fim=None):
+                query = Contrato.query
+                if fim:
+                    query = query.filter(Contrato.vencimento.between(datetime.strptime(inicio, "%Y-%m-%d"),
+                                                                     datetime.strptime(fim, "%Y-%m-%d")))
+                else:
+                    query = query.filter(db.func.date(Contrato.vencimento) == datetime.strptime(inicio, "%Y-%m-%d").date())
+                return [c.numero_contrato for c in query.all()]
+
+            def valor_antigo(minimo, maximo):
+                query = Contrato.query.filter(Contrato.valor_total >= minimo, Contrato.valor_total <= maximo)
+                return [contrato_controller.contrato_to_dict(c) for c in query.all()]
+
+            def filial_antiga(filial):
+                return Contrato.query.filter(Contrato.filial.ilike(f"%{filial}%")).all()
+
+            antigas = [
+                ("vencimento num dia", vencimento_antigo, [(d,) for d in dias]),
+                ("vencimento numa semana", vencimento_antigo, semanas),
+                ("valor numa faixa de R$ 5", valor_antigo, valores),
+                ("filial (nome completo)", filial_antiga, filiais),
+            ]
+            novas = [
+                contrato_controller.buscar_contratos_por_vencimento,
+                contrato_controller.buscar_contratos_por_vencimento,
+                contrato_controller.buscar_contratos_por_valor,
+                lambda filial: contrato_controller.buscar_contratos_por_filial(filial, exata=True),
+            ]
+
+            print("  Sem índices (consultas antigas):")
+            for nome, funcao, parametros in antigas:
+                medir(nome, funcao, parametros)
+                db.session.expunge_all()
+
+            inicio = time.perf_counter()
+            for indice in Contrato.__table__.indexes:
+                if indice.name in INDICES:
+                    indice.create(db.engine)
+            db.session.execute(db.text("ANALYZE"))
+            print(f"  Com índices (criados em {time.perf_counter() - inicio:.1f}s):")
+            for (nome, _, parametros), funcao in zip(antigas, novas):
+                medir(nome, funcao, parametros)
+                db.session.expunge_all()
+            medir("valor numa faixa de R$ 5 (só número/valor)",
+                  lambda minimo, maximo: contrato_controller.buscar_contratos_por_valor(
+                      minimo, maximo, ["numero_contrato", "valor_total"]), valores)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark de calculadora.calcular (laço escalar) contra calculadora.calcular_lote.
+
+Uso:
+    python -m benchmarks.bench_calculadora [--tamanhos 10000 100000 1000000]
+
+Antes de medir, confere linha a linha que o lote devolve exatamente o mesmo
+resultado (ou o mesmo erro) que a função escalar.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from calculadora import calcular, calcular_lote, linha_do_lote
+
+
+def gerar_colunas(n, semente=42):
+    rng = np.random.default_rng(semente)
+    return {
+        "valor_original": np.round(rng.uniform(10, 20000, size=n), 2),
+        "dias_em_atraso": rng.integers(0, 400, size=n),
+        "tipo_pagamento": rng.choice(["avista", "parcelado", "PARCELADO", "boleto"], size=n, p=[0.45, 0.45, 0.05, 0.05]),
+        "quantidade_parcelas": rng.integers(0, 30, size=n),
+        "valor_entrada": rng.choice([None, 0, 50.0, 150.0, 99999.0], size=n),
+    }
+
+
+def payloads(colunas):
+    nomes = list(colunas)
+    return [dict(zip(nomes, linha)) for linha in zip(*(c.tolist() for c in colunas.values()))]
+
+
+def rodar_escalar(lista):
+    resultados = []
+    for payload in lista:
+        try:
+            resultados.append(calcular(payload))
+        except ValueError as e:
+            resultados.append(str(e))
+    return resultados
+
+
+def conferir(colunas):
+    lote = calcular_lote(colunas)
+    for i, esperado in enumerate(rodar_escalar(payloads(colunas))):
+        try:
+            obtido = linha_do_lote(lote, i)
+        except ValueError as e:
+            obtido = str(e)
+        if obtido != esperado:
+            raise AssertionError(f"Linha {i} diverge: escalar={esperado!r} lote={obtido!r}")
+
+
+def medir(n):
+    colunas = gerar_colunas(n)
+    lista = payloads(colunas)
+
+    inicio = time.perf_counter()
+    rodar_escalar(lista)
+    t_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    calcular_lote(colunas)
+    t_lote = time.perf_counter() - inicio
+
+    print(f"{n:>9} linhas | escalar {t_escalar:8.3f}s | lote {t_lote:8.3f}s | speedup {t_escalar / t_lote:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    conferir(gerar_colunas(20_000, semente=7))
+    print("Conferência escalar x lote: OK")
+
+    for n in args.tamanhos:
+        medir(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de acordo_controller.cliente_por_acordo: laço N+1 antigo contra a
+consulta única com join.
+
+Uso:
+    python -m benchmarks.bench_cliente_por_acordo [--linhas 100000]
+
+Cria um banco SQLite temporário com N clientes, N contratos e ~80% dos
+contratos com acordo, e registra quantidade de queries e latência de cada
+implementação para todos os status.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.dados import preparar_app, popular
+
+
+def cliente_por_acordo_antigo(status):
+    """Implementação anterior, mantida aqui só para comparação."""
+    from app.database import db
+    from app.models.acordo import Acordo
+    from app.models.cliente import Cliente
+    from app.models.contrato import Contrato
+
+    clientes = []
+    if status == "sem_acordo":
+        subquery = db.session.query(Acordo.contrato_id).distinct()
+        for contrato in Contrato.query.filter(~Contrato.numero_contrato.in_(subquery)).all():
+            cliente = Cliente.query.get(contrato.cliente_id)
+            if cliente:
+                clientes.append({"cliente_id": cliente.id, "cliente_nome": cliente.nome,
+                                 "contrato_numero": contrato.numero_contrato, "status_acordo": "Sem acordo"})
+    else:
+        for acordo in Acordo.query.filter_by(status=status).all():
+            contrato = Contrato.query.filter_by(numero_contrato=acordo.contrato_id).first()
+            if contrato:
+                cliente = Cliente.query.get(contrato.cliente_id)
+                if cliente:
+                    clientes.append({"acordo_id": acordo.id, "cliente_id": cliente.id, "cliente_nome": cliente.nome,
+                                     "contrato_numero": contrato.numero_contrato, "status_acordo": acordo.status})
+    return clientes
+
+
+def medir(nome, funcao, contador):
+    from app.database import db
+
+    db.session.expire_all()
+    db.session.remove()
+    contador["queries"] = 0
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<22} {len(resultado):>8} linhas | {contador['queries']:>8} queries | {duracao:8.3f}s")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--sem-antigo", action="store_true", help="não executa a implementação N+1")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        with app.app_context():
+            from sqlalchemy import event
+            from app.database import db
+            from app.controllers import acordo_controller
+
+            popular(args.linhas)
+
+            contador = {"queries": 0}
+
+            @event.listens_for(db.engine, "before_cursor_execute")
+            def contar(*_):
+                contador["queries"] += 1
+
+            for status in ["em andamento", "concluido", "cancelado", "sem_acordo"]:
+                print(f"status={status!r}")
+                novo = medir("join", lambda: acordo_controller.cliente_por_acordo(status), contador)
+                medir("join paginado (1000)", lambda: acordo_controller.cliente_por_acordo(status, limite=1000), contador)
+                medir("join stream (yield_per)", lambda: list(acordo_controller.iterar_cliente_por_acordo(status)), contador)
+                if not args.sem_antigo:
+                    antigo = medir("N+1 antigo", lambda: cliente_por_acordo_antigo(status), contador)
+                    ordenar = lambda itens: sorted(itens, key=lambda c: (c.get("acordo_id", 0), c["contrato_numero"]))
+                    assert ordenar(antigo) == ordenar(novo), "resultados divergentes"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark do código de barras / linha digitável: implementação antiga (DV com
+laço por caractere, sem os DVs dos campos) contra febraban.codigo_barras e
+febraban.codigos_barras_lote.
+
+Uso:
+    python -m benchmarks.bench_codigo_barras [--tamanhos 1000 100000 1000000]
+
+Antes de medir, confere que o lote devolve exatamente o mesmo que a função escalar.
+"""
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+
+import febraban
+
+
+def codigo_barras_antigo(acordo_id, vencimento, valor_total, banco="237", carteira="09", agencia="1234", conta="56789"):
+    """Cálculo anterior (sem a consulta ao banco), mantido aqui só para comparação."""
+    fator_vencimento = str((vencimento - date(1997, 10, 7)).days).zfill(4)
+    valor_str = str(int(valor_total * 100)).zfill(10)
+    campo_livre = f"{carteira}{str(acordo_id).zfill(11)}{agencia}{conta}".ljust(25, "0")
+    codigo_sem_dv = f"{banco}9{fator_vencimento}{valor_str}{campo_livre}"
+    pesos = [2, 3, 4, 5, 6, 7, 8, 9]
+    soma = 0
+    for i, n in enumerate(reversed(codigo_sem_dv)):
+        soma += int(n) * pesos[i % len(pesos)]
+    dv = 11 - soma % 11
+    dv = str(0 if dv > 9 else dv)
+    codigo = f"{banco}9{dv}{fator_vencimento}{valor_str}{campo_livre}"
+    linha = f"{codigo[0:5]}.{codigo[5:10]} {codigo[10:15]}.{codigo[15:21]} {codigo[21:26]}.{codigo[26:32]} {codigo[32]} {codigo[33:]}"
+    return codigo, linha
+
+
+def gerar_dados(n, semente=42):
+    rng = np.random.default_rng(semente)
+    ids = rng.integers(1, 10 ** 9, size=n)
+    vencimentos = np.datetime64("2020-01-01") + rng.integers(0, 3000, size=n).astype("timedelta64[D]")
+    valores = np.round(rng.uniform(1, 50000, size=n), 2)
+    return ids, vencimentos, valores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    ids, vencimentos, valores = gerar_dados(5_000)
+    codigos, linhas = febraban.codigos_barras_lote(ids, vencimentos, valores)
+    for i in range(len(ids)):
+        esperado = febraban.codigo_barras(int(ids[i]), vencimentos[i].astype(date), float(valores[i]))
+        assert esperado == (codigos[i], linhas[i]), f"divergência na linha {i}"
+    print("lote confere com a função escalar")
+
+    for n in args.tamanhos:
+        ids, vencimentos, valores = gerar_dados(n)
+        print(f"n={n}")
+
+        if n <= 100_000:
+            python_ids = ids.tolist()
+            python_venc = vencimentos.astype(date).tolist()
+            python_valores = valores.tolist()
+            for nome, funcao in [("antigo", codigo_barras_antigo), ("escalar", febraban.codigo_barras)]:
+                inicio = time.perf_counter()
+                for i in range(n):
+                    funcao(python_ids[i], python_venc[i], python_valores[i])
+                duracao = time.perf_counter() - inicio
+                print(f"  {nome:<8} {duracao:8.3f}s | {n / duracao / 1000:8.1f} códigos/ms")
+
+        inicio = time.perf_counter()
+        febraban.codigos_barras_lote(ids, vencimentos, valores)
+        duracao = time.perf_counter() - inicio
+        print(f"  {'lote':<8} {duracao:8.3f}s | {n / duracao / 1000:8.1f} códigos/ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark do envio de boletos por e-mail contra um servidor SMTP local (aiosmtpd):
+uma conexão por mensagem (como `enviar_boleto_email`) contra a fila com o pool
+de conexões do worker.
+
+Uso:
+    pip install aiosmtpd
+    python -m benchmarks.bench_envio_boletos [--linhas 5000] [--conexoes 4] [--latencia-conexao 0.05] [--falhas 0.02]
+
+--latencia-conexao atrasa o EHLO, simulando o custo de TLS + login de um
+servidor real; --falhas faz o servidor responder 451 a essa fração das
+mensagens, para exercitar as novas tentativas com backoff.
+"""
+import argparse
+import asyncio
+import os
+import random
+import smtplib
+import socket
+import tempfile
+import time
+
+from benchmarks.dados import preparar_app, popular
+
+
+class CaixaPostal:
+    def __init__(self, latencia_conexao, falhas):
+        self.latencia_conexao = latencia_conexao
+        self.falhas = falhas
+        self.recebidas = 0
+        self.conexoes = 0
+        self.sorteio = random.Random(42)
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.conexoes += 1
+        await asyncio.sleep(self.latencia_conexao)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.sorteio.random() < self.falhas:
+            return "451 Tente novamente mais tarde"
+        self.recebidas += 1
+        return "250 OK"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=5_000)
+    parser.add_argument("--conexoes", type=int, default=4)
+    parser.add_argument("--latencia-conexao", type=float, default=0.05)
+    parser.add_argument("--falhas", type=float, default=0.02)
+    parser.add_argument("--amostra-antigo", type=int, default=200, help="mensagens enviadas com uma conexão cada")
+    args = parser.parse_args()
+
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        raise SystemExit("Instale aiosmtpd para rodar este benchmark: pip install aiosmtpd")
+
+    with socket.socket() as livre:
+        livre.bind(("127.0.0.1", 0))
+        porta = livre.getsockname()[1]
+    caixa = CaixaPostal(args.latencia_conexao, args.falhas)
+    servidor = Controller(caixa, hostname="127.0.0.1", port=porta)
+    servidor.start()
+
+    try:
+        with tempfile.TemporaryDirectory() as pasta:
+            app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+            app.config.update(
+                PASTA_BOLETOS=os.path.join(pasta, "boletos"),
+                MAIL_SERVER="127.0.0.1", MAIL_PORT=porta, MAIL_USE_SSL=False, MAIL_USE_TLS=False,
+                MAIL_USERNAME=None, MAIL_DEFAULT_SENDER="cobranca@cobale.local",
+                MAIL_ENVIO_BACKOFF=0.2, MAIL_ENVIO_INTERVALO=0.1,
+            )
+
+            with app.app_context():
+                from app.database import db
+                from app.models.acordo import Acordo
+                from app.controllers import acordo_controller, envio_boleto_controller
+                from app.correio import montar_mensagem_boleto
+
+                popular(args.linhas)
+                ids = [i for (i,) in db.session.query(Acordo.id).order_by(Acordo.id)]
+                pdf = b"%PDF-1.7 " + os.urandom(30_000)  # tamanho típico de um boleto
+                for inicio in range(0, len(ids), 5_000):
+                    acordo_controller.salvar_boletos({i: pdf + str(i).encode() for i in ids[inicio:inicio + 5_000]})
+                    db.session.expunge_all()
+
+                antigo = args.amostra_antigo
+                caixa.sorteio.seed(0)
+                falhas_antes, caixa.falhas = caixa.falhas, 0
+                inicio = time.perf_counter()
+                for i in range(antigo):
+                    mensagem = montar_mensagem_boleto("cobranca@cobale.local", f"c{i}@ex.com", f"boleto_{i}.pdf", pdf)
+                    with smtplib.SMTP("127.0.0.1", porta) as smtp:
+                        smtp.send_message(mensagem)
+                duracao = time.perf_counter() - inicio
+                caixa.falhas = falhas_antes
+                print(f"  {'uma conexão por e-mail':<28} {antigo:>7} e-mails | {duracao:8.3f}s | {antigo / duracao:8.0f} e-mails/s")
+
+                caixa.recebidas = caixa.conexoes = 0
+                lote = envio_boleto_controller.criar_lote_envios(vencimento_inicio="2000-01-01")
+                inicio = time.perf_counter()
+                resumo = envio_boleto_controller.executar_envios(args.conexoes, uma_vez=True)
+                duracao = time.perf_counter() - inicio
+                progresso = envio_boleto_controller.progresso_lote_envios(lote["lote_id"])
+                print(f"  {f'fila + pool ({args.conexoes} conexões)':<28} {lote['total']:>7} e-mails | {duracao:8.3f}s | "
+                      f"{caixa.recebidas / duracao:8.0f} e-mails/s")
+                print(f"    {progresso['enviado']} enviados, {progresso['erro']} com erro, "
+                      f"{resumo['erros']} falhas temporárias reenviadas, {caixa.conexoes} conexões SMTP abertas")
+    finally:
+        servidor.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark da importação de clientes: o laço antigo de `importar_clientes_docx`
+(uma consulta por CPF e endereços apagados/inseridos linha a linha) contra
+`importar_clientes` em blocos com upsert, num arquivo gerado.
+
+Uso:
+    python -m benchmarks.bench_importacao_clientes [--linhas 100000] [--amostra-antigo 5000] [--lote 5000]
+
+A segunda passada do importador novo reimporta o mesmo arquivo, medindo o
+caminho de atualização (todos os CPFs já existem).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.dados import preparar_app
+
+
+def gerar_linhas(n, invalidas=0.01):
+    rnd = random.Random(7)
+    for i in range(1, n + 1):
+        telefone = "119999" if rnd.random() < invalidas else f"119{rnd.randint(10000000, 99999999)}"
+        yield i + 1, [f"Cliente {i}", f"{i:011d}", telefone, f"c{i}@ex.com", "01/01/1990",
+                      "Rua das Flores", str(rnd.randint(1, 999)), "São Paulo", "SP", "01001000"]
+
+
+def importar_linha_a_linha(linhas):
+    """O laço de `importar_clientes_docx` antes do importador em blocos, sem os prints."""
+    import re
+    from app.database import db
+    from app.models.cliente import Cliente, Endereco
+
+    for _, cells in linhas:
+        nome, cpf, telefone, email = cells[:4]
+        data_nascimento = datetime.strptime(cells[4], "%d/%m/%Y").date()
+        rua, numero_end, cidade, estado, cep = cells[5:10]
+        if not nome or not cpf or not re.match(r'^\d{10,11}$', telefone):
+            continue
+
+        cliente = Cliente.query.filter_by(cpf=cpf).first()
+        if cliente is not None:
+            cliente.nome, cliente.telefone, cliente.email = nome, telefone, email
+            cliente.data_nascimento = data_nascimento
+            Endereco.query.filter_by(cliente_id=cliente.id).delete()
+        else:
+            cliente = Cliente(nome=nome, cpf=cpf, telefone=telefone, email=email, data_nascimento=data_nascimento)
+            db.session.add(cliente)
+            db.session.flush()
+        db.session.add(Endereco(rua=rua, numero=numero_end, cidade=cidade, estado=estado, cep=cep,
+                                cliente_id=cliente.id))
+    db.session.commit()
+
+
+def medir(nome, funcao, total):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<30} {total:>8} linhas | {duracao:8.3f}s | {total / duracao:10.0f} linhas/s")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--amostra-antigo", type=int, default=5_000)
+    parser.add_argument("--lote", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        with app.app_context():
+            from app.database import db
+            from app.models.cliente import Cliente, Endereco
+            from app.controllers.cliente_controller import importar_clientes
+
+            amostra = args.amostra_antigo
+            medir("linha a linha (antigo)", lambda: importar_linha_a_linha(gerar_linhas(amostra)), amostra)
+            Endereco.query.delete()
+            Cliente.query.delete()
+            db.session.commit()
+
+            relatorio = medir("em blocos (inserção)", lambda: importar_clientes(gerar_linhas(args.linhas), args.lote),
+                              args.linhas)
+            print(f"    {relatorio['inseridos']} inseridos, {relatorio['invalidos']} inválidos")
+            relatorio = medir("em blocos (atualização)", lambda: importar_clientes(gerar_linhas(args.linhas), args.lote),
+                              args.linhas)
+            print(f"    {relatorio['atualizados']} atualizados, {Endereco.query.count()} endereços")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark da importação de usuários: o laço antigo de `importar_usuarios_docx`
+(uma consulta por login e `set_senha` em série) contra `importar_usuarios` em
+blocos, com os hashes gerados em série e num pool de processos.
+
+Uso:
+    python -m benchmarks.bench_importacao_usuarios [--linhas 2000] [--amostra-antigo 200] [--processos 4]
+        [--metodo scrypt]
+
+--metodo troca o método/custo do hash (SENHA_HASH_METODO), ex. "pbkdf2:sha256:600000".
+O ganho do pool é limitado pelo número de núcleos da máquina.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.dados import preparar_app
+
+
+def gerar_linhas(n, prefixo="op"):
+    for i in range(1, n + 1):
+        yield i + 1, [f"Operador {i}", f"{prefixo}{i}", f"senha-{i}", "operador"]
+
+
+def importar_linha_a_linha(linhas):
+    """O laço de `importar_usuarios_docx` antes do importador em blocos, sem os prints."""
+    from app.database import db
+    from app.models.usuario import Usuario
+
+    for _, (nome, login, senha, cargo) in linhas:
+        if Usuario.query.filter_by(login=login).first():
+            continue
+        usuario = Usuario(nome=nome, login=login, cargo=cargo)
+        usuario.set_senha(senha)
+        db.session.add(usuario)
+    db.session.commit()
+
+
+def medir(nome, funcao, total):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<34} {total:>7} linhas | {duracao:8.3f}s | {total / duracao:8.1f} linhas/s")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=2_000)
+    parser.add_argument("--amostra-antigo", type=int, default=200)
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--metodo", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        if args.metodo:
+            app.config["SENHA_HASH_METODO"] = args.metodo
+        print(f"  método: {app.config['SENHA_HASH_METODO']}, {os.cpu_count()} núcleos")
+
+        with app.app_context():
+            from app.controllers.usuario_controller import importar_usuarios
+
+            amostra = args.amostra_antigo
+            medir("linha a linha (antigo)", lambda: importar_linha_a_linha(gerar_linhas(amostra, "antigo")), amostra)
+            medir("em blocos, hash em série", lambda: importar_usuarios(gerar_linhas(amostra, "serie"), processos=1),
+                  amostra)
+            relatorio = medir(f"em blocos, pool ({args.processos} proc.)",
+                              lambda: importar_usuarios(gerar_linhas(args.linhas), processos=args.processos),
+                              args.linhas)
+            print(f"    {relatorio['inseridos']} inseridos")
+            medir("reimportação (logins existentes)", lambda: importar_usuarios(gerar_linhas(args.linhas)),
+                  args.linhas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark do custo da instrumentação (app.instrumentacao): as mesmas
+requisições com INSTRUMENTACAO desligada, ligada e ligada com o perfil por
+amostragem rodando, e o que ela mostra de cada rota (consultas por requisição).
+
+Uso:
+    python -m benchmarks.bench_instrumentacao [--linhas 2000] [--requisicoes 500]
+
+As requisições vão pelo test client do Flask, sem rede: a diferença entre as
+rodadas é só o custo dos hooks, dos eventos SQL e da thread de amostragem.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.dados import preparar_app, popular
+
+ROTAS = ["/clientes/1", "/acordos/buscar_por_status/em andamento?limite=50", "/contratos/000001"]
+
+
+def medir(nome, client, requisicoes):
+    inicio = time.perf_counter()
+    for i in range(requisicoes):
+        resposta = client.get(ROTAS[i % len(ROTAS)])
+        assert resposta.status_code == 200, resposta.status_code
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<34} {requisicoes:>6} requisições | {1000 * duracao / requisicoes:7.3f} ms/requisição")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=2_000)
+    parser.add_argument("--requisicoes", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        from app.config import Config
+
+        caminho = os.path.join(pasta, "bench.sqlite3")
+        Config.INSTRUMENTACAO = False
+        app = preparar_app(caminho)
+        with app.app_context():
+            popular(args.linhas)
+        medir("sem instrumentação", app.test_client(), args.requisicoes)
+
+        Config.INSTRUMENTACAO = True
+        Config.INSTRUMENTACAO_PERFIL_PASTA = os.path.join(pasta, "perfis")
+        app = preparar_app(caminho)
+        client = app.test_client()
+        medir("com instrumentação", client, args.requisicoes)
+
+        client.post("/metrics/perfil")
+        medir("com instrumentação + perfil", client, args.requisicoes)
+        perfil = client.delete("/metrics/perfil").get_json()
+        print(f"    {perfil['amostras']} amostras -> {os.path.basename(perfil['pstats'])}, "
+              f"{os.path.basename(perfil['flamegraph'])}")
+
+        metricas = app.extensions["instrumentacao"]
+        print("  Consultas SQL por requisição:")
+        for rota in sorted({r.split("?")[0] for r in ROTAS}):
+            regra = app.url_map.bind("localhost").match(rota, return_rule=True)[0].rule
+            total = sum(int(linha.rsplit(" ", 1)[1]) for linha in metricas.consultas_por_requisicao.amostras()
+                        if linha.startswith(f"{metricas.consultas_por_requisicao.nome}_count") and f'rota="{regra}"' in linha)
+            print(f"    {regra:<46} {metricas.consultas.valor(regra) / total:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark das listagens completas: lista + jsonify contra o modo streaming
+(?stream=1 / ?stream=ndjson, yield_per no banco).
+
+Uso:
+    python -m benchmarks.bench_listagem_stream [--linhas 200000]
+
+Mede tempo até o primeiro byte, tempo total e pico de memória alocada
+(tracemalloc) de GET /contratos/, /acordos/ e /clientes/clientes.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.dados import preparar_app, popular
+
+
+def medir(client, url):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resposta = client.get(url, buffered=False)
+    primeiro_byte = None
+    total_bytes = 0
+    for chunk in resposta.response:
+        if primeiro_byte is None:
+            primeiro_byte = time.perf_counter() - inicio
+        total_bytes += len(chunk)
+    resposta.close()
+    total = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {url:<45} TTFB {primeiro_byte:7.3f}s | total {total:7.3f}s | "
+          f"{total_bytes / 1e6:7.1f} MB | pico {pico / 1e6:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        app.config["LISTAGEM_LIMITE_PADRAO"] = None
+        app.config["LISTAGEM_LIMITE_MAXIMO"] = None
+        with app.app_context():
+            popular(args.linhas)
+
+        client = app.test_client()
+        for rota in ["/contratos/", "/acordos/", "/clientes/clientes"]:
+            print(rota)
+            medir(client, rota)
+            medir(client, rota + "?stream=1")
+            medir(client, rota + "?stream=ndjson")
+
+
+if __name__ == "__main__":
+    main()
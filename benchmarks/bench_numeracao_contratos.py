@@ -0,0 +1,122 @@
+"""
+Teste de concorrência da numeração de contratos: vários processos criando
+contratos ao mesmo tempo no mesmo banco, com o `gerar_numero_contrato` antigo
+(maior número + 1) e com `app.numeracao` (contador atômico / sequence), um
+contrato por vez e em blocos reservados de uma vez.
+
+Uso:
+    python -m benchmarks.bench_numeracao_contratos [--processos 8] [--contratos 200] [--bloco 50]
+        [--database-url postgresql://...]
+
+Sem --database-url usa um SQLite temporário. No fim confere se todo contrato
+pedido foi gravado e se algum número se repetiu; sai com código 1 se a
+numeração nova perder ou repetir algum contrato.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from benchmarks.dados import preparar_app
+
+
+def _criar(modo, quantidade, bloco):
+    """Roda num processo filho: cria `quantidade` contratos e devolve (números gravados, falhas)."""
+    from app import create_app
+    from app.database import db
+    from app.models.contrato import Contrato
+    from app.controllers import contrato_controller
+    from app.numeracao import reservar_numeros_contrato
+
+    def antigo():
+        # `gerar_numero_contrato` antes da numeração atômica.
+        ultimo = db.session.query(Contrato).order_by(Contrato.numero_contrato.desc()).first()
+        return f"{int(ultimo.numero_contrato) + 1 if ultimo else 1:06d}"
+
+    app = create_app()
+    gravados, falhas = [], []
+    with app.app_context():
+        feitos = 0
+        while feitos < quantidade:
+            try:
+                if modo == "bloco":
+                    numeros = reservar_numeros_contrato(min(bloco, quantidade - feitos))
+                else:
+                    numeros = [antigo() if modo == "antigo" else contrato_controller.gerar_numero_contrato()]
+                db.session.execute(Contrato.__table__.insert(), [
+                    {"numero_contrato": numero, "cliente_id": 1, "vencimento": datetime(2025, 1, 1),
+                     "valor_total": 100.0, "filial": "Loja Central", "filial_normalizada": "loja central"}
+                    for numero in numeros
+                ])
+                db.session.commit()
+                gravados.extend(numeros)
+                feitos += len(numeros)
+            except Exception as e:
+                db.session.rollback()
+                falhas.append(type(e).__name__)
+                feitos += 1
+    return gravados, falhas
+
+
+def rodar(nome, modo, args):
+    from app.database import db
+    from app.models.contador import Contador
+    from app.models.contrato import Contrato
+
+    db.session.query(Contrato).delete()
+    db.session.query(Contador).delete()
+    db.session.commit()
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(args.processos) as pool:
+        resultados = list(pool.map(_criar, [modo] * args.processos, [args.contratos] * args.processos,
+                                   [args.bloco] * args.processos))
+    duracao = time.perf_counter() - inicio
+
+    gravados = [numero for numeros, _ in resultados for numero in numeros]
+    falhas = [falha for _, lista in resultados for falha in lista]
+    no_banco = db.session.query(Contrato).count()
+    repetidos = len(gravados) - len(set(gravados))
+    pedidos = args.processos * args.contratos
+    tipos = ", ".join(f"{tipo} x{falhas.count(tipo)}" for tipo in sorted(set(falhas)))
+    print(f"  {nome:<24} {duracao:7.2f}s | {no_banco:>6}/{pedidos} gravados | {repetidos} repetidos | "
+          f"{len(falhas)} falhas{f' ({tipos})' if tipos else ''}")
+    return no_banco == pedidos and not repetidos and not falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processos", type=int, default=8)
+    parser.add_argument("--contratos", type=int, default=200, help="contratos criados por processo")
+    parser.add_argument("--bloco", type=int, default=50, help="números reservados por ida ao banco no modo em bloco")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+            from app import create_app
+            app = create_app()
+        else:
+            app = preparar_app(os.path.join(pasta, "bench.sqlite3"))
+        with app.app_context():
+            from app.database import db
+            from app.models.cliente import Cliente
+
+            if not db.session.get(Cliente, 1):
+                db.session.add(Cliente(id=1, nome="Cliente 1", cpf="00000000001", telefone="11999998888",
+                                       email="c1@ex.com", data_nascimento=datetime(1990, 1, 1)))
+                db.session.commit()
+            print(f"  {args.processos} processos x {args.contratos} contratos ({db.engine.dialect.name})")
+            rodar("antigo (maior + 1)", "antigo", args)
+            ok = rodar("numeração atômica", "novo", args)
+            ok = rodar(f"blocos de {args.bloco}", "bloco", args) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
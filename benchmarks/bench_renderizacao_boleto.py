@@ -0,0 +1,75 @@
+"""
+Benchmark da renderização de um boleto: caminho antigo (lê e codifica o logo,
+passa pelo render_template e deixa o WeasyPrint interpretar o CSS embutido e as
+fontes a cada PDF) contra o ContextoRenderizacao montado uma vez por processo,
+com o código de barras em PNG e em SVG (BOLETO_CODIGO_BARRAS_FORMATO).
+
+Uso:
+    python -m benchmarks.bench_renderizacao_boleto [--boletos 200]
+
+Não usa banco: os dados do boleto são sintéticos.
+"""
+import argparse
+import base64
+import os
+import time
+from datetime import datetime
+
+
+def boleto_info(i):
+    import febraban
+
+    codigo_barras, linha_digitavel = febraban.codigo_barras(i, datetime(2025, 8, 10), 1234.56)
+    return {
+        "sacado": f"Cliente {i}", "vencimento": "10/08/2025", "valor_documento": 1234.56,
+        "filial_loja": "Loja Central", "demonstrativo": "Acordo formalizado para pagamento",
+        "desconto": 10.0, "juros": 5.0, "nosso_numero": str(i).zfill(11),
+        "linha_digitavel": linha_digitavel, "codigo_barras": codigo_barras,
+        "cep_sacado": "01001000", "endereco_sacado": "Rua das Flores, 123",
+        "cidade_sacado": "São Paulo", "estado_sacado": "SP",
+    }
+
+
+def renderizar_antigo(info):
+    """Caminho anterior ao contexto de renderização, mantido aqui só para comparação."""
+    from flask import current_app, render_template
+    from weasyprint import HTML
+    from app.boleto_pdf import _codigo_barras_b64
+
+    logo_b64 = ""
+    if os.path.exists(current_app.config["LOGO_COBALE"]):
+        with open(current_app.config["LOGO_COBALE"], "rb") as f:
+            logo_b64 = base64.b64encode(f.read()).decode("utf-8")
+    html = render_template("boleto.html", boleto=info, barcode_img=_codigo_barras_b64(info["codigo_barras"]),
+                           logo_b64=logo_b64)
+    return HTML(string=html).write_pdf()
+
+
+def medir(nome, funcao, infos):
+    funcao(infos[0])  # aquecimento: compila template / monta o contexto
+    inicio = time.perf_counter()
+    tamanho = sum(len(funcao(info)) for info in infos)
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<10} {1000 * duracao / len(infos):8.2f} ms/boleto | {len(infos) / duracao:8.1f} boletos/s"
+          f" | {tamanho / len(infos) / 1024:7.1f} KiB/PDF")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--boletos", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    from app import create_app
+    from app.boleto_pdf import ContextoRenderizacao
+
+    app = create_app()
+    with app.app_context():
+        infos = [boleto_info(i) for i in range(1, args.boletos + 1)]
+        medir("antes", renderizar_antigo, infos)
+        for formato in ["png", "svg"]:
+            medir(f"ctx {formato}", ContextoRenderizacao(app, formato).renderizar, infos)
+
+
+if __name__ == "__main__":
+    main()
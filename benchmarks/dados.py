@@ -0,0 +1,37 @@
+"""Utilitários compartilhados pelos benchmarks: app apontando para um SQLite temporário e dados sintéticos."""
+import os
+import random
+from datetime import date, datetime, timedelta
+
+
+def preparar_app(caminho_db):
+    os.environ["DATABASE_URL"] = f"sqlite:///{caminho_db}"
+    from app import create_app
+    return create_app()
+
+
+def popular(n):
+    from app.database import db
+    from app.models.acordo import Acordo
+    from app.models.cliente import Cliente
+    from app.models.contrato import Contrato
+
+    rnd = random.Random(42)
+    hoje = datetime(2025, 1, 1)
+    db.session.execute(Cliente.__table__.insert(), [
+        {"id": i, "nome": f"Cliente {i}", "cpf": f"{i:011d}", "telefone": "11999998888",
+         "email": f"c{i}@ex.com", "data_nascimento": date(1990, 1, 1)}
+        for i in range(1, n + 1)
+    ])
+    db.session.execute(Contrato.__table__.insert(), [
+        {"numero_contrato": f"{i:06d}", "cliente_id": i, "vencimento": hoje - timedelta(days=rnd.randint(0, 300)),
+         "valor_total": round(rnd.uniform(50, 5000), 2), "filial": "Loja Central", "filial_normalizada": "loja central"}
+        for i in range(1, n + 1)
+    ])
+    status = ["em andamento", "concluido", "cancelado"]
+    db.session.execute(Acordo.__table__.insert(), [
+        {"contrato_id": f"{i:06d}", "vencimento": hoje, "data_criacao": hoje, "tipo_pagamento": "avista",
+         "qtd_parcelas": 1, "valor_total": 100, "desconto": 0, "juros": 0, "status": rnd.choice(status)}
+        for i in range(1, n + 1) if rnd.random() < 0.8
+    ])
+    db.session.commit()
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def calcular(payload):
     try:
         valor_original = float(payload.get('valor_original', 0))
@@ -76,3 +79,251 @@ def calcular(payload):
         }
 
     return resultado
+
+
+# ------------------- Cálculo em lote -------------------
+
+ERRO_PARAMETROS = "Parâmetros inválidos enviados para o cálculo."
+ERRO_TIPO = "Tipo de pagamento inválido. Use 'avista' ou 'parcelado'."
+ERRO_PARCELAS = "Parcelamento deve ser entre 2x e 24x."
+ERRO_ENTRADA = "Valor de entrada não pode ser maior ou igual ao valor final."
+
+
+def _coluna(colunas, nome, n, padrao):
+    valores = colunas.get(nome)
+    if valores is None:
+        return [padrao] * n
+    if len(valores) != n:
+        raise ValueError(f"Coluna '{nome}' deve ter {n} linhas.")
+    return valores
+
+
+NAO_ESCALARES = (list, tuple, dict, set, np.ndarray)
+NUMEROS = {int, float, bool}
+
+
+def _coluna_objeto(valores, invalido):
+    """
+    Coluna 1-D com um elemento por linha, mais os tipos encontrados nela. Arrays
+    1-D já tipados passam direto; elementos que não são escalares (listas,
+    dicts...) viram None e marcam a linha como inválida, sem derrubar as outras.
+    """
+    if isinstance(valores, np.ndarray) and valores.ndim == 1 and valores.dtype != object:
+        return valores, {valores.dtype.type}
+    coluna = np.fromiter(valores, dtype=object, count=len(valores))
+    tipos = set(map(type, coluna))
+    if any(issubclass(t, NAO_ESCALARES) for t in tipos):
+        for i, v in enumerate(coluna):
+            if isinstance(v, NAO_ESCALARES):
+                invalido[i] = True
+                coluna[i] = None
+        tipos = set(map(type, coluna))
+    return coluna, tipos
+
+
+def _converter_float(valores, invalido):
+    coluna, tipos = _coluna_objeto(valores, invalido)
+    if coluna.dtype.kind in "biuf" or tipos <= NUMEROS:
+        return coluna.astype(np.float64)
+    saida = np.zeros(len(coluna), dtype=np.float64)
+    for i, v in enumerate(coluna):
+        try:
+            saida[i] = float(v)
+        except (ValueError, TypeError, OverflowError):
+            invalido[i] = True
+    return saida
+
+
+def _converter_int(valores, invalido, vazio_como_zero=False):
+    coluna, tipos = _coluna_objeto(valores, invalido)
+    if coluna.dtype.kind in "biu" or tipos <= {int, bool}:
+        try:
+            return coluna.astype(np.int64)
+        except OverflowError:
+            pass
+    elif coluna.dtype.kind == "f" or tipos <= NUMEROS:
+        arr = coluna.astype(np.float64)
+        finito = np.isfinite(arr)
+        invalido |= ~finito
+        return np.where(finito, np.trunc(arr), 0).astype(np.int64)
+    saida = np.zeros(len(coluna), dtype=np.int64)
+    for i, v in enumerate(coluna):
+        try:
+            saida[i] = int((v or 0) if vazio_como_zero else v)
+        except (ValueError, TypeError, OverflowError):
+            invalido[i] = True
+    return saida
+
+
+def _converter_entrada(valores, invalido):
+    coluna, tipos = _coluna_objeto(valores, invalido)
+    if coluna.dtype.kind in "biuf" or tipos <= NUMEROS:
+        saida = coluna.astype(np.float64)
+        return saida, saida != 0
+    if tipos <= NUMEROS | {type(None)}:
+        saida = np.where(coluna == None, 0, coluna).astype(np.float64)  # noqa: E711 - comparação elemento a elemento
+        return saida, saida != 0
+
+    informada = np.zeros(len(coluna), dtype=bool)
+    saida = np.zeros(len(coluna), dtype=np.float64)
+    for i, v in enumerate(coluna):
+        if v in [None, '', 0]:
+            continue
+        try:
+            saida[i] = float(v)
+            informada[i] = True
+        except (ValueError, TypeError, OverflowError):
+            invalido[i] = True
+    return saida, informada
+
+
+def _converter_tipo(valores, invalido):
+    coluna, _ = _coluna_objeto(valores, invalido)
+    if coluna.dtype.kind == "U":
+        arr = coluna.copy()
+    else:
+        arr = np.array([t if isinstance(t, str) else "" for t in coluna], dtype=str)
+    outros = np.flatnonzero((arr != "avista") & (arr != "parcelado"))
+    if len(outros):
+        arr[outros] = np.char.lower(arr[outros])
+    return arr
+
+
+def _arredondar(valores, casas=2):
+    """
+    Equivalente vetorizado de round(x, casas). Valores muito próximos de um
+    empate (.5) são refeitos com o round do Python para bater exatamente.
+    """
+    escala = 10.0 ** casas
+    escalado = valores * escala
+    resultado = np.round(escalado) / escala
+
+    fracao = np.abs(escalado - np.trunc(escalado))
+    tolerancia = np.maximum(np.abs(escalado) * 1e-12, 1e-9)
+    suspeitos = np.flatnonzero(np.abs(fracao - 0.5) < tolerancia)
+    for i in suspeitos:
+        resultado[i] = round(float(valores[i]), casas)
+    return resultado
+
+
+def calcular_lote(colunas):
+    """
+    Versão vetorizada de `calcular` para muitas simulações de uma vez.
+
+    `colunas` é um dict com listas ou arrays do mesmo tamanho: valor_original,
+    dias_em_atraso, tipo_pagamento, quantidade_parcelas e valor_entrada (as duas
+    últimas opcionais). Linhas inválidas não interrompem o cálculo: ficam com
+    `valido=False` e a mensagem em `erros[indice]`, igual à que `calcular`
+    levantaria.
+    """
+    n = next((len(colunas[c]) for c in ("valor_original", "dias_em_atraso", "tipo_pagamento") if colunas.get(c) is not None), 0)
+
+    invalido = np.zeros(n, dtype=bool)
+    valor_original = _converter_float(_coluna(colunas, "valor_original", n, 0), invalido)
+    dias = _converter_int(_coluna(colunas, "dias_em_atraso", n, 0), invalido)
+    parcelas = _converter_int(_coluna(colunas, "quantidade_parcelas", n, 0), invalido, vazio_como_zero=True)
+    entrada, entrada_informada = _converter_entrada(_coluna(colunas, "valor_entrada", n, None), invalido)
+
+    tipos = _converter_tipo(_coluna(colunas, "tipo_pagamento", n, ""), invalido)
+    avista = tipos == "avista"
+    parcelado = tipos == "parcelado"
+
+    erro_tipo = ~invalido & ~(avista | parcelado)
+    erro_parcelas = ~invalido & parcelado & ((parcelas < 2) | (parcelas > 24))
+
+    juros_diario = 0.005
+    teto_juros = 1.0
+    entrada_minima_fixa = 100.0
+
+    juros_total = valor_original * juros_diario * dias
+    juros_total = np.minimum(juros_total, valor_original * teto_juros)
+    valor_com_juros = valor_original + juros_total
+
+    faixa_1 = (dias >= 60) & (dias <= 99)
+    faixa_2 = (dias >= 100) & (dias <= 150)
+    faixa_3 = dias > 150
+    com_desconto = faixa_1 | faixa_2 | faixa_3
+
+    desconto_max_avista = np.select([faixa_1, faixa_2, faixa_3], [10, 20, 30], 0)
+    desconto_max_parcelado = np.select([faixa_1, faixa_2, faixa_3], [3, 8, 15], 0)
+
+    faixa_inicio = np.where(dias <= 99, 60, np.where(dias <= 150, 100, 151))
+    faixa_fim = np.where(dias <= 99, 99, np.where(dias <= 150, 150, dias))
+    proporcao = (dias - faixa_inicio) / (faixa_fim - faixa_inicio + 1)
+
+    desconto = np.where(
+        com_desconto,
+        np.where(avista, desconto_max_avista * proporcao, desconto_max_parcelado * proporcao),
+        0.0,
+    )
+
+    valor_desconto = valor_com_juros * (desconto / 100)
+    valor_final = valor_com_juros - valor_desconto
+
+    entrada_padrao = ~entrada_informada | (entrada <= 0)
+    erro_entrada = ~invalido & parcelado & ~erro_parcelas & ~entrada_padrao & (entrada >= valor_final)
+    entrada_minima = np.where(entrada_minima_fixa >= valor_final, valor_final * 0.1, entrada_minima_fixa)
+    valor_entrada = np.where(entrada_padrao, entrada_minima, entrada)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valor_parcela = _arredondar(np.where(parcelado, (valor_final - valor_entrada) / parcelas, np.nan))
+        valor_total_parcelas = _arredondar(valor_parcela * parcelas)
+
+    erros = {}
+    for mascara, mensagem in (
+        (erro_entrada, ERRO_ENTRADA),
+        (erro_parcelas, ERRO_PARCELAS),
+        (erro_tipo, ERRO_TIPO),
+        (invalido, ERRO_PARAMETROS),
+    ):
+        for i in np.flatnonzero(mascara):
+            erros[int(i)] = mensagem
+
+    valido = ~(invalido | erro_tipo | erro_parcelas | erro_entrada)
+    sem_parcelamento = ~(valido & parcelado)
+
+    return {
+        "valor_original": _arredondar(valor_original),
+        "dias_em_atraso": dias,
+        "tipo_pagamento": tipos,
+        "juros_total": _arredondar(juros_total),
+        "percentual_desconto": _arredondar(desconto),
+        "valor_desconto": _arredondar(valor_desconto),
+        "valor_final": _arredondar(valor_final),
+        "parcelado": valido & parcelado,
+        "entrada": np.where(sem_parcelamento, np.nan, _arredondar(valor_entrada)),
+        "quantidade_parcelas": parcelas,
+        "valor_parcela": np.where(sem_parcelamento, np.nan, valor_parcela),
+        "valor_total_parcelas": np.where(sem_parcelamento, np.nan, valor_total_parcelas),
+        "valido": valido,
+        "erros": erros,
+    }
+
+
+def linha_do_lote(lote, i):
+    """
+    Monta, para a linha `i` de um resultado de `calcular_lote`, o mesmo dict que
+    `calcular` devolveria. Linhas inválidas levantam o mesmo ValueError.
+    """
+    if not lote["valido"][i]:
+        raise ValueError(lote["erros"][i])
+
+    resultado = {
+        "valor_original": float(lote["valor_original"][i]),
+        "dias_em_atraso": int(lote["dias_em_atraso"][i]),
+        "tipo_pagamento": str(lote["tipo_pagamento"][i]),
+        "juros_total": float(lote["juros_total"][i]),
+        "percentual_desconto": float(lote["percentual_desconto"][i]),
+        "valor_desconto": float(lote["valor_desconto"][i]),
+        "valor_final": float(lote["valor_final"][i])
+    }
+
+    if lote["parcelado"][i]:
+        resultado["parcelamento"] = {
+            "entrada": float(lote["entrada"][i]),
+            "quantidade_parcelas": int(lote["quantidade_parcelas"][i]),
+            "valor_parcela": float(lote["valor_parcela"][i]),
+            "valor_total_parcelas": float(lote["valor_total_parcelas"][i])
+        }
+
+    return resultado
@@ -0,0 +1,191 @@
+"""
+Código de barras e linha digitável de boletos (layout FEBRABAN, 44 posições).
+
+Sem banco e sem efeitos colaterais: recebe id do acordo, vencimento e valor e
+devolve as strings. `codigo_barras` calcula um boleto; `codigos_barras_lote`
+calcula milhares de uma vez com numpy e devolve exatamente o mesmo resultado.
+"""
+from datetime import date, datetime
+from operator import mul
+
+import numpy as np
+
+BANCO = "237"
+CARTEIRA = "09"
+AGENCIA = "1234"
+CONTA = "56789"
+MOEDA = "9"
+
+DATA_BASE = date(1997, 10, 7)
+VALOR_MAXIMO_CENTAVOS = 10 ** 10 - 1
+
+ERRO_VENCIMENTO = "Vencimento anterior à data base do fator de vencimento (07/10/1997)."
+ERRO_VALOR = "Valor do boleto fora do intervalo aceito (0 a 99.999.999,99)."
+
+# Pesos do módulo 11 (2 a 9, da direita para a esquerda) para os 43 dígitos sem DV,
+# e do módulo 10 (2, 1, 2, ... da direita para a esquerda).
+PESOS_MODULO_11 = tuple(2 + i % 8 for i in range(43))
+PESOS_MODULO_10 = tuple(2 - i % 2 for i in range(11))
+
+# Soma dos algarismos de digito * peso no módulo 10 (ex.: 7 * 2 = 14 -> 1 + 4 = 5),
+# já na ordem dos pesos da direita para a esquerda.
+_SOMA_MODULO_10 = {peso: tuple(d * peso // 10 + d * peso % 10 for d in range(10)) for peso in (1, 2)}
+_TABELAS_MODULO_10 = tuple(_SOMA_MODULO_10[peso] for peso in PESOS_MODULO_10)
+
+
+# ------------------- Dígitos verificadores -------------------
+
+def dv_modulo_11(numero):
+    """DV geral do código de barras. Resto 0, 1 ou 10 vira DV 1, como pede a FEBRABAN."""
+    soma = sum(map(mul, map(int, reversed(numero)), PESOS_MODULO_11))
+    dv = 11 - soma % 11
+    return "1" if dv in (10, 11) else str(dv)
+
+
+def dv_modulo_10(numero):
+    """DV de cada um dos três primeiros campos da linha digitável."""
+    soma = sum(map(tuple.__getitem__, _TABELAS_MODULO_10, map(int, reversed(numero))))
+    return str((10 - soma % 10) % 10)
+
+
+def fator_vencimento(vencimento):
+    """
+    Dias desde 07/10/1997. Depois de 9999 (21/02/2025) o fator recomeça em 1000,
+    conforme a FEBRABAN, para continuar com 4 dígitos.
+    """
+    if isinstance(vencimento, datetime):
+        vencimento = vencimento.date()
+    dias = (vencimento - DATA_BASE).days
+    if dias < 0:
+        raise ValueError(ERRO_VENCIMENTO)
+    return dias if dias <= 9999 else (dias - 10000) % 9000 + 1000
+
+
+# ------------------- Um boleto -------------------
+
+def campo_livre(nosso_numero, carteira=CARTEIRA, agencia=AGENCIA, conta=CONTA):
+    return f"{carteira}{str(nosso_numero).zfill(11)}{agencia}{conta}".ljust(25, "0")
+
+
+def linha_digitavel(codigo):
+    """Monta a linha digitável (47 dígitos, formatada) a partir do código de barras de 44."""
+    campo1 = codigo[0:4] + codigo[19:24]
+    campo2 = codigo[24:34]
+    campo3 = codigo[34:44]
+    campo1 += dv_modulo_10(campo1)
+    campo2 += dv_modulo_10(campo2)
+    campo3 += dv_modulo_10(campo3)
+    return (
+        f"{campo1[:5]}.{campo1[5:]} "
+        f"{campo2[:5]}.{campo2[5:]} "
+        f"{campo3[:5]}.{campo3[5:]} "
+        f"{codigo[4]} "
+        f"{codigo[5:19]}"
+    )
+
+
+def codigo_barras(nosso_numero, vencimento, valor, banco=BANCO, carteira=CARTEIRA, agencia=AGENCIA, conta=CONTA):
+    """Devolve (codigo_barras, linha_digitavel) de um boleto."""
+    centavos = int(round(float(valor) * 100))
+    if not 0 <= centavos <= VALOR_MAXIMO_CENTAVOS:
+        raise ValueError(ERRO_VALOR)
+
+    sem_dv = (
+        f"{banco}{MOEDA}{fator_vencimento(vencimento):04d}{centavos:010d}"
+        f"{campo_livre(nosso_numero, carteira, agencia, conta)}"
+    )
+    codigo = sem_dv[:4] + dv_modulo_11(sem_dv) + sem_dv[4:]
+    return codigo, linha_digitavel(codigo)
+
+
+# ------------------- Lote (numpy) -------------------
+
+# Posição de cada dígito do código de barras na linha digitável (sem os DVs dos campos):
+# campo 1 = código[0:4] + código[19:24], campo 2 = código[24:34], campo 3 = código[34:44],
+# campo 4 = DV geral (código[4]) e campo 5 = fator + valor (código[5:19]).
+_CAMPOS_LINHA = (
+    (0, list(range(0, 4)) + list(range(19, 24))),
+    (12, list(range(24, 34))),
+    (25, list(range(34, 44))),
+)
+_PONTOS_LINHA = [5, 17, 30]
+_ESPACOS_LINHA = [11, 24, 37, 39]
+
+# Pesos do módulo 11 alinhados às 44 posições do código (a posição 4, do próprio DV, não entra).
+_PESOS_MODULO_11_CODIGO = np.array(PESOS_MODULO_11[::-1][:4] + (0,) + PESOS_MODULO_11[::-1][4:], dtype=np.int64)
+_TABELA_MODULO_10 = np.array([_SOMA_MODULO_10[1], _SOMA_MODULO_10[2]], dtype=np.int64)
+
+
+def _digitos(valores, largura):
+    """Matriz (n, largura) com os algarismos de cada inteiro, completando com zeros à esquerda."""
+    potencias = 10 ** np.arange(largura - 1, -1, -1, dtype=np.int64)
+    return (valores[:, None] // potencias) % 10
+
+
+def _algarismos(texto):
+    return np.frombuffer(texto.encode(), dtype=np.uint8) - 48
+
+
+def _dv_modulo_10_lote(campos):
+    linhas_tabela = np.array(PESOS_MODULO_10[:campos.shape[1]][::-1]) - 1
+    soma = _TABELA_MODULO_10[linhas_tabela, campos].sum(axis=1)
+    return (10 - soma % 10) % 10
+
+
+def _texto(matriz):
+    """Converte uma matriz de códigos ASCII (n, largura) num array de strings."""
+    return np.ascontiguousarray(matriz).view(f"S{matriz.shape[1]}").ravel().astype(str)
+
+
+def codigos_barras_lote(nossos_numeros, vencimentos, valores,
+                        banco=BANCO, carteira=CARTEIRA, agencia=AGENCIA, conta=CONTA):
+    """
+    Versão vetorizada de `codigo_barras`. Recebe sequências (ou arrays numpy) de
+    mesmo tamanho e devolve dois arrays de strings: códigos de barras e linhas
+    digitáveis, na mesma ordem. Levanta ValueError se algum vencimento ou valor
+    for inválido.
+    """
+    numeros = np.asarray(nossos_numeros, dtype=np.int64)
+    n = len(numeros)
+    if n == 0:
+        return np.array([], dtype=str), np.array([], dtype=str)
+
+    dias = (np.asarray(vencimentos, dtype="datetime64[D]") - np.datetime64(DATA_BASE, "D")).astype(np.int64)
+    if (dias < 0).any():
+        raise ValueError(ERRO_VENCIMENTO)
+    fatores = np.where(dias <= 9999, dias, (dias - 10000) % 9000 + 1000)
+
+    centavos = np.rint(np.asarray(valores, dtype=np.float64) * 100).astype(np.int64)
+    if ((centavos < 0) | (centavos > VALOR_MAXIMO_CENTAVOS)).any():
+        raise ValueError(ERRO_VALOR)
+
+    # Código de barras: banco + moeda + DV + fator + valor + campo livre
+    # (carteira + nosso número + agência + conta, completado com zeros até 25 dígitos).
+    codigo = np.empty((n, 44), dtype=np.uint8)
+    codigo[:, 0:4] = _algarismos(f"{banco}{MOEDA}")
+    codigo[:, 5:9] = _digitos(fatores, 4)
+    codigo[:, 9:19] = _digitos(centavos, 10)
+    fim_carteira = 19 + len(carteira)
+    codigo[:, 19:fim_carteira] = _algarismos(carteira)
+    codigo[:, fim_carteira:fim_carteira + 11] = _digitos(numeros, 11)
+    codigo[:, fim_carteira + 11:] = _algarismos(f"{agencia}{conta}".ljust(44 - fim_carteira - 11, "0"))
+
+    codigo[:, 4] = 0
+    dv = 11 - (codigo @ _PESOS_MODULO_11_CODIGO) % 11
+    codigo[:, 4] = np.where(dv >= 10, 1, dv)
+
+    linha = np.empty((n, 54), dtype=np.uint8)
+    for inicio, posicoes in _CAMPOS_LINHA:
+        campo = codigo[:, posicoes]
+        linha[:, inicio:inicio + 5] = campo[:, :5]
+        linha[:, inicio + 6:inicio + 6 + len(posicoes) - 5] = campo[:, 5:]
+        linha[:, inicio + 1 + len(posicoes)] = _dv_modulo_10_lote(campo)
+    linha[:, 38] = codigo[:, 4]
+    linha[:, 40:54] = codigo[:, 5:19]
+
+    codigo += 48
+    linha += 48
+    linha[:, _PONTOS_LINHA] = ord(".")
+    linha[:, _ESPACOS_LINHA] = ord(" ")
+
+    return _texto(codigo), _texto(linha)
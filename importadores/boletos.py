@@ -1,28 +1,16 @@
 import smtplib, os
 
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
 from app.config import Config
+from app.correio import montar_mensagem_boleto
 
 def enviar_boleto_email(destinatario, caminho_pdf):
+    """Envio avulso, com uma conexão por mensagem. Para muitos boletos use a fila (envio_boleto_controller)."""
     remetente = Config.MAIL_USERNAME
     senha = Config.MAIL_PASSWORD
 
-    msg = MIMEMultipart()
-    msg['From'] = remetente
-    msg['To'] = destinatario
-    msg['Subject'] = "Boleto do seu acordo - CobAle"
-
-    corpo = "Olá, segue em anexo o boleto referente ao seu acordo."
-    msg.attach(MIMEText(corpo, 'plain'))
-
     with open(caminho_pdf, "rb") as f:
-        attach = MIMEApplication(f.read(), _subtype="pdf")
-        attach.add_header('Content-Disposition', 'attachment', filename=os.path.basename(caminho_pdf))
-        msg.attach(attach)
+        msg = montar_mensagem_boleto(remetente, destinatario, os.path.basename(caminho_pdf), f.read())
 
     with smtplib.SMTP_SSL(Config.MAIL_SERVER, Config.MAIL_PORT) as servidor:
         servidor.login(remetente, senha)
         servidor.send_message(msg)
-
@@ -0,0 +1,37 @@
+import argparse
+
+from app import create_app
+from app.controllers import importacao_controller
+
+app = create_app()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa clientes, contratos ou usuários de um arquivo CSV, Parquet ou .docx.")
+    parser.add_argument("entidade", choices=list(importacao_controller.IMPORTADORES))
+    parser.add_argument("arquivo", help="Caminho do arquivo")
+    parser.add_argument("--formato", choices=["csv", "parquet", "docx"], help="Padrão: pela extensão do arquivo")
+    parser.add_argument("--lote", type=int, default=None, help="Linhas por bloco (padrão: IMPORTACAO_LOTE)")
+    parser.add_argument("--separador", default=",", help="Separador do CSV")
+    parser.add_argument("--processos", type=int, default=None, help="Processos gravando blocos (padrão: IMPORTACAO_PROCESSOS)")
+    parser.add_argument("--retomar", action="store_true", help="Pula os blocos já gravados de uma importação interrompida do mesmo arquivo")
+    args = parser.parse_args()
+
+    with app.app_context():
+        def mostrar_progresso(relatorio):
+            print(f"  {relatorio}", flush=True)
+
+        formato = importacao_controller.formato_do_arquivo(args.arquivo, args.formato)
+        resultado = importacao_controller.importar_arquivo(args.entidade, args.arquivo, formato, args.lote,
+                                                           args.separador, ao_progredir=mostrar_progresso,
+                                                           processos=args.processos, retomar=args.retomar)
+
+        print(f"Fim: {resultado['inseridos']} inseridos, {resultado['atualizados']} atualizados, "
+              f"{resultado['ignorados']} ignorados, {resultado['invalidos']} inválidos "
+              f"({resultado['linhas_por_segundo']:.0f} linhas/s).")
+        for bloco in resultado["blocos"]:
+            if bloco["status"] != "concluido":
+                print(f"  bloco {bloco['bloco']} (linhas {bloco['linha_inicial']}-{bloco['linha_final']}): {bloco['status']}")
+        for erro in resultado["erros"][:20]:
+            print(f"  linha {erro['linha']}: {erro['erro']}")
+        if resultado["invalidos"] > 20:
+            print(f"  ... e mais {resultado['invalidos'] - 20} erros.")
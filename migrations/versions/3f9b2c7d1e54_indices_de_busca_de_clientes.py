@@ -0,0 +1,61 @@
+"""Índices de busca de clientes (prefixo de CPF e nome sem acento)
+
+Revision ID: 3f9b2c7d1e54
+Revises: 8d4f6a1c3e27
+Create Date: 2026-10-18 13:02:17.418203
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9b2c7d1e54'
+down_revision = '8d4f6a1c3e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        op.execute(
+            "CREATE OR REPLACE FUNCTION cobale_normalizar(texto text) RETURNS text "
+            "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+            "AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $$"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_cliente_nome_trgm ON cliente USING gin (cobale_normalizar(nome) gin_trgm_ops)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_cliente_cpf_prefixo ON cliente (cpf text_pattern_ops)")
+    elif dialeto == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS cliente_busca USING fts5("
+            "nome, content='cliente', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS cliente_busca_ai AFTER INSERT ON cliente BEGIN "
+            "INSERT INTO cliente_busca(rowid, nome) VALUES (new.id, new.nome); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS cliente_busca_ad AFTER DELETE ON cliente BEGIN "
+            "INSERT INTO cliente_busca(cliente_busca, rowid, nome) VALUES ('delete', old.id, old.nome); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS cliente_busca_au AFTER UPDATE OF nome ON cliente BEGIN "
+            "INSERT INTO cliente_busca(cliente_busca, rowid, nome) VALUES ('delete', old.id, old.nome); "
+            "INSERT INTO cliente_busca(rowid, nome) VALUES (new.id, new.nome); END"
+        )
+        op.execute("INSERT INTO cliente_busca(cliente_busca) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_cliente_cpf_prefixo")
+        op.execute("DROP INDEX IF EXISTS ix_cliente_nome_trgm")
+        op.execute("DROP FUNCTION IF EXISTS cobale_normalizar(text)")
+    elif dialeto == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS cliente_busca_au")
+        op.execute("DROP TRIGGER IF EXISTS cliente_busca_ad")
+        op.execute("DROP TRIGGER IF EXISTS cliente_busca_ai")
+        op.execute("DROP TABLE IF EXISTS cliente_busca")
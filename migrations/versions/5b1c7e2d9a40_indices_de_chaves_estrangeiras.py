@@ -0,0 +1,40 @@
+"""Índices nas chaves estrangeiras e no status do acordo
+
+Revision ID: 5b1c7e2d9a40
+Revises: 09aa38aa9122
+Create Date: 2026-10-18 11:52:10.418230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1c7e2d9a40'
+down_revision = '09aa38aa9122'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('acordos', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_acordos_contrato_id'), ['contrato_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_acordos_status'), ['status'], unique=False)
+
+    with op.batch_alter_table('boletos', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_boletos_acordo_id'), ['acordo_id'], unique=False)
+
+    with op.batch_alter_table('contrato', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_contrato_cliente_id'), ['cliente_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('contrato', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_contrato_cliente_id'))
+
+    with op.batch_alter_table('boletos', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_boletos_acordo_id'))
+
+    with op.batch_alter_table('acordos', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_acordos_status'))
+        batch_op.drop_index(batch_op.f('ix_acordos_contrato_id'))
@@ -0,0 +1,32 @@
+"""Índice do armazenamento de boletos (caminho, tamanho e checksum)
+
+Revision ID: 8d4f6a1c3e27
+Revises: 5b1c7e2d9a40
+Create Date: 2026-10-18 12:10:41.207315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4f6a1c3e27'
+down_revision = '5b1c7e2d9a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('boletos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('caminho', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('tamanho', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('checksum', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_boletos_checksum'), ['checksum'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('boletos', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_boletos_checksum'))
+        batch_op.drop_column('checksum')
+        batch_op.drop_column('tamanho')
+        batch_op.drop_column('caminho')
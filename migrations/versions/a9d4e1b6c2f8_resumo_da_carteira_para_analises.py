@@ -0,0 +1,139 @@
+"""Resumo da carteira para os relatórios (analise_carteira*, pendências e triggers)
+
+Revision ID: a9d4e1b6c2f8
+Revises: e2b7c9d4a613
+Create Date: 2026-10-18 15:06:52.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e1b6c2f8'
+down_revision = 'e2b7c9d4a613'
+branch_labels = None
+depends_on = None
+
+# Triggers que marcam os pares (dia de vencimento, filial) alterados; o último comando marca todos os
+# existentes, para o primeiro recálculo montar os resumos.
+DDL_SQLITE = [
+    "CREATE TRIGGER IF NOT EXISTS analise_contrato_ai AFTER INSERT ON contrato BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(new.vencimento), new.filial "
+    "WHERE new.vencimento IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS analise_contrato_ad AFTER DELETE ON contrato BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(old.vencimento), old.filial "
+    "WHERE old.vencimento IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS analise_contrato_au AFTER UPDATE OF vencimento, filial, valor_total ON contrato BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(old.vencimento), old.filial "
+    "WHERE old.vencimento IS NOT NULL; "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(new.vencimento), new.filial "
+    "WHERE new.vencimento IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS analise_acordo_ai AFTER INSERT ON acordos BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(vencimento), filial FROM contrato "
+    "WHERE numero_contrato = new.contrato_id AND vencimento IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS analise_acordo_ad AFTER DELETE ON acordos BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(vencimento), filial FROM contrato "
+    "WHERE numero_contrato = old.contrato_id AND vencimento IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS analise_acordo_au AFTER UPDATE OF status, valor_total, contrato_id ON acordos BEGIN "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(vencimento), filial FROM contrato "
+    "WHERE numero_contrato = old.contrato_id AND vencimento IS NOT NULL; "
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) SELECT date(vencimento), filial FROM contrato "
+    "WHERE numero_contrato = new.contrato_id AND vencimento IS NOT NULL; END",
+    "INSERT OR IGNORE INTO analise_pendencias(vencimento, filial) "
+    "SELECT DISTINCT date(vencimento), filial FROM contrato WHERE vencimento IS NOT NULL",
+]
+
+DDL_POSTGRES = [
+    "CREATE OR REPLACE FUNCTION cobale_analise_contrato() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+    "IF TG_OP <> 'INSERT' THEN IF OLD.vencimento IS NOT NULL THEN "
+    "INSERT INTO analise_pendencias(vencimento, filial) VALUES (OLD.vencimento::date, OLD.filial) "
+    "ON CONFLICT DO NOTHING; END IF; END IF; "
+    "IF TG_OP <> 'DELETE' THEN IF NEW.vencimento IS NOT NULL THEN "
+    "INSERT INTO analise_pendencias(vencimento, filial) VALUES (NEW.vencimento::date, NEW.filial) "
+    "ON CONFLICT DO NOTHING; END IF; END IF; "
+    "RETURN NULL; END $$",
+    "CREATE OR REPLACE FUNCTION cobale_analise_acordo() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+    "IF TG_OP <> 'INSERT' THEN INSERT INTO analise_pendencias(vencimento, filial) "
+    "SELECT vencimento::date, filial FROM contrato WHERE numero_contrato = OLD.contrato_id AND vencimento IS NOT NULL "
+    "ON CONFLICT DO NOTHING; END IF; "
+    "IF TG_OP <> 'DELETE' THEN INSERT INTO analise_pendencias(vencimento, filial) "
+    "SELECT vencimento::date, filial FROM contrato WHERE numero_contrato = NEW.contrato_id AND vencimento IS NOT NULL "
+    "ON CONFLICT DO NOTHING; END IF; "
+    "RETURN NULL; END $$",
+    "DROP TRIGGER IF EXISTS analise_contrato ON contrato",
+    "CREATE TRIGGER analise_contrato AFTER INSERT OR DELETE OR UPDATE OF vencimento, filial, valor_total "
+    "ON contrato FOR EACH ROW EXECUTE FUNCTION cobale_analise_contrato()",
+    "DROP TRIGGER IF EXISTS analise_acordo ON acordos",
+    "CREATE TRIGGER analise_acordo AFTER INSERT OR DELETE OR UPDATE OF status, valor_total, contrato_id "
+    "ON acordos FOR EACH ROW EXECUTE FUNCTION cobale_analise_acordo()",
+    "INSERT INTO analise_pendencias(vencimento, filial) "
+    "SELECT DISTINCT vencimento::date, filial FROM contrato WHERE vencimento IS NOT NULL ON CONFLICT DO NOTHING",
+]
+
+
+def upgrade():
+    tabelas = sa.inspect(op.get_bind()).get_table_names()
+    if 'analise_carteira' not in tabelas:
+        op.create_table(
+            'analise_carteira',
+            sa.Column('vencimento', sa.Date(), nullable=False),
+            sa.Column('filial', sa.String(length=100), nullable=False),
+            sa.Column('situacao', sa.String(length=20), nullable=False),
+            sa.Column('contratos', sa.Integer(), nullable=False),
+            sa.Column('valor_contratos', sa.Float(), nullable=False),
+            sa.Column('valor_acordos', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('vencimento', 'filial', 'situacao')
+        )
+        op.create_index('ix_analise_carteira_filial', 'analise_carteira', ['filial', 'vencimento'], unique=False)
+    if 'analise_carteira_dia' not in tabelas:
+        op.create_table(
+            'analise_carteira_dia',
+            sa.Column('vencimento', sa.Date(), nullable=False),
+            sa.Column('situacao', sa.String(length=20), nullable=False),
+            sa.Column('contratos', sa.Integer(), nullable=False),
+            sa.Column('valor_contratos', sa.Float(), nullable=False),
+            sa.Column('valor_acordos', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('vencimento', 'situacao')
+        )
+    if 'analise_carteira_mes' not in tabelas:
+        op.create_table(
+            'analise_carteira_mes',
+            sa.Column('mes', sa.Date(), nullable=False),
+            sa.Column('filial', sa.String(length=100), nullable=False),
+            sa.Column('situacao', sa.String(length=20), nullable=False),
+            sa.Column('contratos', sa.Integer(), nullable=False),
+            sa.Column('valor_contratos', sa.Float(), nullable=False),
+            sa.Column('valor_acordos', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('mes', 'filial', 'situacao')
+        )
+    if 'analise_pendencias' not in tabelas:
+        op.create_table(
+            'analise_pendencias',
+            sa.Column('vencimento', sa.Date(), nullable=False),
+            sa.Column('filial', sa.String(length=100), nullable=False),
+            sa.PrimaryKeyConstraint('vencimento', 'filial')
+        )
+
+    dialeto = op.get_bind().dialect.name
+    if dialeto in ('postgresql', 'sqlite'):
+        for comando in (DDL_SQLITE if dialeto == 'sqlite' else DDL_POSTGRES):
+            op.execute(comando)
+
+
+def downgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS analise_acordo ON acordos")
+        op.execute("DROP TRIGGER IF EXISTS analise_contrato ON contrato")
+        op.execute("DROP FUNCTION IF EXISTS cobale_analise_acordo()")
+        op.execute("DROP FUNCTION IF EXISTS cobale_analise_contrato()")
+    elif dialeto == 'sqlite':
+        for nome in ('analise_acordo_au', 'analise_acordo_ad', 'analise_acordo_ai',
+                     'analise_contrato_au', 'analise_contrato_ad', 'analise_contrato_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {nome}")
+    op.drop_table('analise_pendencias')
+    op.drop_table('analise_carteira_mes')
+    op.drop_table('analise_carteira_dia')
+    op.drop_index('ix_analise_carteira_filial', table_name='analise_carteira')
+    op.drop_table('analise_carteira')
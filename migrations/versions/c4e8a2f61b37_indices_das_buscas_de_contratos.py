@@ -0,0 +1,50 @@
+"""Filial normalizada e índices das buscas de contratos (vencimento, valor, filial)
+
+Revision ID: c4e8a2f61b37
+Revises: 3f9b2c7d1e54
+Create Date: 2026-10-18 13:41:05.912644
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import unicodedata
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2f61b37'
+down_revision = '3f9b2c7d1e54'
+branch_labels = None
+depends_on = None
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.lower().split())
+
+
+def upgrade():
+    with op.batch_alter_table('contrato', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_normalizada', sa.String(length=100), nullable=True))
+
+    # Filiais são poucas: um UPDATE por filial distinta.
+    contrato = sa.table('contrato', sa.column('filial', sa.String), sa.column('filial_normalizada', sa.String))
+    conexao = op.get_bind()
+    for (filial,) in conexao.execute(sa.select(contrato.c.filial).distinct()).all():
+        conexao.execute(
+            contrato.update().where(contrato.c.filial == filial).values(filial_normalizada=_normalizar(filial))
+        )
+
+    with op.batch_alter_table('contrato', schema=None) as batch_op:
+        batch_op.create_index('ix_contrato_vencimento', ['vencimento', 'numero_contrato'], unique=False)
+        batch_op.create_index('ix_contrato_valor_total', ['valor_total', 'numero_contrato'], unique=False)
+        batch_op.create_index('ix_contrato_filial_normalizada', ['filial_normalizada', 'numero_contrato'], unique=False,
+                              postgresql_ops={'filial_normalizada': 'varchar_pattern_ops'})
+
+
+def downgrade():
+    with op.batch_alter_table('contrato', schema=None) as batch_op:
+        batch_op.drop_index('ix_contrato_filial_normalizada')
+        batch_op.drop_index('ix_contrato_valor_total')
+        batch_op.drop_index('ix_contrato_vencimento')
+        batch_op.drop_column('filial_normalizada')
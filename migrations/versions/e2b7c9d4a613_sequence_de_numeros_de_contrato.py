@@ -0,0 +1,34 @@
+"""Sequence dos números de contrato (PostgreSQL)
+
+Revision ID: e2b7c9d4a613
+Revises: c4e8a2f61b37
+Create Date: 2026-10-18 14:22:37.301958
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c9d4a613'
+down_revision = 'c4e8a2f61b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nos outros bancos a numeração usa a tabela `contadores`, criada e iniciada no primeiro uso.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE SEQUENCE IF NOT EXISTS contrato_numero_seq")
+    # Continua do maior número numérico existente (números importados podem vir sem zeros à esquerda).
+    op.execute(
+        "SELECT setval('contrato_numero_seq', max(numero_contrato::bigint)) FROM contrato "
+        "WHERE numero_contrato ~ '^[0-9]+$' HAVING max(numero_contrato::bigint) > 0"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("DROP SEQUENCE IF EXISTS contrato_numero_seq")
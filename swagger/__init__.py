@@ -7,3 +7,14 @@ api = Api(
     doc="/docs",
     mask_swagger=False,
 )
+
+
+def criar_parser_listagem(ns):
+    """Parser dos parâmetros de paginação por cursor e projeção das rotas de listagem."""
+    parser = ns.parser()
+    parser.add_argument("after", type=str, location="args", help="Cursor: última chave da página anterior (X-Proximo-Cursor)")
+    parser.add_argument("limit", type=int, location="args", help="Quantidade máxima de itens na página")
+    parser.add_argument("fields", type=str, location="args", help="Campos a retornar, separados por vírgula")
+    parser.add_argument("stream", type=str, location="args", choices=("1", "json", "ndjson"),
+                        help="Resposta em streaming (array JSON em chunks ou NDJSON), sem limite de página")
+    return parser
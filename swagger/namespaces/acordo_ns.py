@@ -1,10 +1,13 @@
-from flask import request, render_template, make_response, current_app
+from flask import request, Response, stream_with_context
 from flask_restx import Namespace, Resource, fields
-from app.controllers import acordo_controller
+from app.controllers import acordo_controller, oferta_controller, boleto_job_controller, envio_boleto_controller
 from app.controllers.acordo_controller import simular_acordo
-from weasyprint import HTML
-import qrcode, io, base64, os, barcode
-from barcode.writer import ImageWriter
+from app.models.acordo import Acordo
+from app.armazenamento import resposta_pdf_boleto
+from app.lote import ler_itens, status_http
+from app.paginacao import ler_listagem, proximo_cursor, quer_stream, resposta_stream
+from swagger import criar_parser_listagem
+import json
 
 
 
@@ -31,6 +34,14 @@ acordo_model = acordo_ns.model("Acordo", {
 })
 
 
+simulacao_lote_model = acordo_ns.model("SimulacaoLote", {
+    "simulacoes": fields.List(fields.Raw, description="Lista de payloads de simulação (alternativa aos campos abaixo)"),
+    "valor_original": fields.Float(description="Valor original da dívida", default=2194.32),
+    "dias_em_atraso": fields.Integer(description="Dias em atraso", default=135),
+    "valor_entrada": fields.Float(description="Valor de entrada (opcional)"),
+    "quantidades_parcelas": fields.List(fields.Integer, description="Quantidades de parcelas a simular (1 = à vista)"),
+})
+
 boleto_model = acordo_ns.model('Boleto', {
     'id': fields.Integer(readonly=True, description='ID do boleto'),
     'acordo_id': fields.Integer(required=True, description='ID do acordo vinculado'),
@@ -39,12 +50,71 @@ boleto_model = acordo_ns.model('Boleto', {
     'enviado': fields.Boolean(description='Indica se o boleto foi enviado'),
 })
 
+boleto_job_model = acordo_ns.model("BoletoJob", {
+    "id": fields.String(readOnly=True, description="ID do job"),
+    "acordo_id": fields.Integer(description="ID do acordo"),
+    "lote_id": fields.String(description="ID do lote, quando o job veio de uma geração em lote"),
+    "status": fields.String(description="pendente, processando, concluido ou erro"),
+    "tentativas": fields.Integer(description="Tentativas de renderização"),
+    "erro": fields.String(description="Último erro, se houver"),
+    "boleto_id": fields.Integer(description="ID do boleto gerado (quando concluído)"),
+    "criado_em": fields.String(description="Data de criação do job"),
+    "iniciado_em": fields.String(description="Início da última tentativa"),
+    "finalizado_em": fields.String(description="Fim da última tentativa"),
+})
+
+boleto_lote_model = acordo_ns.model("BoletoLote", {
+    "vencimento_inicio": fields.String(description="Vencimento inicial (YYYY-MM-DD)", default="2025-08-01"),
+    "vencimento_fim": fields.String(description="Vencimento final, inclusivo (YYYY-MM-DD)", default="2025-08-31"),
+    "status": fields.String(description="Status dos acordos (opcional)"),
+    "regerar": fields.Boolean(description="Gera de novo mesmo acordos que já têm boleto", default=False),
+})
+
+envio_boleto_model = acordo_ns.model("EnvioBoleto", {
+    "id": fields.String(readOnly=True, description="ID do envio"),
+    "boleto_id": fields.Integer(description="ID do boleto"),
+    "lote_id": fields.String(description="ID do lote, quando o envio veio de um envio em lote"),
+    "destinatario": fields.String(description="E-mail do cliente"),
+    "status": fields.String(description="pendente, enviando, enviado ou erro"),
+    "tentativas": fields.Integer(description="Tentativas de envio"),
+    "proxima_tentativa": fields.String(description="Quando o envio pendente será tentado de novo"),
+    "erro": fields.String(description="Último erro, se houver"),
+    "criado_em": fields.String(description="Data de criação do envio"),
+    "enviado_em": fields.String(description="Data do envio"),
+})
+
+envio_lote_model = acordo_ns.model("EnvioBoletoLote", {
+    "vencimento_inicio": fields.String(description="Vencimento inicial (YYYY-MM-DD)", default="2025-08-01"),
+    "vencimento_fim": fields.String(description="Vencimento final, inclusivo (YYYY-MM-DD)", default="2025-08-31"),
+    "status": fields.String(description="Status dos acordos (opcional)"),
+    "reenviar": fields.Boolean(description="Envia de novo boletos já enviados", default=False),
+})
+
+acordo_lote_model = acordo_ns.model("AcordoLote", {
+    "itens": fields.List(fields.Nested(acordo_model), required=True, description="Acordos a criar")
+})
+
+listagem_parser = criar_parser_listagem(acordo_ns)
+
+
 @acordo_ns.route("/")
 class AcordoList(Resource):
-    @acordo_ns.marshal_list_with(acordo_model)
+    @acordo_ns.expect(listagem_parser)
+    @acordo_ns.response(200, "Página de acordos (próximo cursor em X-Proximo-Cursor)", [acordo_model])
     def get(self):
-        """Listar todos os acordos"""
-        return acordo_controller.listar_acordos()
+        """Listar acordos (paginado por cursor)"""
+        try:
+            after, limite, campos = ler_listagem(request.args, Acordo.CAMPOS, "id", int)
+        except ValueError as e:
+            acordo_ns.abort(400, str(e))
+
+        formato = quer_stream(request.args)
+        if formato:
+            return resposta_stream(acordo_controller.iterar_acordos(after, limite, campos), formato)
+
+        acordos = acordo_controller.listar_acordos(after, limite, campos)
+        cursor = proximo_cursor(acordos, limite, "id")
+        return acordos, 200, {"X-Proximo-Cursor": cursor} if cursor else {}
 
     @acordo_ns.expect(acordo_model, validate=True)
     def post(self):
@@ -57,6 +127,22 @@ class AcordoList(Resource):
         return response, 201
 
 
+@acordo_ns.route("/lote")
+class AcordoLote(Resource):
+    @acordo_ns.expect(acordo_lote_model)
+    @acordo_ns.response(201, "Todos os acordos criados")
+    @acordo_ns.response(207, "Parte dos acordos criada; veja o resultado de cada item")
+    @acordo_ns.response(400, "Nenhum acordo criado")
+    def post(self):
+        """Criar vários acordos de uma vez (resultado por item)"""
+        try:
+            itens = ler_itens(request.get_json(silent=True))
+        except ValueError as e:
+            return {"erro": str(e)}, 400
+        resultado = acordo_controller.criar_acordos_lote(itens)
+        return resultado, status_http(resultado)
+
+
 @acordo_ns.route("/<int:id>")
 @acordo_ns.param("id", "ID do acordo")
 class AcordoDetail(Resource):
@@ -109,7 +195,35 @@ class AcordoSimulacao(Resource):
             import traceback
             traceback.print_exc()
             return {"erro": "Erro interno ao processar a simulação"}, 500
-        
+
+
+@acordo_ns.route("/simular/lote")
+class AcordoSimulacaoLote(Resource):
+    @acordo_ns.expect(simulacao_lote_model)
+    @acordo_ns.produces(["application/x-ndjson"])
+    def post(self):
+        """Simular vários acordos de uma vez (resposta em NDJSON)"""
+        try:
+            payloads = acordo_controller.payloads_simulacao_lote(request.get_json())
+        except ValueError as e:
+            return {"erro": str(e)}, 400
+
+        linhas = (
+            json.dumps(resultado, ensure_ascii=False) + "\n"
+            for resultado in acordo_controller.simular_acordos_lote(payloads)
+        )
+        return Response(stream_with_context(linhas), mimetype="application/x-ndjson")
+
+@acordo_ns.route("/ofertas/<string:numero_contrato>")
+@acordo_ns.param("numero_contrato", "Número do contrato")
+class OfertasContrato(Resource):
+    def get(self, numero_contrato):
+        """Matriz de ofertas do contrato (à vista e 2x a 24x), calculada uma vez por dia"""
+        matriz = oferta_controller.matriz_ofertas(numero_contrato)
+        if not matriz:
+            return {"erro": "Contrato não encontrado"}, 404
+        return matriz, 200
+
 @acordo_ns.route("/info_boleto/<int:acordo_id>")
 @acordo_ns.param("acordo_id", "ID do acordo")
 class InfoBoleto(Resource):
@@ -129,66 +243,117 @@ class InfoBoleto(Resource):
 @acordo_ns.route("/gerar_boleto/<int:acordo_id>")
 @acordo_ns.param("acordo_id", "ID do acordo")
 class BoletoPDF(Resource):
+    @acordo_ns.produces(["application/pdf"])
     def get(self, acordo_id):
         """Gerar PDF do boleto de um acordo pelo ID"""
+        if not acordo_controller.obter_acordo(acordo_id):
+            return {"erro": "Acordo não encontrado"}, 404
         try:
-            boleto_info, status = acordo_controller.info_boleto(acordo_id)
-            if status != 200:
-                return boleto_info, status
-
-            qr = qrcode.QRCode(box_size=4, border=1)
-            qr.add_data(f"https://www.seuboleto.com.br/gerar?codigo={boleto_info['nosso_numero']}")
-            qr.make(fit=True)
-            img_qr = qr.make_image(fill_color="black", back_color="white")
-            buf_qr = io.BytesIO()
-            img_qr.save(buf_qr, format="PNG")
-            qr_code_b64 = base64.b64encode(buf_qr.getvalue()).decode("utf-8")
-
-            CODE128 = barcode.get_barcode_class('code128')
-            bar = CODE128(boleto_info['nosso_numero'], writer=ImageWriter())
-            buf_bar = io.BytesIO()
-            bar.write(buf_bar)
-            barcode_b64 = base64.b64encode(buf_bar.getvalue()).decode("utf-8")
-
-            logo_path = os.path.join(current_app.root_path, "..", "importadores", "img", "logo_CobAle.png")
-            with open(logo_path, "rb") as f:
-                logo_b64 = base64.b64encode(f.read()).decode("utf-8")
-
-            html = render_template(
-                "boleto.html",
-                boleto=boleto_info,
-                qr_code=qr_code_b64,
-                barcode_img=barcode_b64,
-                logo_b64=logo_b64
-            )
+            boleto, arquivo = acordo_controller.gerar_boleto(acordo_id)
+        except Exception as e:
+            print(f"Erro ao gerar PDF do boleto: {e}")
+            return {"erro": str(e)}, 500
 
-            pdf = HTML(string=html).write_pdf()
+        return resposta_pdf_boleto(boleto, arquivo)
 
-            pasta_boletos = os.environ.get("PASTA_BOLETOS", os.path.join(current_app.root_path, "..", "boletos"))
-            os.makedirs(pasta_boletos, exist_ok=True)
-            caminho_pdf = os.path.join(pasta_boletos, f"boleto_{acordo_id}.pdf")
-            with open(caminho_pdf, "wb") as f:
-                f.write(pdf)
+@acordo_ns.route("/gerar_boleto/<int:acordo_id>/async")
+@acordo_ns.param("acordo_id", "ID do acordo")
+class BoletoPDFAsync(Resource):
+    @acordo_ns.response(202, "Job enfileirado", boleto_job_model)
+    def post(self, acordo_id):
+        """Enfileirar a geração do PDF do boleto (acompanhe pelo job retornado)"""
+        job = boleto_job_controller.criar_job(acordo_id)
+        if not job:
+            return {"erro": "Acordo não encontrado"}, 404
+        return job, 202, {"Location": acordo_ns.apis[0].url_for(BoletoJobStatus, job_id=job["id"])}
 
-            response = make_response(pdf)
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = f'inline; filename=boleto_{acordo_id}.pdf'
-            return response
+@acordo_ns.route("/boletos/jobs/<string:job_id>")
+@acordo_ns.param("job_id", "ID do job")
+class BoletoJobStatus(Resource):
+    @acordo_ns.marshal_with(boleto_job_model)
+    def get(self, job_id):
+        """Consultar o status de um job de boleto"""
+        job = boleto_job_controller.obter_job(job_id)
+        if not job:
+            acordo_ns.abort(404, "Job não encontrado")
+        return job
 
-        except Exception as e:
-            print(f"Erro ao gerar PDF do boleto: {e}")
-            return {"erro": str(e)}, 500
+@acordo_ns.route("/boletos/lote")
+class BoletoLote(Resource):
+    @acordo_ns.expect(boleto_lote_model)
+    def post(self):
+        """Enfileirar os boletos de todos os acordos de um intervalo de vencimento e/ou status"""
+        data = request.get_json() or {}
+        try:
+            lote = boleto_job_controller.criar_lote(
+                data.get("vencimento_inicio"), data.get("vencimento_fim"),
+                data.get("status"), bool(data.get("regerar", False))
+            )
+        except ValueError as e:
+            return {"erro": str(e)}, 400
+        if not lote["lote_id"]:
+            return lote, 200
+        return lote, 202, {"Location": acordo_ns.apis[0].url_for(BoletoLoteProgresso, lote_id=lote["lote_id"])}
 
-@acordo_ns.route("/enviar_boleto/<int:boleto_id>")
-@acordo_ns.param("boleto_id", "ID do boleto")
+@acordo_ns.route("/boletos/lotes/<string:lote_id>")
+@acordo_ns.param("lote_id", "ID do lote")
+class BoletoLoteProgresso(Resource):
+    def get(self, lote_id):
+        """Progresso de um lote de boletos (quantidade de jobs por status)"""
+        progresso = boleto_job_controller.progresso_lote(lote_id)
+        if not progresso:
+            return {"erro": "Lote não encontrado"}, 404
+        return progresso, 200
+
+@acordo_ns.route("/enviar_boleto/<int:acordo_id>")
+@acordo_ns.param("acordo_id", "ID do acordo")
 class EnviarBoleto(Resource):
-    def post(self, boleto_id):
-        """Enviar boleto por e-mail ou outro canal"""
+    @acordo_ns.response(202, "Envio enfileirado", envio_boleto_model)
+    def post(self, acordo_id):
+        """Enfileirar o envio do boleto do acordo por e-mail (gera o PDF se preciso)"""
         try:
-            resultado = acordo_controller.enviar_boleto(boleto_id)
-            return resultado, 200
+            envio = envio_boleto_controller.enfileirar_envio(acordo_id)
+        except ValueError as e:
+            return {"erro": str(e)}, 400
+        if not envio:
+            return {"erro": "Acordo não encontrado"}, 404
+        return envio, 202, {"Location": acordo_ns.apis[0].url_for(EnvioBoletoStatus, envio_id=envio["id"])}
+
+@acordo_ns.route("/boletos/envios/<string:envio_id>")
+@acordo_ns.param("envio_id", "ID do envio")
+class EnvioBoletoStatus(Resource):
+    @acordo_ns.marshal_with(envio_boleto_model)
+    def get(self, envio_id):
+        """Consultar o status de um envio de boleto"""
+        envio = envio_boleto_controller.obter_envio(envio_id)
+        if not envio:
+            acordo_ns.abort(404, "Envio não encontrado")
+        return envio
+
+@acordo_ns.route("/boletos/envios/lote")
+class EnvioBoletoLote(Resource):
+    @acordo_ns.expect(envio_lote_model)
+    def post(self):
+        """Enfileirar o envio por e-mail dos boletos de um intervalo de vencimento e/ou status"""
+        data = request.get_json() or {}
+        try:
+            lote = envio_boleto_controller.criar_lote_envios(
+                data.get("vencimento_inicio"), data.get("vencimento_fim"),
+                data.get("status"), bool(data.get("reenviar", False))
+            )
         except ValueError as e:
-            return {"erro": str(e)}, 404
-        except Exception as e:
             return {"erro": str(e)}, 400
+        if not lote["lote_id"]:
+            return lote, 200
+        return lote, 202, {"Location": acordo_ns.apis[0].url_for(EnvioBoletoLoteProgresso, lote_id=lote["lote_id"])}
+
+@acordo_ns.route("/boletos/envios/lotes/<string:lote_id>")
+@acordo_ns.param("lote_id", "ID do lote")
+class EnvioBoletoLoteProgresso(Resource):
+    def get(self, lote_id):
+        """Progresso de um lote de envios (quantidade de envios por status)"""
+        progresso = envio_boleto_controller.progresso_lote_envios(lote_id)
+        if not progresso:
+            return {"erro": "Lote não encontrado"}, 404
+        return progresso, 200
 
@@ -2,6 +2,8 @@ from flask import request, jsonify
 from flask_restx import Namespace, Resource, fields
 from app.controllers import cliente_controller
 from app.models.cliente import Cliente
+from app.paginacao import ler_campos, ler_listagem, proximo_cursor, quer_stream, resposta_stream
+from swagger import criar_parser_listagem
 
 cliente_ns = Namespace("clientes", description="Operações com clientes")
 
@@ -23,16 +25,34 @@ cliente_model = cliente_ns.model("Cliente", {
     "data_nascimento": fields.Date(required=True, description="Data de nascimento do cliente"),
     "enderecos": fields.List(fields.Nested(endereco_model), description="Lista de endereços do cliente")
 })
+listagem_parser = criar_parser_listagem(cliente_ns)
 
-
+busca_parser = cliente_ns.parser()
+busca_parser.add_argument("q", type=str, location="args", required=True,
+                          help="Nome (sem diferenciar acentos) ou início do CPF")
+busca_parser.add_argument("page", type=int, location="args", help="Página (começa em 1)")
+busca_parser.add_argument("limit", type=int, location="args", help="Itens por página (padrão BUSCA_LIMITE_PADRAO)")
+busca_parser.add_argument("fields", type=str, location="args", help="Campos a retornar, separados por vírgula")
 
 
 @cliente_ns.route("/")
 class ClienteList(Resource):
-    @cliente_ns.marshal_list_with(cliente_model)
+    @cliente_ns.expect(listagem_parser)
+    @cliente_ns.response(200, "Página de clientes (próximo cursor em X-Proximo-Cursor)", [cliente_model])
     def get(self):
-        """Listar todos os clientes"""
-        return cliente_controller.listar_clientes()
+        """Listar clientes (paginado por cursor)"""
+        try:
+            after, limite, campos = ler_listagem(request.args, Cliente.CAMPOS, "id", int)
+        except ValueError as e:
+            cliente_ns.abort(400, str(e))
+
+        formato = quer_stream(request.args)
+        if formato:
+            return resposta_stream(cliente_controller.iterar_clientes(after, limite, campos), formato)
+
+        clientes = cliente_controller.listar_clientes(after, limite, campos)
+        cursor = proximo_cursor(clientes, limite, "id")
+        return clientes, 200, {"X-Proximo-Cursor": cursor} if cursor else {}
 
     @cliente_ns.expect(cliente_model)
     @cliente_ns.marshal_with(cliente_model, code=201)
@@ -71,6 +91,23 @@ class ClienteDetail(Resource):
         return {"mensagem": "Cliente deletado com sucesso"}, 204
 
 
+@cliente_ns.route("/busca")
+class ClienteBusca(Resource):
+    @cliente_ns.expect(busca_parser)
+    @cliente_ns.response(200, "Clientes mais relevantes primeiro (próxima página em X-Proxima-Pagina)", [cliente_model])
+    def get(self):
+        """Buscar clientes por nome ou CPF (paginado, ordenado por relevância)"""
+        try:
+            pagina = request.args.get("page", 1, type=int)
+            campos = ler_campos(request.args, Cliente.CAMPOS)
+            clientes, tem_mais = cliente_controller.buscar_clientes(
+                request.args.get("q"), pagina, request.args.get("limit", type=int), campos
+            )
+        except ValueError as e:
+            cliente_ns.abort(400, str(e))
+        return clientes, 200, {"X-Proxima-Pagina": str(pagina + 1)} if tem_mais else {}
+
+
 @cliente_ns.route("/buscar_por_cpf/<string:cpf>")
 @cliente_ns.param("cpf", "CPF do cliente")
 class ClientePorCPF(Resource):
@@ -89,30 +126,11 @@ class ClientePorNome(Resource):
     def get(self, nome):
         """Buscar clientes pelo nome (parcial, sem erro de atributo)"""
         try:
-            clientes = Cliente.query.filter(Cliente.nome.ilike(f"%{nome}%")).all()
+            resultado = cliente_controller.buscar_clientes_por_nome(nome)
 
-            if not clientes:
+            if not resultado:
                 return jsonify({"error": "Nenhum cliente encontrado"}), 404
 
-            resultado = []
-            for c in clientes:
-                resultado.append({
-                    "id": c.id,
-                    "nome": c.nome,
-                    "cpf": c.cpf,
-                    "telefone": c.telefone,
-                    "email": c.email,
-                    "data_nascimento": c.data_nascimento.strftime("%Y-%m-%d"),
-                    "enderecos": [{
-                        "id": e.id,
-                        "rua": e.rua,
-                        "numero": e.numero,
-                        "cidade": e.cidade,
-                        "estado": e.estado,
-                        "cep": e.cep
-                    } for e in c.enderecos]
-                })
-
             return jsonify(resultado)
 
         except Exception as e:
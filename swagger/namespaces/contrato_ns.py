@@ -1,6 +1,9 @@
 from flask import request
 from flask_restx import Namespace, Resource, fields
 from app.controllers import contrato_controller
+from app.lote import ler_itens, status_http
+from app.paginacao import ler_listagem, proximo_cursor, quer_stream, resposta_stream
+from swagger import criar_parser_listagem
 
 contrato_ns = Namespace("contratos", description="Operações com contratos")
 
@@ -12,12 +15,31 @@ contrato_model = contrato_ns.model("Contrato", {
     "filial": fields.String(required=True, description="Filial ou loja do débito", default="Loja Central")
 })
 
+contrato_lote_model = contrato_ns.model("ContratoLote", {
+    "itens": fields.List(fields.Nested(contrato_model), required=True, description="Contratos a criar")
+})
+
+listagem_parser = criar_parser_listagem(contrato_ns)
+
+
 @contrato_ns.route("/")
 class ContratoList(Resource):
-    @contrato_ns.marshal_list_with(contrato_model)
+    @contrato_ns.expect(listagem_parser)
+    @contrato_ns.response(200, "Página de contratos (próximo cursor em X-Proximo-Cursor)", [contrato_model])
     def get(self):
-        """Listar todos os contratos"""
-        return contrato_controller.listar_contratos()
+        """Listar contratos (paginado por cursor)"""
+        try:
+            after, limite, campos = ler_listagem(request.args, contrato_controller.CAMPOS_CONTRATO, "numero_contrato")
+        except ValueError as e:
+            contrato_ns.abort(400, str(e))
+
+        formato = quer_stream(request.args)
+        if formato:
+            return resposta_stream(contrato_controller.iterar_contratos(after, limite, campos), formato)
+
+        contratos = contrato_controller.listar_contratos(after, limite, campos)
+        cursor = proximo_cursor(contratos, limite, "numero_contrato")
+        return contratos, 200, {"X-Proximo-Cursor": cursor} if cursor else {}
 
     @contrato_ns.expect(contrato_model)
     @contrato_ns.marshal_with(contrato_model, code=201)
@@ -27,6 +49,22 @@ class ContratoList(Resource):
         return contrato_controller.criar_contrato(data), 201
 
 
+@contrato_ns.route("/lote")
+class ContratoLote(Resource):
+    @contrato_ns.expect(contrato_lote_model)
+    @contrato_ns.response(201, "Todos os contratos criados")
+    @contrato_ns.response(207, "Parte dos contratos criada; veja o resultado de cada item")
+    @contrato_ns.response(400, "Nenhum contrato criado")
+    def post(self):
+        """Criar vários contratos de uma vez (resultado por item)"""
+        try:
+            itens = ler_itens(request.get_json(silent=True))
+        except ValueError as e:
+            return {"erro": str(e)}, 400
+        resultado = contrato_controller.criar_contratos_lote(itens)
+        return resultado, status_http(resultado)
+
+
 @contrato_ns.route("/<string:numero_contrato>")
 @contrato_ns.param("numero_contrato", "Número do contrato (6 dígitos)")
 class ContratoDetail(Resource):
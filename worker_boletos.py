@@ -0,0 +1,37 @@
+import argparse
+
+from app import create_app
+from app.controllers import boleto_job_controller
+
+app = create_app()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker que renderiza os boletos enfileirados em boleto_jobs.")
+    parser.add_argument("--processos", type=int, default=None, help="Processos de renderização (padrão: um por núcleo)")
+    parser.add_argument("--intervalo", type=float, default=None, help="Segundos entre consultas à fila vazia")
+    parser.add_argument("--uma-vez", action="store_true", help="Processa a fila atual e encerra")
+
+    lote = parser.add_argument_group("geração em lote", "Enfileira os acordos filtrados e processa até acabar")
+    lote.add_argument("--vencimento-inicio", help="Vencimento inicial (YYYY-MM-DD)")
+    lote.add_argument("--vencimento-fim", help="Vencimento final, inclusivo (YYYY-MM-DD)")
+    lote.add_argument("--status", help="Status dos acordos")
+    lote.add_argument("--regerar", action="store_true", help="Gera de novo acordos que já têm boleto")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.vencimento_inicio or args.vencimento_fim or args.status:
+            criado = boleto_job_controller.criar_lote(args.vencimento_inicio, args.vencimento_fim, args.status, args.regerar)
+            if not criado["lote_id"]:
+                print("Nenhum acordo a enfileirar com esse filtro.")
+            else:
+                print(f"Lote {criado['lote_id']}: {criado['total']} boletos enfileirados.")
+
+                def mostrar_progresso(concluidos, erros):
+                    progresso = boleto_job_controller.progresso_lote(criado["lote_id"]) or {}
+                    print(f"  {progresso.get('percentual', 100):6.2f}% | {concluidos} gerados | {erros} falhas", flush=True)
+
+                resumo = boleto_job_controller.executar_worker(args.processos, args.intervalo, uma_vez=True,
+                                                               ao_progredir=mostrar_progresso)
+                print(f"Fim: {resumo['concluidos']} gerados, {resumo['erros']} falhas.")
+        else:
+            boleto_job_controller.executar_worker(args.processos, args.intervalo, uma_vez=args.uma_vez)
@@ -0,0 +1,37 @@
+import argparse
+
+from app import create_app
+from app.controllers import envio_boleto_controller
+
+app = create_app()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker que envia por e-mail os boletos enfileirados em envios_boleto.")
+    parser.add_argument("--conexoes", type=int, default=None, help="Conexões SMTP simultâneas (padrão: MAIL_ENVIO_CONEXOES)")
+    parser.add_argument("--intervalo", type=float, default=None, help="Segundos entre consultas à fila vazia")
+    parser.add_argument("--uma-vez", action="store_true", help="Envia a fila atual e encerra")
+
+    lote = parser.add_argument_group("envio em lote", "Enfileira os boletos dos acordos filtrados e envia até acabar")
+    lote.add_argument("--vencimento-inicio", help="Vencimento inicial (YYYY-MM-DD)")
+    lote.add_argument("--vencimento-fim", help="Vencimento final, inclusivo (YYYY-MM-DD)")
+    lote.add_argument("--status", help="Status dos acordos")
+    lote.add_argument("--reenviar", action="store_true", help="Envia de novo boletos já enviados")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.vencimento_inicio or args.vencimento_fim or args.status:
+            criado = envio_boleto_controller.criar_lote_envios(args.vencimento_inicio, args.vencimento_fim, args.status, args.reenviar)
+            if not criado["lote_id"]:
+                print("Nenhum boleto a enviar com esse filtro.")
+            else:
+                print(f"Lote {criado['lote_id']}: {criado['total']} e-mails enfileirados.")
+
+                def mostrar_progresso(enviados, erros):
+                    progresso = envio_boleto_controller.progresso_lote_envios(criado["lote_id"]) or {}
+                    print(f"  {progresso.get('percentual', 100):6.2f}% | {enviados} enviados | {erros} falhas", flush=True)
+
+                resumo = envio_boleto_controller.executar_envios(args.conexoes, args.intervalo, uma_vez=True,
+                                                                 ao_progredir=mostrar_progresso)
+                print(f"Fim: {resumo['enviados']} enviados, {resumo['erros']} falhas.")
+        else:
+            envio_boleto_controller.executar_envios(args.conexoes, args.intervalo, uma_vez=args.uma_vez)
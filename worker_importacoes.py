@@ -0,0 +1,22 @@
+import argparse
+
+from app import create_app
+from app.controllers import importacao_controller
+
+app = create_app()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker que roda as importações enfileiradas em importacao_jobs.")
+    parser.add_argument("--intervalo", type=float, default=None, help="Segundos entre consultas à fila vazia")
+    parser.add_argument("--uma-vez", action="store_true", help="Processa a fila atual e encerra")
+    args = parser.parse_args()
+
+    with app.app_context():
+        def mostrar_resultado(job):
+            print(f"  {job['entidade']} ({job['nome_arquivo']}): {job['status']} | {job['inseridos']} inseridos, "
+                  f"{job['atualizados']} atualizados, {job['invalidos']} inválidos", flush=True)
+
+        resumo = importacao_controller.executar_worker_importacoes(args.intervalo, uma_vez=args.uma_vez,
+                                                                   ao_concluir=mostrar_resultado)
+        if args.uma_vez:
+            print(f"Fim: {resumo['concluidos']} importações concluídas, {resumo['erros']} com erro.")